@@ -1,8 +1,17 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List
+from contextlib import asynccontextmanager
+from typing import List, Optional
+import asyncio
+import json
 import os
+import threading
+import time
+
+from backend import metrics
+from backend.cache import LRUCache, SQLiteCache, TieredCache, make_key, normalize_text
 
 # Debug: Print startup info
 print("=" * 50)
@@ -15,9 +24,33 @@ print("=" * 50)
 # DON'T import recommend here - it loads heavy models!
 # Import it inside the endpoint function instead
 
+# Opt-in: WARMUP=1 loads the model and index in the background at startup
+# and keeps /ready false until that finishes. Without it, models stay lazy.
+WARMUP = os.getenv("WARMUP", "0") == "1"
+
+_READINESS = {"ready": not WARMUP, "error": None}
+
+def _warm_up():
+    try:
+        from backend.pipeline import warmup
+        warmup()
+        _READINESS["ready"] = True
+        print("✅ Warm-up complete")
+    except Exception as e:
+        _READINESS["error"] = repr(e)
+        print(f"❌ Warm-up failed: {e!r}")
+
+@asynccontextmanager
+async def lifespan(app):
+    if WARMUP:
+        # Thread, not task: importing torch would block the event loop
+        threading.Thread(target=_warm_up, name="warmup", daemon=True).start()
+    yield
+
 app = FastAPI(
     title="SHL Assessment Recommendation API",
-    version="1.0"
+    version="1.0",
+    lifespan=lifespan
 )
 
 # ✅ CORS CONFIGURATION
@@ -33,9 +66,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Timing", "ETag"],
 )
 
 
+# Set TIMING_HEADER=1 to always send X-Timing; otherwise only when the
+# client asks for it with an "X-Timing: 1" request header
+TIMING_HEADER = os.getenv("TIMING_HEADER", "0") == "1"
+
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    want_breakdown = TIMING_HEADER or request.headers.get("x-timing") == "1"
+    timings = metrics.start_request_timings() if want_breakdown else None
+
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+
+    # Route template keeps label cardinality bounded
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    metrics.REQUEST_SECONDS.observe(elapsed, path=path)
+    metrics.REQUESTS.inc(path=path, status=response.status_code)
+
+    if timings is not None:
+        timings["total"] = elapsed
+        response.headers["X-Timing"] = metrics.format_timings(timings)
+    return response
+
+
 # ---------- Request / Response Models ----------
 
 class RecommendRequest(BaseModel):
@@ -53,6 +112,75 @@ class Assessment(BaseModel):
 class RecommendResponse(BaseModel):
     recommended_assessments: List[Assessment]
 
+class BatchRecommendRequest(BaseModel):
+    queries: List[str]
+
+class BatchRecommendResult(RecommendResponse):
+    query: str
+    error: Optional[str] = None
+
+class BatchRecommendResponse(BaseModel):
+    results: List[BatchRecommendResult]
+
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", "500"))
+
+
+# ---------- Response Cache ----------
+
+# Whole /recommend responses, keyed on the normalized query + catalog
+# version. Set RESPONSE_CACHE_PATH to share them between workers.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+# Cache-Control max-age (seconds) for browsers and CDNs; 0 = revalidate
+RESPONSE_MAX_AGE = int(os.getenv("RESPONSE_MAX_AGE", "300"))
+
+_RESPONSE_CACHE = None
+_RESPONSE_CACHE_VERSION = None
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+def get_response_cache(version):
+    """
+    The response cache for `version`, or None if disabled. When the catalog
+    version changes the memory tier is dropped; disk entries carry the old
+    version in their key, so they are never served and age out by TTL.
+    """
+    global _RESPONSE_CACHE, _RESPONSE_CACHE_VERSION
+    if not RESPONSE_CACHE_ENABLED or version is None:
+        return None
+    with _RESPONSE_CACHE_LOCK:
+        if _RESPONSE_CACHE is None:
+            disk = None
+            if RESPONSE_CACHE_PATH:
+                disk = SQLiteCache(
+                    RESPONSE_CACHE_PATH,
+                    max_size=RESPONSE_CACHE_SIZE * 10,
+                    ttl=RESPONSE_CACHE_TTL
+                )
+            _RESPONSE_CACHE = TieredCache(
+                LRUCache(max_size=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL),
+                disk
+            )
+            metrics.register_cache("response", _RESPONSE_CACHE)
+        if version != _RESPONSE_CACHE_VERSION:
+            if _RESPONSE_CACHE_VERSION is not None:
+                print(f"✅ Catalog version changed ({_RESPONSE_CACHE_VERSION} -> {version}), "
+                      "response cache cleared")
+            _RESPONSE_CACHE.memory.clear()
+            _RESPONSE_CACHE_VERSION = version
+    return _RESPONSE_CACHE
+
+def cache_headers(etag):
+    cache_control = f"public, max-age={RESPONSE_MAX_AGE}" if RESPONSE_MAX_AGE > 0 else "no-cache"
+    return {"ETag": f'"{etag}"', "Cache-Control": cache_control}
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/").strip('"') for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
 
 # --------- Health ----------
 @app.get("/")
@@ -60,33 +188,119 @@ class RecommendResponse(BaseModel):
 def health():
     return {"status": "ok", "service": "SHL Assessment Recommendation API"}
 
+# --------- Readiness ----------
+@app.get("/ready")
+def ready():
+    # 503 until warm-up finishes, so load balancers only route to warm instances
+    if not _READINESS["ready"]:
+        raise HTTPException(
+            status_code=503,
+            detail={"ready": False, "error": _READINESS["error"]}
+        )
+    return {"ready": True}
+
+# --------- Metrics ----------
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
 # --------- Recommend ----------
 @app.post("/recommend", response_model=RecommendResponse)
-def recommend_assessments(req: RecommendRequest):
+async def recommend_assessments(req: RecommendRequest, request: Request):
+    return await recommend_response(req.query, request)
+
+@app.get("/recommend", response_model=RecommendResponse)
+async def recommend_assessments_get(query: str, request: Request):
+    # Same as POST, but cacheable by browsers and CDNs
+    return await recommend_response(query, request)
+
+async def recommend_response(query, request):
     # Lazy import: only load heavy models when this endpoint is actually called
-    from backend.pipeline import recommend
-    
-    results = recommend(req.query, max_results=10)
+    from backend.pipeline import catalog_version, recommend_async, run_blocking
 
-    if not results:
+    try:
+        version = await run_blocking(catalog_version)
+    except Exception as e:
+        print(f"⚠️ Catalog version unavailable, skipping response cache: {e!r}")
+        version = None
+
+    # The SQLite tier (RESPONSE_CACHE_PATH) does disk I/O; keep it off the loop
+    cache = await run_blocking(get_response_cache, version)
+    key = make_key("recommend", version, normalize_text(query))
+    entry = await run_blocking(cache.get, key) if cache is not None else None
+
+    if entry is None:
+        try:
+            results = await recommend_async(query, max_results=10)
+        except asyncio.TimeoutError:
+            # Waited on an identical in-flight request past COALESCE_TIMEOUT
+            raise HTTPException(status_code=504, detail="Recommendation timed out.")
+
+        if not results:
+            raise HTTPException(
+                status_code=200,
+                detail="No recommendations found for the given query."
+            )
+
+        payload = {"recommended_assessments": format_results(results)}
+        # Content hash: an unchanged answer revalidates even across versions
+        etag = make_key(json.dumps(payload, sort_keys=True))[:32]
+        entry = {"etag": etag, "payload": payload}
+        if cache is not None:
+            await run_blocking(cache.set, key, entry)
+
+    headers = cache_headers(entry["etag"])
+    if etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(entry["payload"], headers=headers)
+
+@app.post("/recommend/batch", response_model=BatchRecommendResponse)
+async def recommend_assessments_batch(req: BatchRecommendRequest):
+    if not req.queries:
+        raise HTTPException(status_code=400, detail="queries must not be empty.")
+    if len(req.queries) > MAX_BATCH_QUERIES:
         raise HTTPException(
-            status_code=200,
-            detail="No recommendations found for the given query."
+            status_code=400,
+            detail=f"At most {MAX_BATCH_QUERIES} queries per batch."
         )
 
+    from backend.pipeline import recommend_many_async
+
+    outcomes = await recommend_many_async(req.queries, max_results=10)
+
+    return {"results": [
+        {
+            "query": o["query"],
+            "recommended_assessments": format_results(o["results"]),
+            "error": o["error"]
+        }
+        for o in outcomes
+    ]}
+
+def format_results(results):
     formatted = []
     for r in results[:10]:
         formatted.append({
             "url": r["url"],
             "name": r["assessment_name"],
-            "adaptive_support": "Yes" if r.get("adaptive_irt", False) else "No",
+            "adaptive_support": "Yes" if r.get("adaptive_irt") == 1 else "No",
             "description": r.get("description", ""),
-            "duration": int(r.get("duration", 60)),
-            "remote_support": "Yes" if r.get("remote_testing", False) else "No",
+            "duration": format_duration(r.get("duration")),
+            "remote_support": "Yes" if r.get("remote_testing") == 1 else "No",
             "test_type": map_test_type(r.get("test_type"))
         })
+    return formatted
 
-    return {"recommended_assessments": formatted}
+def format_duration(minutes):
+    # Unknown durations (-1 / missing) keep the previous default of 60
+    try:
+        minutes = int(minutes)
+    except (TypeError, ValueError):
+        return 60
+    return minutes if minutes > 0 else 60
 
 def map_test_type(t):
     mapping = {
@@ -1,31 +1,82 @@
-def balance_results(results, intent, max_results=10):
-    """
-    results: list of retrieved items (already ranked)
-    intent: output from LLM
-    """
+import json
+import os
 
-    k_tests = [r for r in results if r["test_type"] == "K"]
-    p_tests = [r for r in results if r["test_type"] == "P"]
-    s_tests = [r for r in results if r["test_type"] == "S"]
+# Per-type quotas, filled in this order before the rest of the ranking
+QUOTA_POLICIES = {
+    # Technical intent: knowledge tests first, a couple of simulations
+    "technical": {"K": 5, "S": 2},
+    # Technical + behavioral: add personality / behavior tests
+    "mixed": {"K": 5, "P": 3, "S": 2},
+    # Behavioral only: lead with personality, then cognitive and simulations
+    "behavioral": {"P": 5, "C": 2, "S": 2},
+}
 
-    has_behavioral = len(intent.get("behavioral_skills", [])) > 0
+# Seniority raises a type's quota to at least this many
+SENIORITY_QUOTAS = {
+    "entry": {"C": 2},
+    "senior": {"P": 2},
+}
+
+# e.g. BALANCER_QUOTAS='{"mixed": {"K": 4, "P": 3, "C": 1, "S": 2}}'
+QUOTA_POLICIES.update(json.loads(os.getenv("BALANCER_QUOTAS", "{}")))
 
-    final = []
 
-    # Always prioritize technical skills
-    final.extend(k_tests[:5])
+def select_policy(intent):
+    has_technical = len(intent.get("technical_skills", [])) > 0
+    has_behavioral = len(intent.get("behavioral_skills", [])) > 0
 
+    if has_behavioral and not has_technical:
+        return "behavioral"
     if has_behavioral:
-        final.extend(p_tests[:3])
+        return "mixed"
+    return "technical"
+
+
+def quotas_for(intent):
+    """Ordered {test_type: quota} for an intent."""
+    quotas = dict(QUOTA_POLICIES[select_policy(intent)])
+    for test_type, minimum in SENIORITY_QUOTAS.get(intent.get("seniority"), {}).items():
+        quotas[test_type] = max(quotas.get(test_type, 0), minimum)
+    return quotas
 
-    # Add simulations if available
-    final.extend(s_tests[:2])
+
+def balance_results(results, intent, max_results=10, quotas=None):
+    """
+    results: list of retrieved items (already ranked)
+    intent: output from LLM
+    quotas: ordered {test_type: quota}; defaults to quotas_for(intent)
+
+    One pass groups the ranking by test type, dropping repeated URLs; the
+    quotas are filled in order and the rest of the ranking tops up the
+    list, so the cost stays linear in len(results).
+    """
+    quotas = quotas_for(intent) if quotas is None else quotas
+
+    unique = []
+    by_type = {test_type: [] for test_type in quotas}
+    seen = set()
+    for r in results:
+        key = r.get("url") or r.get("assessment_name")
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(r)
+        bucket = by_type.get(r.get("test_type"))
+        if bucket is not None and len(bucket) < quotas[r["test_type"]]:
+            bucket.append(r)
+
+    final = []
+    chosen = set()
+    for test_type in quotas:
+        for r in by_type[test_type]:
+            final.append(r)
+            chosen.add(id(r))
 
     # Fallback: fill from remaining
-    if len(final) < max_results:
-        remaining = [
-            r for r in results if r not in final
-        ]
-        final.extend(remaining[: max_results - len(final)])
+    for r in unique:
+        if len(final) >= max_results:
+            break
+        if id(r) not in chosen:
+            final.append(r)
 
     return final[:max_results]
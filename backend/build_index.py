@@ -0,0 +1,200 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+import pyarrow as pa
+
+from backend import prepare_data
+from backend.vectorstore.local_index import (
+    DEFAULT_INDEX_DIR,
+    EMBEDDINGS_FILE,
+    LATEST_FILE,
+    MANIFEST_FILE,
+    METADATA_ARROW_FILE,
+    read_metadata,
+)
+
+INPUT_PATH = prepare_data.OUTPUT_PATH
+DEFAULT_BATCH_SIZE = 64
+
+METADATA_COLUMNS = ["assessment_name", "url", "description", "test_type"] + list(prepare_data.FILTER_COLUMNS)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def content_hash(model_name: str, text_hashes) -> str:
+    """
+    Identifies an artifact by model + ordered row contents, so the same
+    catalog always maps to the same version directory.
+    """
+    h = hashlib.sha256(model_name.encode("utf-8"))
+    for th in text_hashes:
+        h.update(th.encode("ascii"))
+    return h.hexdigest()
+
+
+def load_previous(index_root: str, model_name: str):
+    """
+    Returns {text_hash: vector} from the LATEST artifact, or {} when there is
+    nothing reusable (no artifact yet, or it was built with another model).
+    """
+    latest_path = os.path.join(index_root, LATEST_FILE)
+    if not os.path.exists(latest_path):
+        return {}
+
+    with open(latest_path, encoding="utf-8") as f:
+        prev_dir = os.path.join(index_root, f.read().strip())
+
+    try:
+        with open(os.path.join(prev_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+        metadatas, _ = read_metadata(prev_dir)
+        embeddings = np.load(os.path.join(prev_dir, EMBEDDINGS_FILE), mmap_mode="r")
+    except FileNotFoundError:
+        return {}
+
+    if manifest.get("model_name") != model_name:
+        return {}
+
+    return {
+        meta["text_hash"]: embeddings[i]
+        for i, meta in enumerate(metadatas)
+        if "text_hash" in meta
+    }
+
+
+def encode_rows(model, texts, batch_size):
+    vectors = model.encode(
+        texts,
+        batch_size=batch_size,
+        normalize_embeddings=True,
+        show_progress_bar=len(texts) > batch_size,
+        convert_to_numpy=True
+    )
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def build_index(df, model, model_name, index_root=DEFAULT_INDEX_DIR,
+                batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Embeds df["search_text"] into a versioned artifact under index_root and
+    points LATEST at it. Rows whose text hash matches the previous artifact
+    reuse its vectors instead of being re-encoded.
+    """
+    texts = df["search_text"].fillna("").astype(str).tolist()
+    hashes = [text_hash(t) for t in texts]
+
+    # Filter columns without a single known value are left out of the
+    # metadata, so the retriever drops those filters instead of running them
+    unknown = prepare_data.unknown_filter_columns(df)
+    df = df.copy()
+    for column, default in prepare_data.FILTER_COLUMNS.items():
+        if column not in unknown:
+            df[column] = df[column].fillna(default)
+    records = df[[c for c in METADATA_COLUMNS if c not in unknown]].to_dict("records")
+
+    # Metadata is part of the version so e.g. a new duration gets a new artifact
+    meta_hash = text_hash(json.dumps(records, sort_keys=True, default=str))
+    digest = content_hash(model_name, hashes + [meta_hash])
+    version = "v" + digest[:12]
+    version_dir = os.path.join(index_root, version)
+    os.makedirs(index_root, exist_ok=True)
+
+    if os.path.exists(os.path.join(version_dir, MANIFEST_FILE)):
+        print("✅ Index already up to date:", version_dir)
+        _write_latest(index_root, version)
+        return version_dir
+
+    previous = load_previous(index_root, model_name)
+    missing = [i for i, h in enumerate(hashes) if h not in previous]
+
+    dim = model.get_sentence_embedding_dimension()
+    embeddings = np.empty((len(texts), dim), dtype=np.float32)
+
+    if missing:
+        encoded = encode_rows(model, [texts[i] for i in missing], batch_size)
+        embeddings[missing] = encoded
+    for i, h in enumerate(hashes):
+        if h in previous:
+            embeddings[i] = previous[h]
+
+    metadatas = []
+    for i, row in enumerate(records):
+        row["id"] = str(i)
+        row["text_hash"] = hashes[i]
+        metadatas.append(row)
+
+    manifest = {
+        "version": version,
+        "model_name": model_name,
+        "dim": int(dim),
+        "rows": len(texts),
+        "content_hash": digest,
+        "reused_rows": len(texts) - len(missing),
+        "encoded_rows": len(missing),
+        "built_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+    # Write to a temp dir first so a crash never leaves a half-built version
+    tmp_dir = version_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    np.save(os.path.join(tmp_dir, EMBEDDINGS_FILE), embeddings)
+    prepare_data.write_arrow(
+        pa.Table.from_pylist(metadatas), os.path.join(tmp_dir, METADATA_ARROW_FILE)
+    )
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    os.replace(tmp_dir, version_dir)
+    _write_latest(index_root, version)
+
+    if unknown:
+        print(f"⚠️ No values for {', '.join(unknown)}: left out of the index, filters on them are off")
+    print("✅ Index artifact saved:", version_dir)
+    print(f"✅ Rows: {manifest['rows']} "
+          f"(re-embedded {manifest['encoded_rows']}, reused {manifest['reused_rows']})")
+    return version_dir
+
+
+def _write_latest(index_root, version):
+    tmp_path = os.path.join(index_root, LATEST_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(index_root, LATEST_FILE))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local catalog index")
+    parser.add_argument("--prepare", action="store_true",
+                        help="run backend.prepare_data first")
+    parser.add_argument("--input", default=INPUT_PATH)
+    parser.add_argument("--output", default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.prepare:
+        prepare_data.main(output_path=args.input)
+
+    # Imported here so --help works without loading torch
+    from backend.retriever import EMBEDDING_MODEL_NAME, get_model
+
+    df = prepare_data.load_catalog(args.input)
+    build_index(
+        df,
+        model=get_model(),
+        model_name=EMBEDDING_MODEL_NAME,
+        index_root=args.output,
+        batch_size=args.batch_size
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def make_key(*parts) -> str:
+    """Stable cache key from arbitrary string-able parts."""
+    joined = "\x1f".join(str(p) for p in parts)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+def normalize_text(text: str) -> str:
+    """Case/whitespace-insensitive form of a query, used for cache keys."""
+    return " ".join(str(text).lower().split())
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU with optional TTL (seconds) and hit/miss counters.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._data),
+            "max_size": self.max_size,
+        }
+
+
+class SQLiteCache:
+    """
+    On-disk JSON value store with TTL and LRU trimming, safe to share
+    between threads and between worker processes on the same host.
+    """
+
+    def __init__(self, path: str, max_size: int = 100_000, ttl: float = None):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return default
+
+            self._conn.execute(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key, value):
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        payload = json.dumps(value, ensure_ascii=False)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, payload, expires_at, now)
+            )
+            self._writes += 1
+            # Trimming is a full-table query, so only do it every so often
+            if self._writes % 100 == 0:
+                self._trim(now)
+            self._conn.commit()
+
+    def _trim(self, now):
+        self._conn.execute(
+            "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (now,)
+        )
+        self._conn.execute(
+            "DELETE FROM cache WHERE key IN ("
+            " SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_size,)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self),
+            "max_size": self.max_size,
+        }
+
+
+class TieredCache:
+    """
+    In-memory LRU in front of an optional SQLiteCache. Disk hits are
+    promoted into memory; writes go to both tiers.
+    """
+
+    def __init__(self, memory: LRUCache, disk: SQLiteCache = None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key, default=None):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                return value
+
+        return default
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> dict:
+        memory = self.memory.stats()
+        disk = self.disk.stats() if self.disk is not None else None
+
+        lookups = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + (disk["hits"] if disk else 0)
+        return {
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory": memory,
+            "disk": disk,
+        }
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU of float32 vectors stored as rows of one preallocated matrix,
+    so each entry costs dim * 4 bytes instead of a list of Python floats.
+    max_size <= 0 disables it: get() always misses and set() stores nothing.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._rows = OrderedDict()   # key -> row index in self._matrix
+        self._matrix = None          # allocated on first insert, once dim is known
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if self.max_size <= 0:
+            self.misses += 1
+            return None
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                self.misses += 1
+                return None
+            self._rows.move_to_end(key)
+            self.hits += 1
+            # Copy: the slot may be reused after eviction
+            return self._matrix[row].copy()
+
+    def set(self, key, vector):
+        if self.max_size <= 0:
+            return
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+
+            row = self._rows.get(key)
+            if row is None:
+                if len(self._rows) < self.max_size:
+                    row = len(self._rows)
+                else:
+                    _, row = self._rows.popitem(last=False)
+            self._matrix[row] = vector
+            self._rows[key] = row
+            self._rows.move_to_end(key)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def nbytes(self) -> int:
+        return 0 if self._matrix is None else self._matrix.nbytes
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._rows),
+            "max_size": self.max_size,
+            "bytes": self.nbytes,
+        }
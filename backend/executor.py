@@ -0,0 +1,28 @@
+"""
+The bounded thread pool the async pipeline runs blocking work on
+(encode, vector search, cache I/O, first-use loads).
+"""
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Bounded so a burst of requests queues instead of spawning threads
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=PIPELINE_WORKERS,
+    thread_name_prefix="pipeline"
+)
+
+
+async def run_blocking(fn, *args, timeout=None):
+    """Runs a blocking call on the pipeline executor with a timeout."""
+    loop = asyncio.get_running_loop()
+    # Carry contextvars (per-request timings) into the worker thread
+    ctx = contextvars.copy_context()
+    return await asyncio.wait_for(
+        loop.run_in_executor(_EXECUTOR, functools.partial(ctx.run, fn, *args)),
+        timeout
+    )
@@ -0,0 +1,109 @@
+"""
+Metadata constraints parsed from the raw query ("under 30 minutes",
+"remote only", "adaptive") and applied inside the vector search.
+
+Catalog rows store duration in minutes and remote/adaptive as 1 / 0, with
+-1 meaning unknown. Unknown values always pass a filter: the scraped
+catalog is sparse, and dropping every unlabelled row would empty most
+result sets.
+"""
+import re
+
+UNKNOWN = -1
+
+_NUM = r"(\d+(?:\.\d+)?)"
+_UNIT = r"(m|min|mins|minute|minutes|h|hr|hrs|hour|hours)\b"
+
+_MAX_DURATION_PATTERNS = [
+    # "under 30 minutes", "max duration of 45 mins", "no longer than 1 hour"
+    re.compile(
+        r"\b(?:under|below|less than|within|at most|up to|shorter than|"
+        r"max(?:imum)?(?: duration)?(?: of)?|no (?:more|longer) than|not (?:more|longer) than)\s*"
+        + _NUM + r"\s*" + _UNIT
+    ),
+    # "30 minutes or less", "40 mins max"
+    re.compile(_NUM + r"\s*" + _UNIT + r"\s*(?:or less|or under|max(?:imum)?|at most)"),
+]
+_HALF_HOUR_RE = re.compile(r"\b(?:under|within|less than|at most|max(?:imum)?(?: of)?)\s+half an hour")
+_AN_HOUR_RE = re.compile(r"\b(?:under|within|less than|at most|max(?:imum)?(?: of)?)\s+(?:an|one|1) hour\b")
+
+_REMOTE_RE = re.compile(
+    r"\bremote(?:ly)?[\s-]*(?:only|testing|tests?|proctored|friendly|assessments?|administered)\b"
+    r"|\b(?:taken|done|completed|administered) remotely\b|\bremote support\b"
+)
+# "adaptive" alone also means adaptability ("adaptive leader"), so require the test noun
+_ADAPTIVE_RE = re.compile(r"\badaptive[\s-]+(?:tests?|testing|assessments?)\b|\birt\b")
+
+# Metadata field each filter constrains
+FILTER_FIELDS = {"max_duration": "duration", "remote": "remote_testing", "adaptive": "adaptive_irt"}
+
+
+def _to_minutes(value, unit):
+    minutes = float(value) * (60 if unit.startswith("h") else 1)
+    return int(round(minutes))
+
+
+def parse_filters(query: str) -> dict:
+    """
+    {"max_duration": int, "remote": True, "adaptive": True}, with only the
+    constraints the query actually states.
+    """
+    text = query.lower()
+    filters = {}
+
+    durations = []
+    for pattern in _MAX_DURATION_PATTERNS:
+        durations += [_to_minutes(v, u) for v, u in pattern.findall(text)]
+    if _HALF_HOUR_RE.search(text):
+        durations.append(30)
+    if _AN_HOUR_RE.search(text):
+        durations.append(60)
+    if durations:
+        filters["max_duration"] = min(durations)
+
+    if _REMOTE_RE.search(text):
+        filters["remote"] = True
+    if _ADAPTIVE_RE.search(text):
+        filters["adaptive"] = True
+    return filters
+
+
+def supported(filters: dict, fields) -> dict:
+    """The filters whose metadata field is in `fields`; all of them if fields is None."""
+    if fields is None:
+        return filters
+    return {k: v for k, v in filters.items() if FILTER_FIELDS.get(k) in fields}
+
+
+def to_where(filters: dict):
+    """Chroma-style `where` clause for the filters, or None if there are none."""
+    clauses = []
+    if "max_duration" in filters:
+        # UNKNOWN (-1) is <= any limit, so unlabelled rows pass
+        clauses.append({"duration": {"$lte": int(filters["max_duration"])}})
+    if filters.get("remote"):
+        clauses.append({"remote_testing": {"$ne": 0}})
+    if filters.get("adaptive"):
+        clauses.append({"adaptive_irt": {"$ne": 0}})
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return UNKNOWN
+
+
+def matches(meta: dict, filters: dict) -> bool:
+    """Same semantics as to_where(), for rows that don't come from the index."""
+    if "max_duration" in filters and _as_int(meta.get("duration")) > filters["max_duration"]:
+        return False
+    if filters.get("remote") and _as_int(meta.get("remote_testing")) == 0:
+        return False
+    if filters.get("adaptive") and _as_int(meta.get("adaptive_irt")) == 0:
+        return False
+    return True
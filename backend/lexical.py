@@ -0,0 +1,118 @@
+"""
+In-memory BM25 over catalog names and descriptions, plus score fusion with
+the dense retriever. Postings store precomputed per-document BM25 weights,
+so a query is a handful of NumPy scatter-adds over ~400 documents.
+"""
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+from backend.filters import matches
+
+# Keeps skill spellings like "c#", "c++", ".net", "node.js", "asp.net"
+TOKEN_RE = re.compile(r"\.?[a-z0-9]+(?:[.#+][a-z0-9]+)*[#+]*")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "with", "who", "will",
+    "new", "test", "tests", "measures", "knowledge", "skills", "multi", "choice",
+}
+
+
+def tokenize(text: str):
+    """Unigrams plus adjacent bigrams ("java 8" -> java, 8, java_8)."""
+    words = [t for t in TOKEN_RE.findall(str(text).lower()) if t not in STOPWORDS]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class BM25Index:
+    def __init__(self, ids, metadatas, k1: float = 1.5, b: float = 0.75,
+                 name_boost: int = 3):
+        self.ids = list(ids)
+        self.metadatas = list(metadatas)
+        self.id_to_row = {doc_id: i for i, doc_id in enumerate(self.ids)}
+
+        # BM25F-lite: repeating name tokens up-weights literal name matches
+        docs = [
+            tokenize(m.get("assessment_name", "")) * name_boost
+            + tokenize(m.get("description", ""))
+            for m in self.metadatas
+        ]
+
+        n_docs = len(docs)
+        lengths = np.array([len(d) for d in docs], dtype=np.float32)
+        avg_len = float(lengths.mean()) if n_docs else 0.0
+
+        postings = {}
+        for row, doc in enumerate(docs):
+            for term, tf in Counter(doc).items():
+                postings.setdefault(term, []).append((row, tf))
+
+        self.postings = {}
+        for term, entries in postings.items():
+            rows = np.array([r for r, _ in entries], dtype=np.int32)
+            tfs = np.array([tf for _, tf in entries], dtype=np.float32)
+            df = len(entries)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = k1 * (1 - b + b * lengths[rows] / avg_len)
+            self.postings[term] = (rows, (idf * tfs * (k1 + 1) / (tfs + norm)).astype(np.float32))
+
+        self.n_docs = n_docs
+        self._masks = {}
+
+    def filter_mask(self, filters: dict) -> np.ndarray:
+        """Boolean row mask for backend.filters constraints, memoized per filter set."""
+        key = repr(sorted(filters.items()))
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.array([matches(m, filters) for m in self.metadatas], dtype=bool)
+            self._masks[key] = mask
+        return mask
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                rows, weights = posting
+                scores[rows] += weights
+        return scores
+
+    def search(self, query: str, top_k: int = 20, mask=None):
+        """Returns [(doc_id, score)] with score > 0, best first; rows outside
+        the optional boolean `mask` are skipped."""
+        scores = self.scores(query)
+        if mask is not None:
+            scores[~mask] = 0.0
+        k = min(top_k, int((scores > 0).sum()))
+        if k == 0:
+            return []
+        rows = np.argpartition(-scores, k - 1)[:k]
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        return [(self.ids[r], float(scores[r])) for r in rows]
+
+
+def reciprocal_rank_fusion(rankings, weights, k: int = 60):
+    """
+    rankings: list of [(doc_id, score)] best-first; weights: one per ranking.
+    Returns [(doc_id, fused_score)] best-first.
+    """
+    fused = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, (doc_id, _) in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def weighted_fusion(rankings, weights):
+    """Max-normalizes each ranking's scores, then takes the weighted sum."""
+    fused = {}
+    for ranking, weight in zip(rankings, weights):
+        if not ranking:
+            continue
+        top = max(score for _, score in ranking) or 1.0
+        for doc_id, score in ranking:
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight * score / top
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
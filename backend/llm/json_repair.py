@@ -0,0 +1,87 @@
+"""
+Best-effort parsing of truncated or slightly malformed LLM JSON, and
+incremental field extraction from a response that is still streaming.
+"""
+import json
+import re
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```\s*$")
+_DECODER = json.JSONDecoder()
+
+# How many truncation points to try before giving up
+MAX_REPAIR_ATTEMPTS = 64
+
+
+def strip_code_fences(text: str) -> str:
+    """'```json {...} ```' -> '{...}'."""
+    return _FENCE_RE.sub("", text.strip())
+
+
+def _close(text):
+    """Closes an open string and any open arrays/objects at the end of text."""
+    stack, in_string, escaped = [], False, False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "[{":
+            stack.append("]" if ch == "[" else "}")
+        elif ch in "]}" and stack:
+            stack.pop()
+
+    if in_string:
+        # Drop a dangling escape before closing the string
+        text = (text[:-1] if escaped else text) + '"'
+    text = text.rstrip().rstrip(",")
+    return text + "".join(reversed(stack))
+
+
+def repair_json(text: str):
+    """
+    Parses the first JSON object in text, tolerating code fences, trailing
+    prose and truncation. A truncated document keeps every complete
+    member: '{"a": ["x", "y"], "b": ["z' -> {"a": ["x", "y"], "b": ["z"]}.
+    Raises ValueError when nothing usable is left.
+    """
+    text = strip_code_fences(text)
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("No JSON object in response")
+    text = text[start:]
+
+    try:
+        value, _ = _DECODER.raw_decode(text)
+        return value
+    except ValueError:
+        pass
+
+    # Close the document as-is, then retry with the tail cut back to each
+    # earlier comma, dropping a half-written key or value each time
+    cuts = [len(text)] + [i for i in range(len(text) - 1, 0, -1) if text[i] == ","]
+    for cut in cuts[:MAX_REPAIR_ATTEMPTS]:
+        try:
+            return json.loads(_close(text[:cut]))
+        except ValueError:
+            continue
+    raise ValueError("Unrepairable JSON response")
+
+
+def completed_field(text: str, field: str):
+    """
+    The value of a top-level `field` once it has been fully streamed, else
+    None. '{"technical_skills": ["Java", "SQL"], "behav' -> ["Java", "SQL"].
+    """
+    match = re.search(r'"%s"\s*:\s*' % re.escape(field), text)
+    if match is None:
+        return None
+    try:
+        value, _ = _DECODER.raw_decode(text, match.end())
+    except ValueError:
+        return None
+    return value
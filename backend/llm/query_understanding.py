@@ -1,15 +1,141 @@
+import copy
 import json
 import os
-from openai import OpenAI
+import threading
+from openai import AsyncOpenAI, OpenAI
+
+from backend.cache import LRUCache, SQLiteCache, TieredCache, make_key, normalize_text
+from backend.executor import run_blocking
+from backend.llm.json_repair import completed_field, repair_json, strip_code_fences
+from backend.llm.rule_intent import DEFAULT_CATALOG_PATH, RuleIntentExtractor
+from backend.metrics import FALLBACKS, INTENT_SOURCES, register_cache, timed
 
 client = OpenAI(
     api_key=os.environ.get("GITHUB_TOKEN"),
     base_url="https://models.inference.ai.azure.com"
 )
 
+# Used by the async pipeline so the event loop is never blocked on the LLM
+async_client = AsyncOpenAI(
+    api_key=os.environ.get("GITHUB_TOKEN"),
+    base_url="https://models.inference.ai.azure.com"
+)
+
 MODEL_NAME = "gpt-4o-mini"   # or gpt-3.5-turbo
 
-def extract_intent(query: str) -> dict:
+# Bump whenever the prompt changes so stale cached intents are not reused
+PROMPT_VERSION = "v1"
+
+INTENT_CACHE_ENABLED = os.getenv("INTENT_CACHE_ENABLED", "1") == "1"
+INTENT_CACHE_PATH = os.getenv("INTENT_CACHE_PATH", "data/cache/intent_cache.sqlite3")
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "2048"))
+INTENT_CACHE_TTL = float(os.getenv("INTENT_CACHE_TTL", str(7 * 24 * 3600)))
+
+# llm: always ask the LLM; rules: local extractor only; hybrid: local
+# extractor when it is confident enough, the LLM otherwise
+INTENT_MODE = os.getenv("INTENT_MODE", "llm")
+INTENT_RULES_THRESHOLD = float(os.getenv("INTENT_RULES_THRESHOLD", "0.8"))
+INTENT_CATALOG_PATH = os.getenv("INTENT_CATALOG_PATH", DEFAULT_CATALOG_PATH)
+
+# Constrain the LLM to INTENT_SCHEMA (response_format=json_schema)
+INTENT_STRUCTURED = os.getenv("INTENT_STRUCTURED", "0") == "1"
+
+# Stream the intent and start retrieval as soon as technical_skills is complete
+INTENT_STREAMING = os.getenv("INTENT_STREAMING", "0") == "1"
+
+SENIORITY_LEVELS = ["entry", "mid", "senior", "unknown"]
+LIST_FIELDS = ["technical_skills", "behavioral_skills", "role_keywords"]
+
+# technical_skills comes first so it finishes streaming first
+INTENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "technical_skills": {"type": "array", "items": {"type": "string"}},
+        "behavioral_skills": {"type": "array", "items": {"type": "string"}},
+        "role_keywords": {"type": "array", "items": {"type": "string"}},
+        "seniority": {"type": "string", "enum": SENIORITY_LEVELS},
+    },
+    "required": LIST_FIELDS + ["seniority"],
+    "additionalProperties": False,
+}
+
+_INTENT_CACHE = None
+# Built from executor threads too (async paths), so guard the first build
+_INTENT_CACHE_LOCK = threading.Lock()
+_RULE_EXTRACTOR = None
+_RULE_EXTRACTOR_LOCK = threading.Lock()
+
+
+def get_intent_cache():
+    global _INTENT_CACHE
+    if _INTENT_CACHE is None and INTENT_CACHE_ENABLED:
+        with _INTENT_CACHE_LOCK:
+            if _INTENT_CACHE is None:
+                disk = None
+                if INTENT_CACHE_PATH:
+                    disk = SQLiteCache(
+                        INTENT_CACHE_PATH,
+                        max_size=INTENT_CACHE_SIZE * 10,
+                        ttl=INTENT_CACHE_TTL
+                    )
+                _INTENT_CACHE = TieredCache(
+                    LRUCache(max_size=INTENT_CACHE_SIZE, ttl=INTENT_CACHE_TTL),
+                    disk
+                )
+                register_cache("intent", _INTENT_CACHE)
+    return _INTENT_CACHE
+
+
+def get_rule_extractor():
+    global _RULE_EXTRACTOR
+    if _RULE_EXTRACTOR is None:
+        with _RULE_EXTRACTOR_LOCK:
+            if _RULE_EXTRACTOR is None:
+                _RULE_EXTRACTOR = RuleIntentExtractor.from_catalog(INTENT_CATALOG_PATH)
+    return _RULE_EXTRACTOR
+
+
+def rule_intent(query: str, mode: str = None):
+    """
+    The local extractor's intent if `mode` allows using it for this query,
+    else None (the caller goes on to the cache / LLM).
+    """
+    mode = mode or INTENT_MODE
+    if mode == "llm":
+        return None
+
+    with timed("intent_rules"):
+        intent, confidence = get_rule_extractor().extract(query)
+
+    if mode == "rules" or confidence >= INTENT_RULES_THRESHOLD:
+        INTENT_SOURCES.inc(source="rules")
+        return intent
+    return None
+
+
+async def rule_intent_async(query: str, mode: str = None):
+    """rule_intent for the async paths; the first-use vocabulary build runs off the loop."""
+    if (mode or INTENT_MODE) != "llm" and _RULE_EXTRACTOR is None:
+        await run_blocking(get_rule_extractor)
+    return rule_intent(query, mode)
+
+
+def intent_cache_key(query: str) -> str:
+    # Structured and free-form JSON output are separate prompts as far as the cache goes
+    output_mode = "json_schema" if INTENT_STRUCTURED else "json"
+    return make_key(normalize_text(query), MODEL_NAME, PROMPT_VERSION, output_mode)
+
+
+def fallback_intent() -> dict:
+    return {
+        "technical_skills": [],
+        "behavioral_skills": [],
+        "role_keywords": [],
+        "seniority": "unknown"
+    }
+
+
+def build_messages(query: str) -> list:
     prompt = f"""
 You are an assistant helping recommend hiring assessments.
 
@@ -29,25 +155,196 @@ Rules:
 Input:
 {query}
 """
+    return [
+        {"role": "system", "content": "You extract structured hiring intent."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def completion_kwargs(stream: bool = False) -> dict:
+    kwargs = {"temperature": 0}
+    if INTENT_STRUCTURED:
+        kwargs["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "hiring_intent", "strict": True, "schema": INTENT_SCHEMA},
+        }
+    if stream:
+        kwargs["stream"] = True
+    return kwargs
+
+
+def normalize_intent(raw: dict) -> dict:
+    """Coerces a parsed response onto the intent schema; missing fields are empty."""
+    intent = fallback_intent()
+    for field in LIST_FIELDS:
+        value = raw.get(field) or []
+        if isinstance(value, str):
+            value = [value]
+        intent[field] = [str(v).strip() for v in value if str(v).strip()]
+    seniority = str(raw.get("seniority", "unknown")).strip().lower()
+    intent["seniority"] = seniority if seniority in SENIORITY_LEVELS else "unknown"
+    return intent
+
+
+def parse_intent(content: str) -> dict:
+    intent = json.loads(content)
+    if not isinstance(intent, dict):
+        raise ValueError("Intent is not a JSON object")
+    return intent
+
+
+def load_intent(content: str):
+    """
+    Returns (intent, complete). Malformed or truncated output is repaired
+    instead of being thrown away; complete is False for repaired intents
+    so they are not cached. Raises ValueError if nothing is recoverable.
+    """
+    try:
+        return normalize_intent(parse_intent(strip_code_fences(content))), True
+    except ValueError:
+        pass
+
+    raw = repair_json(content)
+    if not isinstance(raw, dict):
+        raise ValueError("Intent is not a JSON object")
+    FALLBACKS.inc(stage="intent_repaired")
+    return normalize_intent(raw), False
+
+
+def get_cached_intent(query: str):
+    cache = get_intent_cache()
+    if cache is None:
+        return None
+    cached = cache.get(intent_cache_key(query))
+    return copy.deepcopy(cached) if cached is not None else None
+
+
+def store_intent(query: str, intent: dict):
+    cache = get_intent_cache()
+    if cache is not None:
+        cache.set(intent_cache_key(query), intent)
+
+
+def extract_intent(query: str, mode: str = None) -> dict:
+    """mode overrides INTENT_MODE (llm | rules | hybrid) for this call."""
+    local = rule_intent(query, mode)
+    if local is not None:
+        return local
+
+    cached = get_cached_intent(query)
+    if cached is not None:
+        INTENT_SOURCES.inc(source="cache")
+        return cached
 
     try:
         response = client.chat.completions.create(
             model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": "You extract structured hiring intent."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0
+            messages=build_messages(query),
+            **completion_kwargs()
         )
 
         content = response.choices[0].message.content
-        return json.loads(content)
+        intent, complete = load_intent(content)
 
     except Exception as e:
-        # Safe fallback (VERY IMPORTANT)
-        return {
-            "technical_skills": [],
-            "behavioral_skills": [],
-            "role_keywords": [],
-            "seniority": "unknown"
-        }
+        # Safe fallback (VERY IMPORTANT) - never cached, so the next call retries
+        FALLBACKS.inc(stage="intent_error")
+        INTENT_SOURCES.inc(source="fallback")
+        return fallback_intent()
+
+    INTENT_SOURCES.inc(source="llm")
+    if complete:
+        store_intent(query, intent)
+    return copy.deepcopy(intent)
+
+
+async def extract_intent_async(query: str, mode: str = None) -> dict:
+    """
+    Non-blocking twin of extract_intent, sharing its prompt and cache.
+    Cache reads / writes (SQLite tier) run on the pipeline executor.
+    """
+    local = await rule_intent_async(query, mode)
+    if local is not None:
+        return local
+
+    cached = await run_blocking(get_cached_intent, query)
+    if cached is not None:
+        INTENT_SOURCES.inc(source="cache")
+        return cached
+
+    try:
+        response = await async_client.chat.completions.create(
+            model=MODEL_NAME,
+            messages=build_messages(query),
+            **completion_kwargs()
+        )
+
+        content = response.choices[0].message.content
+        intent, complete = load_intent(content)
+
+    except Exception as e:
+        FALLBACKS.inc(stage="intent_error")
+        INTENT_SOURCES.inc(source="fallback")
+        return fallback_intent()
+
+    INTENT_SOURCES.inc(source="llm")
+    if complete:
+        await run_blocking(store_intent, query, intent)
+    return copy.deepcopy(intent)
+
+
+async def extract_intent_streaming(query: str, on_technical_skills=None, mode: str = None) -> dict:
+    """
+    Streaming variant of extract_intent_async. on_technical_skills(skills)
+    is called once, as soon as the technical_skills field is complete (or
+    straight away for rule-based and cached intents), so retrieval can
+    overlap with generation of the rest of the response.
+    """
+    def notify(skills):
+        if on_technical_skills is not None:
+            on_technical_skills(normalize_intent({"technical_skills": skills})["technical_skills"])
+
+    local = await rule_intent_async(query, mode)
+    if local is None:
+        local = await run_blocking(get_cached_intent, query)
+        if local is not None:
+            INTENT_SOURCES.inc(source="cache")
+    if local is not None:
+        notify(local["technical_skills"])
+        return local
+
+    content, notified = "", False
+    try:
+        stream = await async_client.chat.completions.create(
+            model=MODEL_NAME,
+            messages=build_messages(query),
+            **completion_kwargs(stream=True)
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            content += chunk.choices[0].delta.content or ""
+            if not notified:
+                skills = completed_field(content, "technical_skills")
+                if isinstance(skills, list):
+                    notified = True
+                    notify(skills)
+
+        intent, complete = load_intent(content)
+
+    except Exception as e:
+        # A broken stream still leaves whatever was generated so far
+        try:
+            intent, complete = load_intent(content)
+        except ValueError:
+            FALLBACKS.inc(stage="intent_error")
+            INTENT_SOURCES.inc(source="fallback")
+            return fallback_intent()
+        complete = False
+
+    INTENT_SOURCES.inc(source="llm")
+    if not notified:
+        notify(intent["technical_skills"])
+    if complete:
+        await run_blocking(store_intent, query, intent)
+    return copy.deepcopy(intent)
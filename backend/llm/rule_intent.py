@@ -0,0 +1,299 @@
+"""
+Local, rule-based intent extraction. Short queries such as "Java developer
+with teamwork skills" are matched against a vocabulary of skills harvested
+from the catalog plus curated behavioral, role and seniority terms, and
+scored by how much of the query the vocabulary explains. The pipeline uses
+the result directly above a confidence threshold and escalates to the LLM
+otherwise.
+"""
+import json
+import re
+
+from backend.skill_index import SKILL_ALIASES, normalize_skill
+
+DEFAULT_CATALOG_PATH = "shl_individual_test_solutions.json"
+MAX_PHRASE_TOKENS = 4
+
+# Queries longer than this (content tokens) read like job descriptions;
+# their confidence is scaled down so they go to the LLM
+LONG_QUERY_TOKENS = 20
+
+# A token claimed by two partially overlapping matches (two readings of the
+# same words) only counts this much towards confidence
+OVERLAP_WEIGHT = 0.5
+
+# Years of experience (lower bound of a range) -> seniority
+ENTRY_MAX_YEARS = 2
+MID_MAX_YEARS = 4
+
+# Words in assessment names that never name a skill on their own
+GENERIC_NAME_WORDS = {
+    "new", "level", "entry", "advanced", "intermediate", "basic", "test",
+    "assessment", "skills", "skill", "the", "and", "of", "for", "in", "with",
+    "on", "to", "a", "an", "us", "uk", "u.s", "r1", "r2", "v1", "v2",
+    "adaptive", "essentials", "fundamentals", "fundamental", "concepts",
+    "general", "development", "programming", "engineering", "testing",
+    "administration", "management", "services", "service", "system",
+    "systems", "platform", "edition", "framework", "frameworks", "design",
+    "patterns", "web", "data", "business", "science", "analysis", "computer",
+    "literacy", "office", "microsoft", "ms", "apache", "ibm", "sap", "oracle",
+    "cisco", "adobe", "financial", "technology", "operating", "project",
+    "form", "split", "screen", "simulation", "report", "solution", "server",
+    "security", "communication", "communications", "time", "english",
+    "global", "front", "manual", "power", "drives", "implementation",
+    "software", "training", "written", "workplace", "operations",
+    "production", "comprehension", "numeric", "alphanumeric", "materials",
+    "interviewing", "access",
+}
+
+# Canonical behavioral skill -> phrasings seen in queries
+BEHAVIORAL_TERMS = {
+    "teamwork": ["teamwork", "team work", "team player", "works with teams", "team oriented"],
+    "collaboration": ["collaboration", "collaborative", "collaborate", "cross functional"],
+    "communication": ["communication", "communicator", "communicate", "interpersonal",
+                      "verbal", "written communication"],
+    "leadership": ["leadership", "leader", "lead teams", "people management", "mentoring"],
+    "negotiation": ["negotiation", "negotiate", "persuasion", "influencing"],
+    "stakeholder management": ["stakeholder management", "stakeholder", "stakeholders",
+                               "business teams", "client facing"],
+    "problem solving": ["problem solving", "problem solver", "analytical thinking",
+                        "critical thinking", "reasoning"],
+    "customer service": ["customer service", "customer focus", "customer facing"],
+    "attention to detail": ["attention to detail", "detail oriented", "accuracy"],
+    "adaptability": ["adaptability", "adaptable", "flexible", "flexibility"],
+    "time management": ["time management", "multitasking", "prioritization", "organized"],
+    "motivation": ["motivation", "motivated", "self starter", "drive"],
+    "emotional intelligence": ["emotional intelligence", "empathy"],
+    "creativity": ["creativity", "creative", "innovative"],
+    "dependability": ["dependability", "dependable", "reliable", "integrity"],
+}
+
+# Role head nouns; a preceding domain word is kept ("sales" + "assistant")
+ROLE_NOUNS = {
+    "developer", "developers", "engineer", "engineers", "programmer", "analyst",
+    "analysts", "manager", "managers", "assistant", "administrator", "admin",
+    "tester", "testers", "architect", "designer", "scientist", "consultant",
+    "accountant", "clerk", "cashier", "agent", "representative", "executive",
+    "supervisor", "director", "officer", "coordinator", "specialist",
+    "associate", "technician", "operator", "nurse", "teller", "receptionist",
+    "salesperson", "graduate", "intern", "lead", "contributor", "professional",
+}
+
+# Seniority phrase -> one of entry | mid | senior
+SENIORITY_TERMS = {
+    "entry level": "entry", "entry": "entry", "junior": "entry", "graduate": "entry",
+    "intern": "entry", "internship": "entry", "fresher": "entry", "trainee": "entry",
+    "beginner": "entry", "new grad": "entry",
+    "mid level": "mid", "mid": "mid", "intermediate": "mid", "experienced": "mid",
+    "senior": "senior", "sr": "senior", "lead": "senior", "principal": "senior",
+    "staff": "senior", "head": "senior", "executive": "senior", "director": "senior",
+    "advanced": "senior",
+}
+
+# Words that carry no intent; they count as explained when scoring
+FILLER_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "that", "the", "this", "to", "with", "who", "will",
+    "can", "has", "have", "good", "strong", "solid", "excellent", "great",
+    "knowledge", "experience", "experienced", "skills", "skill", "ability",
+    "abilities", "able", "looking", "hiring", "hire", "need", "needs", "want",
+    "seeking", "someone", "candidate", "candidates", "person", "people", "role",
+    "position", "job", "opening", "level", "years", "year", "yrs", "plus",
+    "also", "some", "more", "than", "assessment", "assessments", "test",
+    "tests", "recommend", "suggest", "please", "i", "we", "our", "my", "me",
+    "works", "work", "working", "proficient", "familiar", "expertise",
+    "background", "understanding", "well", "should", "must", "required",
+    "preferred", "plus", "etc", "minutes", "team",
+}
+
+# "3 years", "5+ yrs", "0-2 years", "3 to 5 years"
+_YEARS_RE = re.compile(r"\b(\d+)(?:\s*(?:-|to)\s*\d+)?\s*\+?\s*(?:years?|yrs?)\b")
+_PAREN_RE = re.compile(r"\([^)]*\)")
+
+
+def _is_number(token):
+    return token.replace(".", "").isdigit()
+
+
+def _strip(tokens, leading=False):
+    tokens = list(tokens)
+    while tokens and (tokens[-1] in GENERIC_NAME_WORDS or _is_number(tokens[-1])):
+        tokens.pop()
+    while leading and tokens and tokens[0] in GENERIC_NAME_WORDS:
+        tokens.pop(0)
+    return tokens
+
+
+def _partial_overlaps(spans, size):
+    """Per token: True if it lies in two matched spans where neither contains the other."""
+    overlapped = [False] * size
+    for a, (s1, e1) in enumerate(spans):
+        for s2, e2 in spans[a + 1:]:
+            nested = (s1 <= s2 and e2 <= e1) or (s2 <= s1 and e1 <= e2)
+            if not nested and max(s1, s2) < min(e1, e2):
+                for j in range(max(s1, s2), min(e1, e2)):
+                    overlapped[j] = True
+    return overlapped
+
+
+def _drop_contained(roles):
+    """Drops roles that are a contiguous part of a longer one ("bank assistant")."""
+    return [
+        role for role in roles
+        if not any(other != role and f" {role} " in f" {other} " for other in roles)
+    ]
+
+
+def harvest_skill_phrases(names):
+    """
+    Skill phrases from assessment names. Each name (and each part joined by
+    "with"/"and"/"&") contributes its cleaned form ("data science"), that
+    form without trailing generic words or versions ("java 8" -> "java"),
+    and without leading vendor words ("ms excel" -> "excel").
+    """
+    phrases = set()
+    for name in names:
+        name = _PAREN_RE.sub(" ", name).split(" - ")[0]
+        for part in re.split(r"\b(?:with|and)\b|&", name, flags=re.IGNORECASE):
+            tokens = normalize_skill(part).split()
+            candidates = [
+                tokens,
+                [t for t in tokens if t not in ("new", "level")],
+                _strip(tokens[:MAX_PHRASE_TOKENS]),
+                _strip(tokens, leading=True),
+            ]
+            for candidate in candidates:
+                phrase = " ".join(candidate)
+                if (candidate and len(candidate) <= MAX_PHRASE_TOKENS and len(phrase) > 1
+                        and phrase not in FILLER_WORDS and phrase not in GENERIC_NAME_WORDS):
+                    phrases.add(phrase)
+    return phrases
+
+
+class RuleIntentExtractor:
+    def __init__(self, skill_phrases):
+        # phrase -> (kind, canonical value); longest match wins
+        self.vocabulary = {}
+        for phrase in skill_phrases:
+            self.vocabulary[phrase] = ("technical", phrase)
+        for alias, canonical in SKILL_ALIASES.items():
+            self.vocabulary.setdefault(alias, ("technical", canonical))
+            self.vocabulary.setdefault(canonical, ("technical", canonical))
+        for canonical, variants in BEHAVIORAL_TERMS.items():
+            for variant in variants:
+                self.vocabulary[normalize_skill(variant)] = ("behavioral", canonical)
+        for phrase, level in SENIORITY_TERMS.items():
+            self.vocabulary.setdefault(phrase, ("seniority", level))
+
+    @classmethod
+    def from_catalog(cls, path: str = DEFAULT_CATALOG_PATH):
+        """Builds the vocabulary from the scraped catalog's Knowledge & Skills names."""
+        with open(path, encoding="utf-8") as f:
+            catalog = json.load(f)
+        names = [
+            row.get("name", "") for row in catalog
+            if "K" in str(row.get("test_type", "")).split()
+        ]
+        return cls(harvest_skill_phrases(names))
+
+    def extract(self, query: str):
+        """
+        Returns (intent, confidence). intent has the same schema as the LLM
+        output; confidence in [0, 1] is the share of the query's words the
+        vocabulary explains, scaled down for long, job-description-like text
+        and for words two overlapping matches compete for.
+        """
+        tokens = normalize_skill(query).split()
+        technical, behavioral, roles = [], [], []
+        seniority = "unknown"
+        explained = [False] * len(tokens)
+        # (start, end) token span of every match, roles included
+        spans = []
+        role_span = None
+
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+
+            match = None
+            for n in range(min(MAX_PHRASE_TOKENS, len(tokens) - i), 0, -1):
+                entry = self.vocabulary.get(" ".join(tokens[i:i + n]))
+                if entry:
+                    match = (n, entry)
+                    break
+
+            # Multi-word phrases beat a role noun at their start ("lead teams")
+            if (token in ROLE_NOUNS and not (match and match[0] > 1)
+                    and not (token in SENIORITY_TERMS and i + 1 < len(tokens)
+                             and tokens[i + 1] in ROLE_NOUNS)):
+                # Keep up to two preceding domain words ("qa tester", "sales
+                # assistant"), never reaching back into the previous role
+                floor = role_span[1] if role_span else 0
+                start = i
+                while (start > floor and i - start < 2 and tokens[start - 1] not in FILLER_WORDS
+                       and tokens[start - 1] not in SENIORITY_TERMS):
+                    start -= 1
+                if role_span and start == i == role_span[1]:
+                    # A role noun right after a role extends it: "bank assistant admin"
+                    start = role_span[0]
+                    roles.pop()
+                    spans.remove(role_span)
+                role = " ".join(tokens[start:i + 1])
+                if role not in roles:
+                    roles.append(role)
+                role_span = (start, i + 1)
+                spans.append(role_span)
+                if token in SENIORITY_TERMS and SENIORITY_TERMS[token] == "senior":
+                    seniority = "senior"
+                for j in range(start, i + 1):
+                    explained[j] = True
+                i += 1
+                continue
+
+            if match is None:
+                if token in FILLER_WORDS or _is_number(token):
+                    explained[i] = True
+                i += 1
+                continue
+
+            n, (kind, value) = match
+            if kind == "technical" and value not in technical:
+                technical.append(value)
+            elif kind == "behavioral" and value not in behavioral:
+                behavioral.append(value)
+            elif kind == "seniority":
+                seniority = value
+            spans.append((i, i + n))
+            for j in range(i, i + n):
+                explained[j] = True
+            i += n
+
+        years = _YEARS_RE.search(query.lower())
+        if years and seniority == "unknown":
+            count = int(years.group(1))
+            if count <= ENTRY_MAX_YEARS:
+                seniority = "entry"
+            elif count <= MID_MAX_YEARS:
+                seniority = "mid"
+            else:
+                seniority = "senior"
+
+        intent = {
+            "technical_skills": technical,
+            "behavioral_skills": behavioral,
+            "role_keywords": _drop_contained(roles),
+            "seniority": seniority,
+        }
+
+        if not (technical or behavioral or roles) or not tokens:
+            return intent, 0.0
+
+        overlapped = _partial_overlaps(spans, len(tokens))
+        content = [
+            (OVERLAP_WEIGHT if o else 1.0) if e else 0.0
+            for t, e, o in zip(tokens, explained, overlapped) if t not in FILLER_WORDS
+        ]
+        confidence = sum(content) / len(content) if content else 1.0
+        if len(content) > LONG_QUERY_TOKENS:
+            confidence *= LONG_QUERY_TOKENS / len(content)
+        return intent, round(confidence, 3)
@@ -0,0 +1,218 @@
+"""
+Minimal Prometheus-style metrics (no client library needed) plus an
+optional per-request timing breakdown carried in a contextvar.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_REGISTRY = []
+_REQUEST_TIMINGS = contextvars.ContextVar("request_timings", default=None)
+
+
+def _label_str(labels):
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in labels)
+    return "{" + inner + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple((k, labels[k]) for k in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple((k, labels[k]) for k in self.label_names)
+        return self._values.get(key, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_str(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple((k, labels[k]) for k in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for upper, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(
+                        f"{self.name}_bucket{_label_str(key + (('le', upper),))} {cumulative}"
+                    )
+                lines.append(f"{self.name}_bucket{_label_str(key + (('le', '+Inf'),))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_label_str(key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_label_str(key)} {series[-1]}")
+        return lines
+
+
+class CallbackGauge:
+    """Gauge whose samples are read at scrape time: fn() -> [(labels, value)]."""
+
+    def __init__(self, name, help_text, fn):
+        self.name = name
+        self.help_text = help_text
+        self.fn = fn
+        _REGISTRY.append(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for labels, value in self.fn():
+            lines.append(f"{self.name}{_label_str(tuple(sorted(labels.items())))} {value}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "shl_stage_duration_seconds",
+    "Time spent in each recommendation pipeline stage.",
+    label_names=("stage",)
+)
+REQUEST_SECONDS = Histogram(
+    "shl_request_duration_seconds",
+    "End-to-end HTTP request latency.",
+    label_names=("path",)
+)
+REQUESTS = Counter(
+    "shl_requests_total",
+    "HTTP requests served.",
+    label_names=("path", "status")
+)
+FALLBACKS = Counter(
+    "shl_fallbacks_total",
+    "Pipeline stages that degraded to a fallback result.",
+    label_names=("stage",)
+)
+
+SKILL_LOOKUPS = Counter(
+    "shl_skill_lookups_total",
+    "Intents resolved by the skill lookup table (full, partial or miss).",
+    label_names=("outcome",)
+)
+
+COALESCED = Counter(
+    "shl_coalesced_calls_total",
+    "Calls that joined an identical in-flight computation instead of running their own.",
+    label_names=("group",)
+)
+
+INTENT_SOURCES = Counter(
+    "shl_intent_source_total",
+    "Where each extracted intent came from (rules, cache, llm, fallback).",
+    label_names=("source",)
+)
+
+
+def _llm_call_ratio():
+    counts = {s: INTENT_SOURCES.value(source=s) for s in ("rules", "cache", "llm", "fallback")}
+    total = sum(counts.values())
+    # Fallbacks still paid for a (failed) LLM round-trip
+    return [({}, (counts["llm"] + counts["fallback"]) / total if total else 0.0)]
+
+
+CallbackGauge(
+    "shl_intent_llm_call_ratio",
+    "Share of intent extractions that called the LLM.",
+    _llm_call_ratio
+)
+
+_CACHES = {}
+
+
+def register_cache(name, cache):
+    """Exposes a cache's stats() (hits, misses, hit_rate, size) on /metrics."""
+    _CACHES[name] = cache
+
+
+def _cache_samples(field):
+    def collect():
+        samples = []
+        for name, cache in list(_CACHES.items()):
+            if cache is None:
+                continue
+            stats = cache.stats()
+            # Not every cache reports every field (only EmbeddingCache has "bytes")
+            if field in stats:
+                samples.append(({"cache": name}, stats[field]))
+        return samples
+    return collect
+
+
+CallbackGauge("shl_cache_hits", "Cache hits since startup.", _cache_samples("hits"))
+CallbackGauge("shl_cache_misses", "Cache misses since startup.", _cache_samples("misses"))
+CallbackGauge("shl_cache_hit_ratio", "Cache hit ratio since startup.", _cache_samples("hit_rate"))
+CallbackGauge("shl_cache_bytes", "Memory held by the cache's entries.", _cache_samples("bytes"))
+
+
+def record_duration(stage, seconds):
+    """Adds a duration to the stage histogram and the request breakdown."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _REQUEST_TIMINGS.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage):
+    """Records the block's duration in the stage histogram and, if a
+    request breakdown is active, in the per-request timings."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_duration(stage, time.perf_counter() - start)
+
+
+def start_request_timings():
+    timings = {}
+    _REQUEST_TIMINGS.set(timings)
+    return timings
+
+
+def format_timings(timings):
+    return ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in timings.items())
+
+
+def render():
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,193 @@
+"""
+ONNX Runtime encoder for all-MiniLM-L6-v2, a drop-in replacement for the
+SentenceTransformer `encode` API that avoids importing torch at serve time.
+
+    # one-off export (needs torch + transformers, e.g. on a dev machine)
+    python -m backend.onnx_encoder export --quantize
+
+    # check the exported graph against the PyTorch model
+    python -m backend.onnx_encoder parity --threshold 0.99
+"""
+import argparse
+import os
+
+import numpy as np
+
+HF_MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_MODEL_DIR = "data/onnx/all-MiniLM-L6-v2"
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+# Matches SentenceTransformer("all-MiniLM-L6-v2").max_seq_length
+MAX_SEQ_LENGTH = 256
+
+PARITY_SENTENCES = [
+    "Technical skills: Java, SQL. Behavioral skills: collaboration. Job role: developer",
+    "Technical skills: Python, machine learning. Job role: data scientist",
+    "Behavioral skills: leadership, stakeholder management. Job role: manager",
+    "Technical skills: Selenium, JavaScript. Job role: QA engineer",
+    "Entry level sales assistant with good communication",
+    "Assessment Name: Core Java (Entry Level) (New). Description: Multi-choice test "
+    "that measures the knowledge of basic Java constructs, OOP concepts, file handling.",
+]
+
+
+class OnnxEncoder:
+    """
+    Mean-pooled MiniLM embeddings from an exported ONNX graph, tokenized with
+    the standalone `tokenizers` library (no transformers/torch import).
+    """
+
+    def __init__(self, model_dir: str = DEFAULT_MODEL_DIR, quantized: bool = False):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_file = QUANTIZED_MODEL_FILE if quantized else MODEL_FILE
+        self.model_path = os.path.join(model_dir, model_file)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            self.model_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+        self._dim = self.session.get_outputs()[0].shape[-1]
+
+    def get_sentence_embedding_dimension(self):
+        return self._dim
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real (non-padding) tokens, as sentence-transformers does
+        mask = attention_mask[..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        return (summed / counts).astype(np.float32)
+
+    def encode(self, sentences, normalize_embeddings=True, show_progress_bar=False,
+               batch_size=32, convert_to_numpy=True):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        batches = [
+            self._encode_batch(texts[i:i + batch_size])
+            for i in range(0, len(texts), batch_size)
+        ]
+        embeddings = np.vstack(batches) if batches else np.empty((0, self._dim), np.float32)
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+
+        return embeddings[0] if single else embeddings
+
+
+def export_onnx(model_dir: str = DEFAULT_MODEL_DIR, quantize: bool = True):
+    """Exports the HF transformer to ONNX (+ optional int8 dynamic quantization)."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(model_dir, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(HF_MODEL_ID)
+    model = AutoModel.from_pretrained(HF_MODEL_ID)
+    model.eval()
+
+    sample = tokenizer(["warm-up query"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic = {0: "batch", 1: "sequence"}
+
+    model_path = os.path.join(model_dir, MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                **{name: dynamic for name in input_names},
+                "last_hidden_state": dynamic,
+            },
+            opset_version=14,
+        )
+
+    # tokenizer.json is all the `tokenizers` library needs at serve time
+    tokenizer.backend_tokenizer.save(os.path.join(model_dir, TOKENIZER_FILE))
+    print("✅ ONNX model saved:", model_path)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = os.path.join(model_dir, QUANTIZED_MODEL_FILE)
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        print("✅ Quantized model saved:", quantized_path)
+
+
+def check_parity(encoder, reference, sentences=PARITY_SENTENCES, threshold=0.99):
+    """
+    Cosine similarity between encoder and reference embeddings for each
+    sentence. Returns (passed, min_cosine, per_sentence_cosines).
+    """
+    ours = np.asarray(encoder.encode(sentences, normalize_embeddings=True), dtype=np.float32)
+    theirs = np.asarray(reference.encode(sentences, normalize_embeddings=True), dtype=np.float32)
+
+    cosines = (ours * theirs).sum(axis=1)
+    min_cosine = float(cosines.min())
+    return min_cosine >= threshold, min_cosine, cosines.tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ONNX MiniLM encoder tooling")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="export the model to ONNX")
+    export.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    export.add_argument("--quantize", action="store_true")
+
+    parity = sub.add_parser("parity", help="compare against the PyTorch model")
+    parity.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parity.add_argument("--quantized", action="store_true")
+    parity.add_argument("--threshold", type=float, default=0.99)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx(args.model_dir, quantize=args.quantize)
+        return
+
+    from sentence_transformers import SentenceTransformer
+
+    from backend.retriever import EMBEDDING_MODEL_NAME
+
+    passed, min_cosine, cosines = check_parity(
+        OnnxEncoder(args.model_dir, quantized=args.quantized),
+        SentenceTransformer(EMBEDDING_MODEL_NAME),
+        threshold=args.threshold
+    )
+    for sentence, cos in zip(PARITY_SENTENCES, cosines):
+        print(f"{cos:.5f}  {sentence[:70]}")
+    print(f"{'✅' if passed else '❌'} min cosine {min_cosine:.5f} (threshold {args.threshold})")
+    if not passed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
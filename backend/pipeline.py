@@ -1,20 +1,520 @@
-from backend.llm.query_understanding import extract_intent
-from backend.query_builder import build_expanded_query
-from backend.retriever import SHLRetriever
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from backend.llm.query_understanding import (
+    extract_intent,
+    extract_intent_async,
+    extract_intent_streaming,
+    fallback_intent,
+    get_intent_cache,
+    get_rule_extractor,
+    INTENT_MODE,
+    INTENT_STREAMING,
+)
+from backend.cache import normalize_text
+from backend.executor import PIPELINE_WORKERS, run_blocking
+from backend.filters import matches, parse_filters
+from backend.query_builder import build_expanded_query, build_lexical_query
+from backend.rerank import RERANK_MODE, get_cross_encoder, rerank
+from backend.retriever import (
+    SHLRetriever,
+    get_catalog_embeddings,
+    get_collection,
+    get_index_version,
+    get_model,
+)
 from backend.balancer import balance_results
+from backend.metrics import FALLBACKS, SKILL_LOOKUPS, record_duration, register_cache, timed
+from backend.singleflight import AsyncSingleFlight, SingleFlight
+from backend.skill_index import DEFAULT_PATH as DEFAULT_SKILL_INDEX_PATH, SkillIndex
+
+# Per-stage budgets (seconds) for the async pipeline
+INTENT_TIMEOUT = float(os.getenv("INTENT_TIMEOUT", "8"))
+ENCODE_TIMEOUT = float(os.getenv("ENCODE_TIMEOUT", "5"))
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "5"))
+# Past this the retrieval order is kept (RERANK_MODE=mmr|cross_encoder)
+RERANK_TIMEOUT = float(os.getenv("RERANK_TIMEOUT", "0.2"))
+# Reranks run on their own threads: one that overruns RERANK_TIMEOUT keeps
+# going, and must not hold a worker that encode + search need
+RERANK_WORKERS = int(os.getenv("RERANK_WORKERS", "1"))
+
+# Max in-flight LLM calls per batch, and the budget for its encode + search
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_RETRIEVAL_TIMEOUT = float(os.getenv("BATCH_RETRIEVAL_TIMEOUT", "60"))
+
+# Serve well-known skills from the precomputed table (python -m backend.skill_index)
+SKILL_LOOKUP = os.getenv("SKILL_LOOKUP", "0") == "1"
+SKILL_INDEX_PATH = os.getenv("SKILL_INDEX_PATH", DEFAULT_SKILL_INDEX_PATH)
+
+# Concurrent identical queries share one pipeline run; waiters give up
+# after COALESCE_TIMEOUT seconds (the run itself continues)
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "1") == "1"
+COALESCE_TIMEOUT = float(os.getenv("COALESCE_TIMEOUT", "30"))
 
 retriever = SHLRetriever()
+register_cache("embedding", retriever.embedding_cache)
+
+_RERANK_EXECUTOR = ThreadPoolExecutor(
+    max_workers=RERANK_WORKERS,
+    thread_name_prefix="rerank"
+)
+# Free rerank workers; when none is free the request skips reranking
+# instead of queueing behind an overrunning one
+_RERANK_SLOTS = threading.BoundedSemaphore(RERANK_WORKERS)
+
+_SKILL_INDEX = None
+_SKILL_INDEX_LOCK = threading.Lock()
+
+_FLIGHTS = SingleFlight("recommend")
+_ASYNC_FLIGHTS = AsyncSingleFlight("recommend_async")
+
+
+def get_skill_index():
+    """Loads the skill lookup table once; None if disabled or not built."""
+    global _SKILL_INDEX
+    if not SKILL_LOOKUP:
+        return None
+    if _SKILL_INDEX is None:
+        with _SKILL_INDEX_LOCK:
+            if _SKILL_INDEX is None:
+                if os.path.exists(SKILL_INDEX_PATH):
+                    _SKILL_INDEX = SkillIndex.load(SKILL_INDEX_PATH)
+                    print("✅ Skill index loaded:", len(_SKILL_INDEX.skills), "skills")
+                else:
+                    print("⚠️ Skill index not found, using vector search only:", SKILL_INDEX_PATH)
+                    _SKILL_INDEX = False
+    return _SKILL_INDEX or None
+
+
+def catalog_version():
+    """
+    Version of everything results are served from (vector index + skill
+    lookup table); response caches key on it.
+    """
+    skill_index = get_skill_index()
+    return f"{get_index_version(retriever.collection)}:{skill_index.version if skill_index else '-'}"
+
+
+async def load_skill_index_async():
+    """First-use load of the skill lookup table, off the event loop."""
+    if SKILL_LOOKUP and _SKILL_INDEX is None:
+        await run_blocking(get_skill_index)
+
+
+def plan_retrieval(intent, filters=None):
+    """
+    Returns (direct_items, residual_intent). direct_items come from the
+    skill lookup table (restricted to the query's filters); residual_intent
+    is what still needs embedding search, or None when the table covers
+    the whole intent.
+    """
+    index = get_skill_index()
+    if index is None:
+        return [], intent
+
+    with timed("skill_lookup"):
+        items, residual = index.resolve(intent)
+        if filters:
+            items = [item for item in items if matches(item, filters)]
+            if not items and residual is None:
+                residual = intent
+
+    if residual is None:
+        SKILL_LOOKUPS.inc(outcome="full")
+    elif items:
+        SKILL_LOOKUPS.inc(outcome="partial")
+    else:
+        SKILL_LOOKUPS.inc(outcome="miss")
+    return items, residual
+
+
+def merge_results(direct_items, searched):
+    """Direct lookup hits first, then search results not already present."""
+    seen = {item["url"] for item in direct_items}
+    return direct_items + [r for r in searched if r["url"] not in seen]
+
+
+def warmup():
+    """
+    Loads everything the first request would otherwise pay for: the
+    embedding model, the vector index and the intent cache, then runs one
+    throwaway encode so lazy kernels and allocations happen now.
+    """
+    with timed("warmup"):
+        retriever.model = get_model()
+        retriever.collection = get_collection()
+        get_intent_cache()
+        get_skill_index()
+        if INTENT_MODE != "llm":
+            get_rule_extractor()
+        load_reranker()
+        # Bypass the embedding cache so the dummy vector isn't kept
+        retriever.model.encode(
+            "warm-up query",
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+
+
+def load_reranker():
+    """Loads what RERANK_MODE needs; no-op once loaded. Kept outside the rerank cap."""
+    if RERANK_MODE == "mmr":
+        if retriever.collection is None:
+            retriever.collection = get_collection()
+        get_catalog_embeddings(retriever.collection)
+    elif RERANK_MODE == "cross_encoder":
+        get_cross_encoder()
+
+
+def _rerank(retrieved, intent, query):
+    # MMR compares against the expanded query's (usually cached) embedding
+    embedding = None
+    if RERANK_MODE == "mmr":
+        embedding = retriever.encode(build_expanded_query(intent) or query)
+    return rerank(retrieved, query, embedding, retriever.collection)
+
+
+def _submit_rerank(retrieved, intent, query):
+    """Starts _rerank on the rerank executor; None if every worker is busy."""
+    if not _RERANK_SLOTS.acquire(blocking=False):
+        FALLBACKS.inc(stage="rerank_busy")
+        return None
+
+    def run():
+        try:
+            return _rerank(retrieved, intent, query)
+        finally:
+            _RERANK_SLOTS.release()
+
+    ctx = contextvars.copy_context()
+    try:
+        return _RERANK_EXECUTOR.submit(ctx.run, run)
+    except Exception:
+        _RERANK_SLOTS.release()
+        raise
+
+
+def rerank_capped(retrieved, intent, query):
+    """Reranks on the rerank executor; keeps the retrieval order past RERANK_TIMEOUT."""
+    if RERANK_MODE == "none":
+        return retrieved
+    try:
+        # A first-use model / embedding load isn't counted against the cap
+        load_reranker()
+        future = _submit_rerank(retrieved, intent, query)
+        if future is not None:
+            return future.result(timeout=RERANK_TIMEOUT)
+    except FutureTimeoutError:
+        FALLBACKS.inc(stage="rerank_timeout")
+    except Exception:
+        FALLBACKS.inc(stage="rerank_error")
+    return retrieved
+
+
+async def rerank_capped_async(retrieved, intent, query):
+    if RERANK_MODE == "none":
+        return retrieved
+    try:
+        await run_blocking(load_reranker)
+        future = _submit_rerank(retrieved, intent, query)
+        if future is not None:
+            return await asyncio.wait_for(asyncio.wrap_future(future), RERANK_TIMEOUT)
+    except asyncio.TimeoutError:
+        FALLBACKS.inc(stage="rerank_timeout")
+    except Exception:
+        FALLBACKS.inc(stage="rerank_error")
+    return retrieved
+
 
 def recommend(query, max_results=10):
-    intent = extract_intent(query)
-    expanded_query = build_expanded_query(intent)
+    """
+    Intent -> retrieval -> rerank -> balance for one query. Concurrent
+    calls with the same normalized query share one run (COALESCE_REQUESTS).
+    """
+    if not COALESCE_REQUESTS:
+        return _recommend(query, max_results)
+    return _FLIGHTS.do(
+        (normalize_text(query), max_results), _recommend, query, max_results,
+        timeout=COALESCE_TIMEOUT
+    )
+
+
+def _recommend(query, max_results):
+    with timed("recommend"):
+        with timed("intent"):
+            intent = extract_intent(query)
+        filters = parse_filters(query)
+        direct, residual = plan_retrieval(intent, filters)
+
+        if residual is None:
+            retrieved = direct
+        else:
+            with timed("expand"):
+                expanded_query = build_expanded_query(residual)
+                lexical_query = build_lexical_query(residual)
+
+            retrieved = merge_results(direct, retriever.retrieve(
+                expanded_query, top_k=30, lexical_query=lexical_query, filters=filters
+            ))
+
+        retrieved = rerank_capped(retrieved, intent, query)
 
-    retrieved = retriever.retrieve(expanded_query, top_k=30)
+        with timed("balance"):
+            final = balance_results(
+                results=retrieved,
+                intent=intent,
+                max_results=max_results
+            )
 
-    final = balance_results(
-        results=retrieved,
-        intent=intent,
-        max_results=max_results
+    return final
+
+
+async def _retrieve_async(intent, query):
+    """
+    Skill lookup plus encode + vector search for whatever the lookup leaves.
+    Raises asyncio.TimeoutError only when there is nothing to return.
+    """
+    filters = parse_filters(query)
+    await load_skill_index_async()
+    direct, residual = plan_retrieval(intent, filters)
+    if residual is None:
+        return direct
+
+    # An empty intent would embed an empty string; the raw query is a better bet
+    with timed("expand"):
+        expanded_query = build_expanded_query(residual) or query
+        lexical_query = build_lexical_query(residual) or query
+
+    try:
+        embedding = await run_blocking(
+            retriever.encode, expanded_query, timeout=ENCODE_TIMEOUT
+        )
+        searched = await run_blocking(
+            retriever.search, embedding, 30, lexical_query, filters,
+            timeout=SEARCH_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        FALLBACKS.inc(stage="retrieval_timeout")
+        # Lookup hits are still better than nothing
+        if not direct:
+            raise
+        searched = []
+    return merge_results(direct, searched)
+
+
+async def _stream_and_retrieve(query, started):
+    """
+    Streams the intent and starts retrieval for the technical skills as
+    soon as that field is complete, overlapping it with generation of the
+    rest. Behavioral and role terms are retrieved once the stream ends and
+    merged after the technical results.
+    """
+    loop = asyncio.get_running_loop()
+    skills_ready = loop.create_future()
+
+    def on_technical_skills(skills):
+        if not skills_ready.done():
+            skills_ready.set_result(skills)
+
+    async def stream_intent():
+        with timed("intent"):
+            return await asyncio.wait_for(
+                extract_intent_streaming(query, on_technical_skills), INTENT_TIMEOUT
+            )
+
+    intent_task = asyncio.ensure_future(stream_intent())
+    await asyncio.wait({intent_task, skills_ready}, return_when=asyncio.FIRST_COMPLETED)
+
+    skills = skills_ready.result() if skills_ready.done() else []
+    early = None
+    if skills:
+        early = asyncio.ensure_future(
+            _retrieve_async(dict(fallback_intent(), technical_skills=skills), query)
+        )
+        early.add_done_callback(
+            lambda _: record_duration("first_result", time.perf_counter() - started)
+        )
+
+    try:
+        intent = await intent_task
+    except asyncio.TimeoutError:
+        FALLBACKS.inc(stage="intent_timeout")
+        # Keep the skills that did arrive
+        intent = dict(fallback_intent(), technical_skills=skills)
+
+    if early is None:
+        retrieved = await _retrieve_async(intent, query)
+        record_duration("first_result", time.perf_counter() - started)
+        return intent, retrieved
+
+    rest = dict(intent, technical_skills=[])
+    if not (rest["behavioral_skills"] or rest["role_keywords"]):
+        return intent, await early
+
+    technical, others = await asyncio.gather(
+        early, _retrieve_async(rest, query), return_exceptions=True
+    )
+    results = [r for r in (technical, others) if not isinstance(r, BaseException)]
+    if not results:
+        raise technical
+    return intent, functools.reduce(merge_results, results)
+
+
+async def recommend_async(query, max_results=10):
+    """
+    Event-loop friendly version of recommend(). The LLM call is awaited
+    natively; encoding and vector search run on a bounded executor. Each
+    stage has its own timeout and degrades instead of failing the request.
+    With INTENT_STREAMING=1 retrieval starts while the intent is streaming.
+    Concurrent calls with the same normalized query share one run; a
+    caller still waiting after COALESCE_TIMEOUT gets asyncio.TimeoutError.
+    """
+    if not COALESCE_REQUESTS:
+        return await _recommend_async(query, max_results)
+    return await _ASYNC_FLIGHTS.do(
+        (normalize_text(query), max_results), _recommend_async, query, max_results,
+        timeout=COALESCE_TIMEOUT
+    )
+
+
+async def _recommend_async(query, max_results):
+    started = time.perf_counter()
+    with timed("recommend"):
+        try:
+            if INTENT_STREAMING:
+                intent, retrieved = await _stream_and_retrieve(query, started)
+            else:
+                try:
+                    with timed("intent"):
+                        intent = await asyncio.wait_for(extract_intent_async(query), INTENT_TIMEOUT)
+                except asyncio.TimeoutError:
+                    FALLBACKS.inc(stage="intent_timeout")
+                    intent = fallback_intent()
+                retrieved = await _retrieve_async(intent, query)
+                record_duration("first_result", time.perf_counter() - started)
+        except asyncio.TimeoutError:
+            return []
+
+        retrieved = await rerank_capped_async(retrieved, intent, query)
+
+        with timed("balance"):
+            return balance_results(
+                results=retrieved,
+                intent=intent,
+                max_results=max_results
+            )
+
+
+async def _bounded_intent(query, semaphore):
+    async with semaphore:
+        try:
+            return await asyncio.wait_for(extract_intent_async(query), INTENT_TIMEOUT)
+        except asyncio.TimeoutError:
+            FALLBACKS.inc(stage="intent_timeout")
+            return fallback_intent()
+
+
+def _plan_query(query, intent):
+    """(filters, (direct, residual)); an exception in place of the plan fails only this query."""
+    if isinstance(intent, Exception):
+        return {}, (intent, None)
+    try:
+        filters = parse_filters(query)
+        return filters, plan_retrieval(intent, filters)
+    except Exception as e:
+        return {}, (e, None)
+
+
+def _retrieve_batch(expanded_queries, lexical_queries, filters, top_k):
+    embeddings = retriever.encode_many(expanded_queries)
+    return retriever.search_many(
+        embeddings, top_k=top_k, lexical_queries=lexical_queries, filters=filters
+    )
+
+
+async def recommend_many_async(queries, max_results=10):
+    """
+    Recommends for many queries at once. Identical queries are computed
+    once, intents are extracted concurrently (at most BATCH_CONCURRENCY at
+    a time), and all expanded queries not served by the skill lookup table
+    share one encode batch and one vector search per distinct filter set.
+    Returns one {"query", "results", "error"} dict per input query, in
+    input order; a failing query only sets its own "error".
+    """
+    unique = list(dict.fromkeys(queries))
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    intents = await asyncio.gather(
+        *(_bounded_intent(q, semaphore) for q in unique),
+        return_exceptions=True
     )
+    await load_skill_index_async()
+    planned = [_plan_query(q, intent) for q, intent in zip(unique, intents)]
+    filters = [f for f, _ in planned]
+    plans = [plan for _, plan in planned]
+
+    # Only queries the lookup table doesn't fully cover go to vector search
+    pending = [i for i, (_, residual) in enumerate(plans) if residual is not None]
+    expanded = [build_expanded_query(plans[i][1]) or unique[i] for i in pending]
+    lexical = [build_lexical_query(plans[i][1]) or unique[i] for i in pending]
+    pending_filters = [filters[i] for i in pending]
+
+    searched = []
+    if pending:
+        try:
+            searched = await run_blocking(
+                _retrieve_batch, expanded, lexical, pending_filters, 30,
+                timeout=BATCH_RETRIEVAL_TIMEOUT
+            )
+        except Exception:
+            # Isolate the failure: retry each query on its own
+            FALLBACKS.inc(stage="batch_retrieval")
+            searched = []
+            for q, lq, f in zip(expanded, lexical, pending_filters):
+                try:
+                    searched.append(await run_blocking(
+                        retriever.retrieve, q, 30, lq, f,
+                        timeout=ENCODE_TIMEOUT + SEARCH_TIMEOUT
+                    ))
+                except Exception as e:
+                    searched.append(e)
+
+    retrieved = [direct for direct, _ in plans]
+    for i, items in zip(pending, searched):
+        retrieved[i] = items if isinstance(items, Exception) else merge_results(retrieved[i], items)
+
+    if RERANK_MODE != "none":
+        async def rerank_item(items, intent, q):
+            if isinstance(items, Exception):
+                return items
+            return await rerank_capped_async(items, intent, q)
+
+        retrieved = await asyncio.gather(*(
+            rerank_item(items, intent, q)
+            for q, intent, items in zip(unique, intents, retrieved)
+        ), return_exceptions=True)
+
+    outcomes = {}
+    for q, intent, items in zip(unique, intents, retrieved):
+        if isinstance(items, Exception):
+            outcomes[q] = {"query": q, "results": [], "error": repr(items)}
+            continue
+        try:
+            results = balance_results(results=items, intent=intent, max_results=max_results)
+        except Exception as e:
+            outcomes[q] = {"query": q, "results": [], "error": repr(e)}
+            continue
+        outcomes[q] = {"query": q, "results": results, "error": None}
+
+    return [outcomes[q] for q in queries]
+
 
-    return final
\ No newline at end of file
+def recommend_many(queries, max_results=10):
+    """Blocking wrapper around recommend_many_async for scripts."""
+    return asyncio.run(recommend_many_async(queries, max_results=max_results))
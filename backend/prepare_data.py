@@ -1,67 +1,250 @@
+"""
+Scraped catalog -> typed, validated table for indexing.
+
+Reads the scraper's JSONL log (or its JSON / CSV export) by field name,
+cleans and parses every column with vectorized pandas operations, and
+writes an uncompressed Arrow IPC file that consumers memory-map with
+load_catalog().
+
+    python -m backend.prepare_data [--input shl_individual_test_solutions.jsonl]
+"""
+import argparse
+import json
+import os
+
+import numpy as np
 import pandas as pd
-import re
 
-INPUT_PATH = "shl_individual_test_solutions.csv"
-OUTPUT_PATH = "data/shl_catalog_clean.csv"
+# First existing file wins: the scraper's JSONL log, then its JSON export
+INPUT_PATHS = ["shl_individual_test_solutions.jsonl", "shl_individual_test_solutions.json"]
+OUTPUT_PATH = "data/shl_catalog.arrow"
+
+MIN_ASSESSMENTS = 377
+TEST_TYPES = ["K", "P", "S", "C"]
+
+REQUIRED_FIELDS = ["name", "url"]
+
+# Column dtypes of the prepared catalog
+CATALOG_SCHEMA = {
+    "assessment_name": "string",
+    "url": "string",
+    "description": "string",
+    "raw_test_type": "string",
+    "test_type": "string",
+    "duration": "int32",
+    "remote_testing": "int8",
+    "adaptive_irt": "int8",
+    "language": "string",
+    "search_text": "string",
+}
+
+# Filterable metadata and the value stored when the scrape has nothing
+FILTER_COLUMNS = {"duration": -1, "remote_testing": -1, "adaptive_irt": -1, "language": ""}
+
+_FLAG_YES = ["yes", "y", "true", "1", "●", "✓", "✔"]
+_FLAG_NO = ["no", "n", "false", "0"]
+
+
+class CatalogValidationError(ValueError):
+    """The prepared catalog failed validation; .problems lists every failure."""
+
+    def __init__(self, problems):
+        self.problems = list(problems)
+        super().__init__("Catalog validation failed:\n- " + "\n- ".join(self.problems))
+
+
+# ---------- Column transforms (vectorized) ----------
+
+def clean_column(values: pd.Series) -> pd.Series:
+    """Collapses whitespace and strips; missing values become ""."""
+    return (
+        values.astype("string")
+        .fillna("")
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def parse_durations(values: pd.Series) -> pd.Series:
+    """Minutes from "Approximate Completion Time in minutes = 30"; -1 if unknown."""
+    text = clean_column(values).str.lower()
+    minutes = pd.to_numeric(text.str.extract(r"(\d+)", expand=False), errors="coerce")
+    unknown = text.str.contains("untimed|variable", regex=True) | minutes.isna()
+    return minutes.where(~unknown, -1).astype("int32")
+
+
+def parse_flags(values: pd.Series) -> pd.Series:
+    """1 / 0 for yes / no, -1 if unknown."""
+    text = clean_column(values).str.lower()
+    flags = np.select([text.isin(_FLAG_YES), text.isin(_FLAG_NO)], [1, 0], default=-1)
+    return pd.Series(flags, index=values.index, dtype="int8")
+
+
+def normalize_test_types(values: pd.Series) -> pd.Series:
+    # Raw values are whitespace-separated letter codes ("A E B C D P")
+    text = values.astype("string").fillna("").str.upper()
+
+    def has(code):
+        return text.str.contains(rf"\b{code}\b", regex=True).to_numpy(dtype=bool)
+
+    conditions = [
+        # Knowledge & Skills
+        has("K"),
+        # Simulation / Work Sample
+        has("S"),
+        # Cognitive: Ability & Aptitude, unless bundled with personality
+        has("A") & ~has("P"),
+        # Personality / Behavioral family
+        np.logical_or.reduce([has(c) for c in "PABCDE"]),
+    ]
+    types = np.select(conditions, ["K", "S", "C", "P"], default="Unknown")
+    return pd.Series(types, index=values.index, dtype="string")
+
+
+# ---------- Pipeline ----------
+
+def resolve_input(path=None):
+    if path:
+        return path
+    for candidate in INPUT_PATHS:
+        if os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError(f"No scraped catalog found (looked for {', '.join(INPUT_PATHS)})")
+
+
+def read_products(path: str) -> pd.DataFrame:
+    """The scraper's records from .jsonl, .json or a CSV export with headers."""
+    if path.endswith(".jsonl"):
+        return pd.read_json(path, lines=True, dtype=False)
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return pd.DataFrame.from_records(json.load(f))
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def prepare(products: pd.DataFrame) -> pd.DataFrame:
+    """Scraper records -> typed catalog (CATALOG_SCHEMA), deduplicated by URL."""
+    missing = [f for f in REQUIRED_FIELDS if f not in products.columns]
+    if missing:
+        raise CatalogValidationError([f"input has no {f!r} field" for f in missing])
+
+    def field(name):
+        if name in products.columns:
+            return products[name]
+        return pd.Series("", index=products.index, dtype="string")
+
+    catalog = pd.DataFrame({
+        "assessment_name": clean_column(field("name")),
+        "url": clean_column(field("url")),
+        "description": clean_column(field("description")),
+        "raw_test_type": clean_column(field("test_type")),
+        "duration": parse_durations(field("duration")),
+        "remote_testing": parse_flags(field("remote_testing")),
+        "adaptive_irt": parse_flags(field("adaptive_irt")),
+        "language": clean_column(field("language")),
+    })
+    catalog["test_type"] = normalize_test_types(catalog["raw_test_type"])
 
-def clean_text(text):
-    if pd.isna(text):
-        return ""
-    text = str(text)
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    # Build embedding-ready text
+    catalog["search_text"] = (
+        "Assessment Name: " + catalog["assessment_name"] + ". " +
+        "Description: " + catalog["description"] + ". " +
+        "Assessment Type: " + catalog["test_type"] + ". " +
+        "This assessment is suitable for evaluating relevant job skills."
+    )
 
-def normalize_test_type(raw):
-    raw = str(raw).upper()
+    catalog = catalog[(catalog["assessment_name"] != "") & (catalog["url"] != "")]
+    catalog = catalog.drop_duplicates(subset=["url"]).reset_index(drop=True)
+    return catalog[list(CATALOG_SCHEMA)].astype(CATALOG_SCHEMA)
 
-    # Knowledge & Skills
-    if "K" in raw:
-        return "K"
 
-    # Simulation / Work Sample
-    if "S" in raw:
-        return "S"
+def validate(catalog: pd.DataFrame, min_rows: int = MIN_ASSESSMENTS):
+    """Raises CatalogValidationError listing every failed check."""
+    problems = []
 
-    # Personality / Behavioral family
-    if any(x in raw for x in ["P", "A", "B", "C", "D", "E"]):
-        return "P"
+    def sample(mask):
+        return ", ".join(catalog.loc[mask, "url"].head(5))
 
-    return "Unknown"
+    if len(catalog) < min_rows:
+        problems.append(f"only {len(catalog)} assessments (at least {min_rows} required)")
 
+    bad_types = ~catalog["test_type"].isin(TEST_TYPES)
+    if bad_types.any():
+        problems.append(f"{int(bad_types.sum())} rows with an unknown test type, e.g. {sample(bad_types)}")
 
-def main():
-    df = pd.read_csv(INPUT_PATH, header=None)
+    bad_urls = ~catalog["url"].str.startswith("https")
+    if bad_urls.any():
+        problems.append(f"{int(bad_urls.sum())} invalid URLs, e.g. {sample(bad_urls)}")
 
-    # Explicit column mapping (VERY IMPORTANT)
-    df_clean = pd.DataFrame({
-        "assessment_name": df[0].apply(clean_text),
-        "url": df[1].apply(clean_text),
-        "description": df[3].apply(clean_text),
-        "raw_test_type": df[8].apply(clean_text)
-    })
+    if problems:
+        raise CatalogValidationError(problems)
 
-    df_clean["test_type"] = df_clean["raw_test_type"].apply(normalize_test_type)
 
-    # Build embedding-ready text
-    df_clean["search_text"] = (
-    "Assessment Name: " + df_clean["assessment_name"] + ". " +
-    "Description: " + df_clean["description"] + ". " +
-    "Assessment Type: " + df_clean["test_type"] + ". " +
-    "This assessment is suitable for evaluating relevant job skills."
-)
+def unknown_filter_columns(catalog: pd.DataFrame):
+    """FILTER_COLUMNS with no known value in any row (absent columns included)."""
+    return [
+        column for column, default in FILTER_COLUMNS.items()
+        if column not in catalog.columns or (catalog[column] == default).all()
+    ]
+
+
+def save_catalog(catalog: pd.DataFrame, path: str = OUTPUT_PATH):
+    """Uncompressed Arrow IPC, so readers can memory-map it."""
+    import pyarrow as pa
+
+    write_arrow(pa.Table.from_pandas(catalog, preserve_index=False), path)
+
+
+def write_arrow(table, path: str):
+    """Writes a pyarrow Table as an uncompressed IPC file, atomically."""
+    import pyarrow as pa
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def read_arrow(path: str):
+    """Memory-maps an Arrow IPC file; the returned Table's buffers point into the map."""
+    import pyarrow as pa
+
+    # Not closed here: the table's buffers keep the mapping alive
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
 
+def load_catalog(path: str = OUTPUT_PATH) -> pd.DataFrame:
+    """
+    The prepared catalog. Arrow files are memory-mapped and wrapped without
+    copying (pyarrow-backed columns); CSVs from before the Arrow output are
+    still read (missing columns are left to callers).
+    """
+    if path.endswith(".csv"):
+        return pd.read_csv(path, keep_default_na=False)
+    return read_arrow(path).to_pandas(types_mapper=pd.ArrowDtype)
 
-    df_clean = df_clean.dropna(subset=["assessment_name", "url"])
-    df_clean = df_clean.drop_duplicates(subset=["url"])
 
-    df_clean.to_csv(OUTPUT_PATH, index=False)
+def main(input_path=None, output_path=OUTPUT_PATH):
+    input_path = resolve_input(input_path)
+    catalog = prepare(read_products(input_path))
+    validate(catalog)
+    save_catalog(catalog, output_path)
 
-    print("✅ Clean dataset saved:", OUTPUT_PATH)
-    print("✅ Total assessments:", len(df_clean))
-    assert len(df_clean) >= 377, "❌ Less than required assessments"
-    assert df_clean["test_type"].isin(["K", "P", "S"]).all(), "❌ Unknown test types found"
-    assert df_clean["url"].str.startswith("https").all(), "❌ Invalid URLs detected"
+    print("✅ Clean dataset saved:", output_path)
+    print("✅ Total assessments:", len(catalog))
+    unknown = unknown_filter_columns(catalog)
+    if unknown:
+        print(f"⚠️ No values for {', '.join(unknown)}: the matching query filters "
+              "stay inactive until the scraper fills them in")
+    return catalog
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Prepare the scraped catalog for indexing")
+    parser.add_argument("--input", help=f"default: first of {', '.join(INPUT_PATHS)}")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+    main(args.input, args.output)
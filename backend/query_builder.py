@@ -17,3 +17,13 @@ def build_expanded_query(intent: dict) -> str:
         )
 
     return ". ".join(parts)
+
+
+def build_lexical_query(intent: dict) -> str:
+    """Bare skill and role terms for keyword (BM25) matching, without labels."""
+    terms = (
+        intent["technical_skills"]
+        + intent["behavioral_skills"]
+        + intent["role_keywords"]
+    )
+    return " ".join(terms)
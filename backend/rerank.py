@@ -0,0 +1,102 @@
+"""
+Optional reranking between retrieval and balancing. Only the first
+RERANK_CANDIDATES results are reordered; anything beyond the budget keeps
+its retrieval order, and nothing is added or dropped.
+
+    mmr            Maximal Marginal Relevance over the catalog embeddings
+                   already stored in the vector index (no extra model).
+    cross_encoder  A small local cross-encoder scoring (query, assessment)
+                   pairs in one batch.
+"""
+import os
+import threading
+
+import numpy as np
+
+from backend.metrics import timed
+from backend.retriever import get_catalog_embeddings
+
+RERANK_MODE = os.getenv("RERANK_MODE", "none").lower()   # none | mmr | cross_encoder
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "30"))
+RERANK_MMR_LAMBDA = float(os.getenv("RERANK_MMR_LAMBDA", "0.7"))
+CROSS_ENCODER_MODEL = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+
+_CROSS_ENCODER = None
+_CROSS_ENCODER_LOCK = threading.Lock()
+
+
+def get_cross_encoder():
+    global _CROSS_ENCODER
+    if _CROSS_ENCODER is None:
+        with _CROSS_ENCODER_LOCK:
+            if _CROSS_ENCODER is None:
+                with timed("load_cross_encoder"):
+                    from sentence_transformers import CrossEncoder
+                    _CROSS_ENCODER = CrossEncoder(CROSS_ENCODER_MODEL)
+    return _CROSS_ENCODER
+
+
+def mmr_order(query_embedding, candidate_embeddings, lambda_=RERANK_MMR_LAMBDA):
+    """
+    Greedy MMR: each pick maximizes
+    lambda * sim(query, d) - (1 - lambda) * max sim(d, already picked).
+    Inputs are L2-normalized; returns candidate positions in pick order.
+    """
+    relevance = candidate_embeddings @ query_embedding
+    similarity = candidate_embeddings @ candidate_embeddings.T
+
+    n = len(relevance)
+    order = []
+    redundancy = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    for _ in range(n):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = np.where(available, lambda_ * relevance - (1 - lambda_) * penalty, -np.inf)
+        pick = int(np.argmax(scores))
+        order.append(pick)
+        available[pick] = False
+        redundancy = np.maximum(redundancy, similarity[pick])
+    return order
+
+
+def _mmr(candidates, query_embedding, collection):
+    url_to_row, matrix = get_catalog_embeddings(collection)
+    rows = [url_to_row.get(c["url"]) for c in candidates]
+    if query_embedding is None or any(r is None for r in rows):
+        # Candidates outside the index (e.g. a stale lookup table): keep order
+        return candidates
+
+    q = np.asarray(query_embedding, dtype=np.float32)
+    q = q / (np.linalg.norm(q) or 1.0)
+    return [candidates[i] for i in mmr_order(q, matrix[rows])]
+
+
+def _cross_encoder(candidates, query_text):
+    pairs = [
+        (query_text, f"{c.get('assessment_name') or ''}. {c.get('description') or ''}")
+        for c in candidates
+    ]
+    scores = get_cross_encoder().predict(pairs, show_progress_bar=False)
+    # Stable, so ties keep their retrieval order
+    order = sorted(range(len(candidates)), key=lambda i: -float(scores[i]))
+    return [candidates[i] for i in order]
+
+
+def rerank(results, query_text, query_embedding=None, collection=None, mode=None):
+    """
+    Reorders the first RERANK_CANDIDATES results. query_text feeds the
+    cross-encoder, query_embedding the MMR pass; mode overrides RERANK_MODE.
+    """
+    mode = mode or RERANK_MODE
+    if mode == "none" or len(results) < 2:
+        return results
+
+    head, tail = results[:RERANK_CANDIDATES], results[RERANK_CANDIDATES:]
+    with timed("rerank"):
+        if mode == "mmr":
+            head = _mmr(head, query_embedding, collection)
+        elif mode == "cross_encoder":
+            head = _cross_encoder(head, query_text)
+        else:
+            raise ValueError(f"Unknown RERANK_MODE: {mode!r}")
+    return head + tail
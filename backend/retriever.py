@@ -1,30 +1,135 @@
 import os
-import chromadb
-from sentence_transformers import SentenceTransformer
+import threading
+import numpy as np
+
+from backend.cache import EmbeddingCache
+from backend.filters import supported, to_where
+from backend.lexical import BM25Index, reciprocal_rank_fusion, weighted_fusion
+from backend.metrics import FALLBACKS, timed
+from backend.vectorstore.local_index import DEFAULT_INDEX_DIR, LocalIndex
+
+# "chroma" (Chroma Cloud) or "local" (in-process NumPy index)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", DEFAULT_INDEX_DIR)
+# Overrides the catalog version reported by the vector store (cache keys)
+CATALOG_VERSION = os.getenv("CATALOG_VERSION", "")
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+
+# "torch" (SentenceTransformer) or "onnx" (ONNX Runtime, no torch import)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "data/onnx/all-MiniLM-L6-v2")
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "0") == "1"
+
+# Hybrid retrieval: fuse dense results with BM25 over names + descriptions
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "0") == "1"
+HYBRID_FUSION = os.getenv("HYBRID_FUSION", "rrf").lower()   # "rrf" or "weighted"
+HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "1.0"))
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
 
 # ✅ Lazy load to reduce startup memory
 _MODEL = None
 _CLIENT = None
 _COLLECTION = None
+_LEXICAL = None
+_CATALOG_EMBEDDINGS = None
+# Loaders can be hit from several executor threads at once
+_MODEL_LOCK = threading.Lock()
+_COLLECTION_LOCK = threading.Lock()
+_LEXICAL_LOCK = threading.Lock()
+_CATALOG_EMBEDDINGS_LOCK = threading.Lock()
 
 def get_model():
     global _MODEL
     if _MODEL is None:
-        _MODEL = SentenceTransformer("all-MiniLM-L6-v2")
+        with _MODEL_LOCK:
+            if _MODEL is None:
+                with timed("load_model"):
+                    _MODEL = _load_model()
     return _MODEL
 
+def _load_model():
+    # Imports stay local so the ONNX path never pulls in torch
+    if EMBEDDING_BACKEND == "onnx":
+        from backend.onnx_encoder import OnnxEncoder
+        return OnnxEncoder(ONNX_MODEL_DIR, quantized=ONNX_QUANTIZED)
+    if EMBEDDING_BACKEND == "torch":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(EMBEDDING_MODEL_NAME)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {EMBEDDING_BACKEND!r}")
+
 def get_collection():
+    if _COLLECTION is None:
+        with _COLLECTION_LOCK:
+            if _COLLECTION is None:
+                with timed("load_collection"):
+                    _load_collection()
+    return _COLLECTION
+
+def get_lexical_index():
+    """BM25 over every catalog row, built once from the vector store's metadata."""
+    global _LEXICAL
+    if _LEXICAL is None:
+        collection = get_collection()
+        with _LEXICAL_LOCK:
+            if _LEXICAL is None:
+                with timed("load_lexical"):
+                    catalog = collection.get(include=["metadatas"])
+                    _LEXICAL = BM25Index(catalog["ids"], catalog["metadatas"])
+    return _LEXICAL
+
+def get_catalog_embeddings(collection=None):
+    """
+    (url -> row, (n, dim) float32 matrix) for every catalog row, fetched
+    from the vector store once; used to rerank candidates without re-encoding.
+    """
+    global _CATALOG_EMBEDDINGS
+    if _CATALOG_EMBEDDINGS is None:
+        if collection is None:
+            collection = get_collection()
+        with _CATALOG_EMBEDDINGS_LOCK:
+            if _CATALOG_EMBEDDINGS is None:
+                with timed("load_catalog_embeddings"):
+                    catalog = collection.get(include=["metadatas", "embeddings"])
+                    matrix = np.asarray(catalog["embeddings"], dtype=np.float32)
+                    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                    matrix = matrix / np.where(norms == 0, 1.0, norms)
+                    url_to_row = {
+                        meta.get("url"): i for i, meta in enumerate(catalog["metadatas"])
+                    }
+                    _CATALOG_EMBEDDINGS = (url_to_row, matrix)
+    return _CATALOG_EMBEDDINGS
+
+def get_index_version(collection=None):
+    """
+    Identifies the loaded catalog: CATALOG_VERSION if set, else the local
+    artifact's manifest version or the Chroma collection's "version" metadata.
+    """
+    if CATALOG_VERSION:
+        return CATALOG_VERSION
+    if collection is None:
+        collection = get_collection()
+    version = getattr(collection, "version", None)
+    if not version:
+        version = (getattr(collection, "metadata", None) or {}).get("version")
+    return version or "unversioned"
+
+def _load_collection():
     global _CLIENT, _COLLECTION
-    if _CLIENT is None:
-        _CLIENT = chromadb.CloudClient(
-            api_key=os.getenv("CHROMA_API_KEY"),
-            tenant=os.getenv("CHROMA_TENANT"),
-            database=os.getenv("CHROMA_DATABASE")
-        )
+    if VECTOR_BACKEND == "local":
+        # No network hop: answer queries from the memory-mapped index
+        _COLLECTION = LocalIndex(LOCAL_INDEX_DIR)
+    elif VECTOR_BACKEND == "chroma":
+        # Imported here so the local backend runs without chromadb installed
+        from backend.vectorstore.chroma_client import get_chroma_client
+
+        _CLIENT = get_chroma_client()
         _COLLECTION = _CLIENT.get_collection(
             os.getenv("CHROMA_COLLECTION", "shl")
         )
-    return _COLLECTION
+    else:
+        raise ValueError(f"Unknown VECTOR_BACKEND: {VECTOR_BACKEND!r}")
 
 
 class SHLRetriever:
@@ -32,32 +137,204 @@ class SHLRetriever:
         # Lazy load on first use
         self.model = None
         self.collection = None
+        # Expanded queries are joined skill lists, so they repeat a lot
+        self.embedding_cache = EmbeddingCache(max_size=EMBEDDING_CACHE_SIZE)
+        # Metadata fields of the loaded collection, sampled once
+        self._fields = None
+        self._fields_collection = None
+
+    def encode(self, query: str) -> np.ndarray:
+        cached = self.embedding_cache.get(query)
+        if cached is not None:
+            return cached
 
-    def retrieve(self, query: str, top_k: int = 20):
-        # Load on first request to save memory at startup
         if self.model is None:
             self.model = get_model()
+
+        with timed("encode"):
+            embedding = np.asarray(
+                self.model.encode(
+                    query,
+                    normalize_embeddings=True,
+                    show_progress_bar=False
+                ),
+                dtype=np.float32
+            )
+        self.embedding_cache.set(query, embedding)
+        return embedding
+
+    def encode_many(self, queries) -> np.ndarray:
+        """
+        Encodes a list of queries, sending every cache miss to the model in
+        a single batch. Returns a (len(queries), dim) float32 matrix.
+        """
+        embeddings = [self.embedding_cache.get(q) for q in queries]
+        missing = list(dict.fromkeys(
+            q for q, e in zip(queries, embeddings) if e is None
+        ))
+
+        if missing:
+            if self.model is None:
+                self.model = get_model()
+
+            with timed("encode"):
+                encoded = np.asarray(
+                    self.model.encode(
+                        missing,
+                        normalize_embeddings=True,
+                        show_progress_bar=False
+                    ),
+                    dtype=np.float32
+                )
+            by_query = dict(zip(missing, encoded))
+            for q, e in by_query.items():
+                self.embedding_cache.set(q, e)
+            embeddings = [
+                e if e is not None else by_query[q]
+                for q, e in zip(queries, embeddings)
+            ]
+
+        return np.vstack(embeddings)
+
+    def retrieve(self, query: str, top_k: int = 20, lexical_query: str = None, filters=None):
+        return self.search(
+            self.encode(query), top_k=top_k, lexical_query=lexical_query, filters=filters
+        )
+
+    def search(self, query_embedding: np.ndarray, top_k: int = 20, lexical_query: str = None,
+               filters=None):
+        lexical_queries = None if lexical_query is None else [lexical_query]
+        return self.search_many(
+            [query_embedding], top_k=top_k, lexical_queries=lexical_queries,
+            filters=None if filters is None else [filters]
+        )[0]
+
+    def metadata_fields(self):
+        """
+        Metadata keys of the collection, from one sampled row; None if they
+        can't be read (filters are then passed through unchanged).
+        """
         if self.collection is None:
             self.collection = get_collection()
-            
-        query_embedding = self.model.encode(
-            query,
-            normalize_embeddings=True,
-            show_progress_bar=False
-        ).tolist()
-
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k
-        )
+        if self._fields_collection is not self.collection:
+            fields = None
+            try:
+                sample = self.collection.get(limit=1, include=["metadatas"])
+                if sample["metadatas"]:
+                    fields = set(sample["metadatas"][0] or {})
+            except Exception:
+                pass
+            self._fields, self._fields_collection = fields, self.collection
+        return self._fields
+
+    def search_many(self, query_embeddings, top_k: int = 20, lexical_queries=None, filters=None):
+        """
+        One vector-store round-trip per distinct filter set (one in total
+        when nothing is filtered). filters holds one dict per query from
+        backend.filters.parse_filters; constraints are applied inside the
+        search, before top-k. Constraints on fields the collection doesn't
+        store are dropped, and a query whose filters leave nothing is
+        answered unfiltered. When hybrid retrieval is on and
+        lexical_queries are given, each dense ranking is fused with a BM25
+        ranking.
+        """
+        # Load on first request to save memory at startup
+        if self.collection is None:
+            self.collection = get_collection()
+
+        n = len(query_embeddings)
+        if filters is None:
+            filters = [{}] * n
+        else:
+            # An index built before the filter columns existed can't apply them
+            fields = self.metadata_fields()
+            filters = [supported(f or {}, fields) for f in filters]
+        lexical_queries = lexical_queries if lexical_queries is not None else [None] * n
+
+        groups = {}
+        for i, f in enumerate(filters):
+            groups.setdefault(repr(sorted((f or {}).items())), []).append(i)
+
+        results = [None] * n
+        for rows in groups.values():
+            where = to_where(filters[rows[0]] or {})
+            for i, ranked in zip(rows, self._query(
+                [query_embeddings[i] for i in rows],
+                [lexical_queries[i] for i in rows],
+                top_k, where, filters[rows[0]] or {}
+            )):
+                results[i] = ranked
+
+        relax = [i for i, r in enumerate(results) if not r and filters[i]]
+        if relax:
+            # The constraints excluded everything; better unfiltered than empty
+            FALLBACKS.inc(amount=len(relax), stage="filters_relaxed")
+            for i, ranked in zip(relax, self._query(
+                [query_embeddings[i] for i in relax],
+                [lexical_queries[i] for i in relax],
+                top_k, None, {}
+            )):
+                results[i] = ranked
+        return results
+
+    def _query(self, query_embeddings, lexical_queries, top_k, where, filters):
+        kwargs = {"where": where} if where else {}
+        with timed("search"):
+            results = self.collection.query(
+                query_embeddings=list(query_embeddings),
+                n_results=top_k,
+                **kwargs
+            )
+
+        all_metadatas = results.get("metadatas", [[]])
+        if not HYBRID_RETRIEVAL or all(q is None for q in lexical_queries):
+            return [self._format(metadatas) for metadatas in all_metadatas]
+
+        lexical = get_lexical_index()
+        fused = []
+        with timed("lexical"):
+            for ids, distances, metadatas, lexical_query in zip(
+                results["ids"], results["distances"], all_metadatas, lexical_queries
+            ):
+                fused.append(self._fuse(
+                    lexical, ids, distances, metadatas, lexical_query, top_k, filters
+                ))
+        return fused
+
+    @staticmethod
+    def _fuse(lexical, ids, distances, metadatas, lexical_query, top_k, filters=None):
+        dense_ranking = [(i, 1.0 - d) for i, d in zip(ids, distances)]
+        mask = lexical.filter_mask(filters) if filters else None
+        lexical_ranking = lexical.search(lexical_query, top_k, mask=mask) if lexical_query else []
+        if not lexical_ranking:
+            return SHLRetriever._format(metadatas)
+
+        rankings = [dense_ranking, lexical_ranking]
+        weights = [HYBRID_DENSE_WEIGHT, HYBRID_LEXICAL_WEIGHT]
+        if HYBRID_FUSION == "weighted":
+            ranked = weighted_fusion(rankings, weights)
+        else:
+            ranked = reciprocal_rank_fusion(rankings, weights, k=HYBRID_RRF_K)
+
+        by_id = dict(zip(ids, metadatas))
+        return SHLRetriever._format([
+            by_id.get(doc_id) or lexical.metadatas[lexical.id_to_row[doc_id]]
+            for doc_id, _ in ranked[:top_k]
+        ])
 
+    @staticmethod
+    def _format(metadatas):
         retrieved = []
-        for meta in results.get("metadatas", [[]])[0]:
+        for meta in metadatas:
             retrieved.append({
                 "assessment_name": meta.get("assessment_name"),
                 "description": meta.get("description"),
                 "test_type": meta.get("test_type"),
                 "url": meta.get("url"),
+                "duration": meta.get("duration", -1),
+                "remote_testing": meta.get("remote_testing", -1),
+                "adaptive_irt": meta.get("adaptive_irt", -1),
+                "language": meta.get("language", ""),
             })
 
         return retrieved
@@ -0,0 +1,85 @@
+"""
+Request coalescing ("single-flight"): concurrent calls with the same key
+share one computation. The first caller starts it; later callers wait for
+its result or exception instead of repeating the work. Nothing is kept
+once the computation finishes, so this sits in front of a cache, not in
+place of one.
+
+Waiters receive the same result object as the leader; treat it as
+read-only.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from backend.metrics import COALESCED
+
+
+class SingleFlight:
+    """Thread version: the leader runs fn in its own thread, others block on it."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight = {}   # key -> concurrent.futures.Future
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, timeout=None):
+        """
+        fn(*args), shared with any identical in-flight call. Waiters raise
+        concurrent.futures.TimeoutError after `timeout` seconds, and re-raise
+        the leader's exception if fn fails.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            COALESCED.inc(group=self.name)
+            return future.result(timeout)
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def __len__(self):
+        return len(self._inflight)
+
+
+class AsyncSingleFlight:
+    """
+    Event-loop version. The computation runs as its own task, so a caller
+    that times out or disconnects doesn't cancel it for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight = {}   # key -> asyncio.Task
+
+    async def do(self, key, fn, *args, timeout=None):
+        """
+        await fn(*args), shared with any identical in-flight call. Every
+        caller raises asyncio.TimeoutError after `timeout` seconds (the
+        computation keeps running for the rest) and re-raises fn's exception.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            COALESCED.inc(group=self.name)
+
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+
+    def __len__(self):
+        return len(self._inflight)
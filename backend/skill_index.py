@@ -0,0 +1,231 @@
+"""
+Precomputed skill -> assessment lookup table.
+
+Most intents are lists of well-known technical skills ("Java", "SQL",
+"Selenium") that map literally onto assessment names. This module builds,
+offline, a table from normalized skill phrases (and aliases) to ranked
+catalog rows, so the pipeline can serve those skills without encoding or
+vector search.
+
+    python -m backend.skill_index --input data/shl_catalog.arrow
+"""
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+DEFAULT_PATH = "data/skill_index.json"
+CATALOG_FIELDS = (
+    "assessment_name", "description", "test_type", "url",
+    "duration", "remote_testing", "adaptive_irt", "language",
+)
+MAX_ENTRIES_PER_SKILL = 10
+MAX_NGRAM = 3
+
+# Alias -> canonical spelling used in assessment names. No bare common
+# words ("net", "node"): they'd turn "net promoter score" into .NET
+SKILL_ALIASES = {
+    "js": "javascript",
+    "java script": "javascript",
+    "ts": "typescript",
+    "golang": "go",
+    "c sharp": "c#",
+    "csharp": "c#",
+    "cpp": "c++",
+    "dotnet": ".net",
+    "dot net": ".net",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "ms excel": "excel",
+    "microsoft excel": "excel",
+    "ms word": "word",
+    "microsoft word": "word",
+    "ms sql": "sql server",
+    "mssql": "sql server",
+    "nodejs": "node.js",
+    "node js": "node.js",
+    "reactjs": "react",
+    "angularjs": "angular",
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "aws": "amazon web services",
+    "qa": "quality assurance",
+}
+
+# Words that appear in names but never identify a skill on their own
+NAME_STOPWORDS = {
+    "new", "level", "entry", "advanced", "intermediate", "basic", "test",
+    "assessment", "skills", "skill", "the", "and", "of", "for", "in", "with",
+    "to", "a", "an", "report", "solution", "essentials", "fundamentals",
+    "fundamental", "knowledge", "short", "form", "general", "professional",
+    "edition", "version", "us", "uk", "international",
+}
+
+_PAREN_RE = re.compile(r"\([^)]*\)")
+_TOKEN_RE = re.compile(r"\.?[a-z0-9]+(?:[.#+][a-z0-9]+)*[#+]*")
+
+
+def _tokens(text):
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def normalize_skill(skill: str) -> str:
+    """Lowercased, punctuation-light phrase ("SQL  Server" -> "sql server")."""
+    return " ".join(_tokens(skill))
+
+
+def _compact(phrase: str) -> str:
+    # "node js" / "nodejs" / "node.js" all compact to "nodejs"
+    return re.sub(r"[^a-z0-9#+]", "", phrase)
+
+
+def _name_phrases(name: str):
+    """Candidate skill phrases (1..MAX_NGRAM token n-grams) from a name."""
+    tokens = _tokens(_PAREN_RE.sub(" ", name))
+    phrases = set()
+    for n in range(1, MAX_NGRAM + 1):
+        for i in range(len(tokens) - n + 1):
+            gram = tokens[i:i + n]
+            if gram[0] in NAME_STOPWORDS or gram[-1] in NAME_STOPWORDS:
+                continue
+            phrases.add(" ".join(gram))
+    return phrases, " ".join(tokens)
+
+
+def _match_score(skill, name_phrases, bare_name):
+    """
+    1.0 exact name, 0.8 whole-phrase match inside the name, otherwise the
+    best fuzzy ratio against the name's phrases (scaled, >= 0.85 only).
+    """
+    if skill == bare_name:
+        return 1.0
+    if skill in name_phrases:
+        # Shorter names are more specific to the skill ("Java 8" > "Java Web Services")
+        return 0.8 + 0.1 * len(skill) / max(len(bare_name), 1)
+
+    best = 0.0
+    matcher = difflib.SequenceMatcher(None, b=skill)
+    for phrase in name_phrases:
+        if abs(len(phrase) - len(skill)) > 3:
+            continue
+        matcher.set_seq1(phrase)
+        # Cheap upper bounds first; full ratio() only for plausible matches
+        if matcher.real_quick_ratio() < 0.85 or matcher.quick_ratio() < 0.85:
+            continue
+        best = max(best, matcher.ratio())
+    return 0.6 * best if best >= 0.85 else 0.0
+
+
+def build_skill_index(catalog):
+    """
+    catalog: list of dicts with assessment_name, url, description, test_type.
+    Returns the JSON-serializable lookup table.
+    """
+    parsed = [_name_phrases(row["assessment_name"]) for row in catalog]
+
+    vocabulary = set()
+    for phrases, _ in parsed:
+        vocabulary |= phrases
+    vocabulary |= set(SKILL_ALIASES.values())
+
+    skills = {}
+    for skill in sorted(vocabulary):
+        scored = []
+        for row, (phrases, bare_name) in enumerate(parsed):
+            score = _match_score(skill, phrases, bare_name)
+            if score > 0:
+                scored.append((row, round(score, 4)))
+        if scored:
+            scored.sort(key=lambda item: (-item[1], len(catalog[item[0]]["assessment_name"])))
+            skills[skill] = scored[:MAX_ENTRIES_PER_SKILL]
+
+    rows = [{k: row.get(k) for k in CATALOG_FIELDS if k in row} for row in catalog]
+    # Everything the table serves, so any name / field / alias change is a new version
+    content = json.dumps({"catalog": rows, "skills": skills}, sort_keys=True, default=str)
+    return {
+        "version": hashlib.sha256(content.encode("utf-8")).hexdigest()[:12],
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "catalog": rows,
+        "skills": skills,
+    }
+
+
+class SkillIndex:
+    def __init__(self, table: dict):
+        self.version = table.get("version")
+        self.catalog = table["catalog"]
+        self.skills = table["skills"]
+        self.compact = {_compact(k): k for k in self.skills}
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def lookup(self, skill: str):
+        """Ranked catalog rows for one skill, or None if it isn't covered."""
+        phrase = normalize_skill(skill)
+        # Compact matching joins split spellings ("node js"); a bare word
+        # must match exactly, or "net" would find ".net"
+        compact = self.compact.get(_compact(phrase)) if _compact(phrase) != phrase else None
+        for key in (phrase, SKILL_ALIASES.get(phrase), compact):
+            if key and key in self.skills:
+                return self.skills[key]
+        return None
+
+    def resolve(self, intent: dict, per_skill: int = MAX_ENTRIES_PER_SKILL, min_items: int = 5):
+        """
+        Splits the intent's technical skills into covered and residual.
+        Returns (items, residual_intent): items interleave the top
+        `per_skill` rows of each covered skill so every skill is represented;
+        residual_intent is the intent with only uncovered technical skills,
+        or None when nothing is left that needs embedding search (and the
+        table alone yields at least `min_items` rows).
+        """
+        covered, uncovered = [], []
+        for skill in intent.get("technical_skills", []):
+            entries = self.lookup(skill)
+            (covered if entries else uncovered).append(entries or skill)
+
+        items, seen = [], set()
+        for rank in range(per_skill):
+            for entries in covered:
+                if rank < len(entries):
+                    row = entries[rank][0]
+                    if row not in seen:
+                        seen.add(row)
+                        items.append(dict(self.catalog[row]))
+
+        residual = dict(intent, technical_skills=uncovered)
+        needs_search = (
+            bool(uncovered or residual.get("behavioral_skills"))
+            or len(items) < min_items
+        )
+        return items, (residual if needs_search else None)
+
+
+def main():
+    from backend.prepare_data import OUTPUT_PATH, load_catalog
+
+    parser = argparse.ArgumentParser(description="Build the skill -> assessment lookup table")
+    parser.add_argument("--input", default=OUTPUT_PATH)
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    catalog = load_catalog(args.input).fillna("").to_dict("records")
+
+    table = build_skill_index(catalog)
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(table, f, ensure_ascii=False)
+
+    print("✅ Skill index saved:", args.output)
+    print("✅ Skills indexed:", len(table["skills"]))
+
+
+if __name__ == "__main__":
+    main()
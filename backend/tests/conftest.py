@@ -0,0 +1,7 @@
+import os
+
+# query_understanding builds its LLM clients at import time; the tests swap
+# in the offline fakes from benchmarks/fakes.py, so any token will do.
+os.environ.setdefault("GITHUB_TOKEN", "test")
+os.environ.setdefault("INTENT_CACHE_ENABLED", "0")
+os.environ.setdefault("RESPONSE_CACHE_PATH", "")
@@ -0,0 +1,99 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.build_index import build_index
+from backend.vectorstore.local_index import LocalIndex, MANIFEST_FILE, resolve_index_dir
+from benchmarks.fakes import FakeEncoder
+
+
+class CountingEncoder(FakeEncoder):
+    def __init__(self):
+        super().__init__(dim=16)
+        self.encoded = 0
+
+    def encode(self, sentences, **kwargs):
+        self.encoded += 1 if isinstance(sentences, str) else len(sentences)
+        return super().encode(sentences, **kwargs)
+
+
+def catalog(durations=(10, 20, -1)):
+    names = ["Java 8", "Python", "Teamwork"]
+    return pd.DataFrame({
+        "assessment_name": names,
+        "url": [f"https://example.com/{i}" for i in range(len(names))],
+        "description": [f"{n} assessment" for n in names],
+        "test_type": ["K", "K", "P"],
+        "duration": list(durations),
+        "remote_testing": [1, 0, 1],
+        "adaptive_irt": [0, 0, 1],
+        "language": ["English", "English", ""],
+        "search_text": [f"{n}. {n} assessment" for n in names],
+    })
+
+
+def manifest(version_dir):
+    with open(os.path.join(version_dir, MANIFEST_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def encoder():
+    return CountingEncoder()
+
+
+def test_first_build_encodes_every_row(tmp_path, encoder):
+    version_dir = build_index(catalog(), encoder, "fake", str(tmp_path))
+
+    m = manifest(version_dir)
+    assert (m["rows"], m["encoded_rows"], m["reused_rows"]) == (3, 3, 0)
+    assert encoder.encoded == 3
+    assert resolve_index_dir(str(tmp_path)) == version_dir
+
+
+def test_rebuild_reencodes_only_changed_rows(tmp_path, encoder):
+    first = build_index(catalog(), encoder, "fake", str(tmp_path))
+
+    df = catalog()
+    df.loc[1, "search_text"] = "Python 3. Python assessment"
+    second = build_index(df, encoder, "fake", str(tmp_path))
+
+    m = manifest(second)
+    assert second != first
+    assert (m["encoded_rows"], m["reused_rows"]) == (1, 2)
+    assert encoder.encoded == 4
+
+    old, new = LocalIndex(first), LocalIndex(second)
+    np.testing.assert_array_equal(new.embeddings[[0, 2]], old.embeddings[[0, 2]])
+    np.testing.assert_allclose(new.embeddings[1], FakeEncoder(16).encode(df.loc[1, "search_text"]))
+
+
+def test_unchanged_catalog_is_a_no_op(tmp_path, encoder):
+    first = build_index(catalog(), encoder, "fake", str(tmp_path))
+    assert build_index(catalog(), encoder, "fake", str(tmp_path)) == first
+    assert encoder.encoded == 3
+
+
+def test_metadata_change_reuses_all_vectors(tmp_path, encoder):
+    first = build_index(catalog(), encoder, "fake", str(tmp_path))
+    second = build_index(catalog(durations=(10, 25, -1)), encoder, "fake", str(tmp_path))
+
+    assert second != first
+    assert manifest(second)["reused_rows"] == 3
+    assert LocalIndex(second).metadatas[1]["duration"] == 25
+
+
+def test_other_model_reencodes(tmp_path, encoder):
+    build_index(catalog(), encoder, "fake", str(tmp_path))
+    m = manifest(build_index(catalog(), encoder, "other-fake", str(tmp_path)))
+    assert m["encoded_rows"] == 3
+
+
+def test_unknown_filter_columns_are_left_out(tmp_path, encoder):
+    version_dir = build_index(catalog(durations=(-1, -1, -1)), encoder, "fake", str(tmp_path))
+    meta = LocalIndex(version_dir).get(include=["metadatas"], limit=1)["metadatas"][0]
+    assert "duration" not in meta
+    assert meta["remote_testing"] == 1
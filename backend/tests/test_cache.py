@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from backend.cache import LRUCache, SQLiteCache, TieredCache, make_key, normalize_text
+from backend.llm import query_understanding
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for TTL checks."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+def test_lru_get_set_and_eviction():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1          # "a" is now most recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_ttl(clock):
+    cache = LRUCache(ttl=10)
+    cache.set("k", "v")
+    clock[0] += 9
+    assert cache.get("k") == "v"
+    clock[0] += 2
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_sqlite_roundtrip_and_ttl(tmp_path, clock):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), ttl=10)
+    cache.set("k", {"skills": ["java"]})
+    assert cache.get("k") == {"skills": ["java"]}
+
+    clock[0] += 11
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_sqlite_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteCache(path).set("k", [1, 2])
+    assert SQLiteCache(path).get("k") == [1, 2]
+
+
+def test_tiered_promotes_disk_hits(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "cache.sqlite3"))
+    disk.set("k", "v")
+    cache = TieredCache(LRUCache(), disk)
+
+    assert cache.get("k") == "v"
+    assert cache.stats()["hits"] == 1
+    assert cache.memory.get("k") == "v"
+
+
+def test_tiered_memory_clear_keeps_disk(tmp_path):
+    cache = TieredCache(LRUCache(), SQLiteCache(str(tmp_path / "cache.sqlite3")))
+    cache.set("k", "v")
+    cache.memory.clear()
+    assert cache.get("k") == "v"
+
+
+def test_keys_ignore_case_and_whitespace():
+    assert make_key(normalize_text(" Java  Developer ")) == make_key(normalize_text("java developer"))
+    assert make_key("a", "b") != make_key("a b")
+
+
+def test_intent_key_changes_with_prompt_version(monkeypatch):
+    key = query_understanding.intent_cache_key("java developer")
+    monkeypatch.setattr(query_understanding, "PROMPT_VERSION", "test-next")
+    assert query_understanding.intent_cache_key("java developer") != key
+
+
+def test_intent_key_changes_with_output_mode(monkeypatch):
+    monkeypatch.setattr(query_understanding, "INTENT_STRUCTURED", False)
+    key = query_understanding.intent_cache_key("java developer")
+    monkeypatch.setattr(query_understanding, "INTENT_STRUCTURED", True)
+    assert query_understanding.intent_cache_key("java developer") != key
@@ -0,0 +1,80 @@
+import itertools
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from backend import prepare_data
+from backend.filters import matches, parse_filters, supported, to_where
+from backend.vectorstore.local_index import EMBEDDINGS_FILE, METADATA_ARROW_FILE, LocalIndex
+
+ROWS = [
+    {"duration": 20, "remote_testing": 1, "adaptive_irt": 1},
+    {"duration": 45, "remote_testing": 0, "adaptive_irt": 0},
+    {"duration": 30, "remote_testing": -1, "adaptive_irt": 0},
+    {"duration": -1, "remote_testing": 1, "adaptive_irt": -1},
+    {"duration": 60, "remote_testing": 1, "adaptive_irt": 1},
+    {"duration": None, "remote_testing": None, "adaptive_irt": None},
+    {},
+]
+
+# Every combination of the three filters, including none
+FILTERS = [
+    {k: v for k, v in zip(("max_duration", "remote", "adaptive"), combo) if v is not None}
+    for combo in itertools.product((None, 30), (None, True), (None, True))
+]
+
+
+def memory_index():
+    embeddings = np.eye(len(ROWS), dtype=np.float32)
+    return LocalIndex.from_arrays(embeddings, [dict(r) for r in ROWS])
+
+
+def arrow_index(tmp_path):
+    # Same layout as build_index writes; nulls stand for missing values
+    np.save(tmp_path / EMBEDDINGS_FILE, np.eye(len(ROWS), dtype=np.float32))
+    rows = [{"duration": r.get("duration"), "remote_testing": r.get("remote_testing"),
+             "adaptive_irt": r.get("adaptive_irt")} for r in ROWS]
+    prepare_data.write_arrow(pa.Table.from_pylist(rows), str(tmp_path / METADATA_ARROW_FILE))
+    return LocalIndex(str(tmp_path))
+
+
+@pytest.mark.parametrize("filters", FILTERS, ids=str)
+def test_where_mask_agrees_with_matches(filters, tmp_path):
+    expected = [matches(row, filters) for row in ROWS]
+    where = to_where(filters)
+
+    assert memory_index().mask(where).tolist() == expected
+    assert arrow_index(tmp_path).mask(where).tolist() == expected
+
+
+def test_unknown_values_pass_every_filter():
+    filters = {"max_duration": 5, "remote": True, "adaptive": True}
+    assert memory_index().mask(to_where(filters)).tolist() == [
+        False, False, False, True, False, True, True
+    ]
+
+
+def test_no_filters_means_no_where():
+    assert to_where({}) is None
+    assert memory_index().mask(None).all()
+
+
+@pytest.mark.parametrize("query, filters", [
+    ("java test under 30 minutes", {"max_duration": 30}),
+    ("sales test, 40 mins max, remote only", {"max_duration": 40, "remote": True}),
+    ("no longer than 1 hour", {"max_duration": 60}),
+    ("within half an hour", {"max_duration": 30}),
+    ("adaptive testing for analysts", {"adaptive": True}),
+    ("IRT based numerical test", {"adaptive": True}),
+    ("adaptive leader with 30 minutes of prep", {}),
+    ("remote team manager", {}),
+])
+def test_parse_filters(query, filters):
+    assert parse_filters(query) == filters
+
+
+def test_supported_drops_fields_the_index_lacks():
+    filters = {"max_duration": 30, "remote": True, "adaptive": True}
+    assert supported(filters, None) == filters
+    assert supported(filters, {"duration", "language"}) == {"max_duration": 30}
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from backend.llm.json_repair import completed_field, repair_json
+from backend.llm.query_understanding import load_intent
+
+FULL = {
+    "technical_skills": ["Java", "SQL"],
+    "behavioral_skills": ["teamwork"],
+    "role_keywords": ["developer"],
+    "seniority": "mid",
+}
+
+
+def test_complete_json_is_complete():
+    intent, complete = load_intent(json.dumps(FULL))
+    assert complete
+    assert intent == FULL
+
+
+def test_code_fences_are_not_a_repair():
+    intent, complete = load_intent("```json\n" + json.dumps(FULL) + "\n```")
+    assert complete
+    assert intent == FULL
+
+
+@pytest.mark.parametrize("cut", [25, 40, 60, 90, len(json.dumps(FULL)) - 1])
+def test_truncated_json_is_repaired(cut):
+    content = json.dumps(FULL)[:cut]
+    intent, complete = load_intent(content)
+
+    assert not complete
+    assert set(intent) == set(FULL)
+    assert intent["seniority"] in ("mid", "unknown")
+    # Every field the model finished before the cut survives
+    for field in ("technical_skills", "behavioral_skills", "role_keywords"):
+        value = completed_field(content, field)
+        if value is not None:
+            assert intent[field] == value
+
+
+def test_truncated_inside_value_keeps_earlier_items():
+    intent, complete = load_intent('{"technical_skills": ["Java", "SQL"], "behavioral_skills": ["team')
+    assert not complete
+    assert intent["technical_skills"] == ["Java", "SQL"]
+    assert intent["role_keywords"] == []
+    assert intent["seniority"] == "unknown"
+
+
+def test_trailing_prose_is_ignored():
+    intent, complete = load_intent("Here you go:\n" + json.dumps(FULL) + "\nHope this helps!")
+    assert not complete
+    assert intent == FULL
+
+
+def test_string_field_and_bad_seniority_are_normalized():
+    intent, _ = load_intent('{"technical_skills": "Python", "seniority": "Principal"}')
+    assert intent["technical_skills"] == ["Python"]
+    assert intent["seniority"] == "unknown"
+
+
+@pytest.mark.parametrize("content", ["", "no json here", "[1, 2]", '{"technica'])
+def test_unrecoverable_output_raises(content):
+    with pytest.raises(ValueError):
+        load_intent(content)
+
+
+def test_repair_closes_truncated_document():
+    assert repair_json('{"a": ["x", "y"], "b": ["z') == {"a": ["x", "y"], "b": ["z"]}
+    assert repair_json('{"a": ["x"], "b"') == {"a": ["x"]}
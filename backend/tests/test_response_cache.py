@@ -0,0 +1,88 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import pipeline
+from backend.api import app as app_module
+from benchmarks.fakes import install_fakes
+
+
+@pytest.fixture(scope="module", autouse=True)
+def fakes():
+    install_fakes()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Fresh response cache per test, memory tier only
+    monkeypatch.setattr(app_module, "RESPONSE_CACHE_ENABLED", True)
+    monkeypatch.setattr(app_module, "RESPONSE_CACHE_PATH", "")
+    monkeypatch.setattr(app_module, "_RESPONSE_CACHE", None)
+    monkeypatch.setattr(app_module, "_RESPONSE_CACHE_VERSION", None)
+    return TestClient(app_module.app)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Counts pipeline runs behind /recommend."""
+    count = {"n": 0}
+    recommend_async = pipeline.recommend_async
+
+    async def counting(*args, **kwargs):
+        count["n"] += 1
+        return await recommend_async(*args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "recommend_async", counting)
+    return count
+
+
+def test_repeat_query_served_from_cache(client, calls):
+    first = client.post("/recommend", json={"query": "Java developer"})
+    second = client.get("/recommend", params={"query": "  java   DEVELOPER"})
+
+    assert first.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["etag"] == first.headers["etag"]
+    assert calls["n"] == 1
+
+
+def test_matching_etag_returns_304(client, calls):
+    first = client.post("/recommend", json={"query": "Java developer"})
+    etag = first.headers["etag"]
+
+    revalidated = client.post(
+        "/recommend", json={"query": "Java developer"}, headers={"If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+
+    weak = client.get(
+        "/recommend", params={"query": "Java developer"}, headers={"If-None-Match": f"W/{etag}"}
+    )
+    assert weak.status_code == 304
+
+    stale = client.post(
+        "/recommend", json={"query": "Java developer"}, headers={"If-None-Match": '"other"'}
+    )
+    assert stale.status_code == 200
+    assert calls["n"] == 1
+
+
+def test_version_change_invalidates(client, calls, monkeypatch):
+    monkeypatch.setattr(pipeline, "catalog_version", lambda: "v1")
+    first = client.post("/recommend", json={"query": "Java developer"})
+    client.post("/recommend", json={"query": "Java developer"})
+    assert calls["n"] == 1
+
+    monkeypatch.setattr(pipeline, "catalog_version", lambda: "v2")
+    second = client.post("/recommend", json={"query": "Java developer"})
+    assert calls["n"] == 2
+    # Same answer from the new catalog, so clients can still revalidate
+    assert second.headers["etag"] == first.headers["etag"]
+
+
+def test_disabled_cache_runs_pipeline_each_time(client, calls, monkeypatch):
+    monkeypatch.setattr(app_module, "RESPONSE_CACHE_ENABLED", False)
+    client.post("/recommend", json={"query": "Java developer"})
+    client.post("/recommend", json={"query": "Java developer"})
+    assert calls["n"] == 2
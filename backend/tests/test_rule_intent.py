@@ -0,0 +1,65 @@
+import pytest
+
+from backend.llm.rule_intent import RuleIntentExtractor, harvest_skill_phrases
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    return RuleIntentExtractor.from_catalog()
+
+
+def test_net_promoter_score_is_not_dotnet(extractor):
+    intent, confidence = extractor.extract("net promoter score manager")
+    assert intent["technical_skills"] == []
+    assert confidence < 1.0
+
+
+def test_lead_teams_is_leadership_not_a_role(extractor):
+    intent, _ = extractor.extract("lead teams")
+    assert intent["behavioral_skills"] == ["leadership"]
+    assert intent["role_keywords"] == []
+    assert intent["seniority"] == "unknown"
+
+
+def test_adaptive_leader_is_not_a_skill(extractor):
+    intent, _ = extractor.extract("adaptive leader")
+    assert intent["technical_skills"] == []
+
+
+def test_adjacent_role_nouns_form_one_role(extractor):
+    intent, _ = extractor.extract("ICICI bank assistant admin")
+    assert intent["role_keywords"] == ["icici bank assistant admin"]
+
+
+@pytest.mark.parametrize("query, seniority", [
+    ("0-2 years java developer", "entry"),
+    ("java developer with 2 years", "entry"),
+    ("3 years SQL analyst", "mid"),
+    ("4+ years python developer", "mid"),
+    ("Java developer with 5 years", "senior"),
+    ("junior java developer with 6 years", "entry"),   # explicit words win
+])
+def test_years_of_experience(extractor, query, seniority):
+    intent, _ = extractor.extract(query)
+    assert intent["seniority"] == seniority
+
+
+@pytest.mark.parametrize("query, skill", [
+    ("need a dot net developer", ".net"),
+    ("nodejs engineer", "node.js"),
+    ("node js engineer", "node.js"),
+])
+def test_spelled_out_aliases(extractor, query, skill):
+    intent, _ = extractor.extract(query)
+    assert skill in intent["technical_skills"]
+
+
+def test_unknown_query_has_zero_confidence(extractor):
+    intent, confidence = extractor.extract("something completely different")
+    assert confidence == 0.0
+    assert intent["technical_skills"] == intent["role_keywords"] == []
+
+
+def test_harvest_strips_versions_and_vendors():
+    phrases = harvest_skill_phrases(["Java 8 (New)", "MS Excel (New)", "HTML and CSS"])
+    assert {"java", "excel", "ms excel", "html", "css"} <= phrases
@@ -0,0 +1,102 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from backend.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    flights = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def work(x):
+        runs.append(x)
+        started.set()
+        release.wait(5)
+        return {"value": x}
+
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        leader = pool.submit(flights.do, "k", work, 1)
+        started.wait(5)
+        waiters = [pool.submit(flights.do, "k", work, 1) for _ in range(7)]
+        # Let the waiters reach future.result() before the leader finishes
+        time.sleep(0.05)
+        release.set()
+        results = [leader.result()] + [w.result() for w in waiters]
+
+    assert runs == [1]
+    assert all(r is results[0] for r in results)
+    assert len(flights) == 0
+
+
+def test_different_keys_run_separately():
+    flights = SingleFlight("test")
+    assert flights.do("a", lambda: 1) == 1
+    assert flights.do("b", lambda: 2) == 2
+
+
+def test_leader_exception_reaches_waiters():
+    flights = SingleFlight("test")
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    with concurrent.futures.ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flights.do, "k", fail)
+        started.wait(5)
+        waiter = pool.submit(flights.do, "k", fail)
+        time.sleep(0.05)
+        release.set()
+        with pytest.raises(ValueError):
+            leader.result()
+        with pytest.raises(ValueError):
+            waiter.result()
+
+    # Nothing is kept after a failure, so the next call runs again
+    assert flights.do("k", lambda: "ok") == "ok"
+
+
+def test_async_calls_share_one_task():
+    flights = AsyncSingleFlight("test")
+    runs = []
+
+    async def work(x):
+        runs.append(x)
+        await asyncio.sleep(0.05)
+        return [x]
+
+    async def main():
+        return await asyncio.gather(*(flights.do("k", work, 1) for _ in range(10)))
+
+    results = asyncio.run(main())
+    assert runs == [1]
+    assert all(r is results[0] for r in results)
+    assert len(flights) == 0
+
+
+def test_async_timeout_does_not_cancel_the_run():
+    flights = AsyncSingleFlight("test")
+    runs = []
+
+    async def slow():
+        runs.append(1)
+        await asyncio.sleep(0.1)
+        return "done"
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await flights.do("k", slow, timeout=0.01)
+        # A later caller joins the same, still running computation
+        return await flights.do("k", slow)
+
+    assert asyncio.run(main()) == "done"
+    assert runs == [1]
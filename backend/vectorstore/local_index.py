@@ -0,0 +1,226 @@
+import json
+import os
+
+import numpy as np
+
+DEFAULT_INDEX_DIR = "data/index"
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.json"            # artifacts built before metadata.arrow
+METADATA_ARROW_FILE = "metadata.arrow"
+MANIFEST_FILE = "manifest.json"
+LATEST_FILE = "LATEST"
+
+# Metadata kept as column arrays so `where` filters are vectorized
+INT_COLUMNS = ["duration", "remote_testing", "adaptive_irt"]
+STR_COLUMNS = ["test_type", "language"]
+
+_OPERATORS = {
+    "$eq": np.equal,
+    "$ne": np.not_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal,
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+}
+
+
+def _as_int(value, default=-1):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def read_metadata(index_dir: str):
+    """
+    (row dicts, column arrays) of an artifact. metadata.arrow is
+    memory-mapped and the filter columns are taken from it directly;
+    older artifacts only have metadata.json (columns is then empty).
+    """
+    arrow_path = os.path.join(index_dir, METADATA_ARROW_FILE)
+    if not os.path.exists(arrow_path):
+        with open(os.path.join(index_dir, METADATA_FILE), encoding="utf-8") as f:
+            return json.load(f), {}
+
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(arrow_path, "r")).read_all()
+    columns = {}
+    for name in INT_COLUMNS:
+        if name in table.column_names:
+            column = table.column(name).fill_null(-1)
+            columns[name] = column.to_numpy().astype(np.int32, copy=False)
+    for name in STR_COLUMNS:
+        if name in table.column_names:
+            column = table.column(name).fill_null("")
+            columns[name] = np.asarray(column.to_pylist(), dtype=object)
+    return table.to_pylist(), columns
+
+
+def resolve_index_dir(index_dir: str) -> str:
+    """
+    Accepts either a concrete artifact directory or an index root whose
+    LATEST file names the current versioned artifact.
+    """
+    if os.path.exists(os.path.join(index_dir, EMBEDDINGS_FILE)):
+        return index_dir
+
+    latest_path = os.path.join(index_dir, LATEST_FILE)
+    if os.path.exists(latest_path):
+        with open(latest_path, encoding="utf-8") as f:
+            return os.path.join(index_dir, f.read().strip())
+
+    raise FileNotFoundError(f"No index artifact found under {index_dir}")
+
+
+class LocalIndex:
+    """
+    In-process cosine index over precomputed, L2-normalized embeddings.
+
+    Exposes the subset of the Chroma collection API that SHLRetriever uses
+    (`query`, `count`), so it can be swapped in without touching callers.
+    """
+
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR):
+        index_dir = resolve_index_dir(index_dir)
+
+        # Memory-mapped: pages are shared between workers and loaded lazily
+        embeddings = np.load(
+            os.path.join(index_dir, EMBEDDINGS_FILE),
+            mmap_mode="r"
+        )
+
+        metadatas, columns = read_metadata(index_dir)
+
+        # Written by backend.build_index; absent for hand-made indexes
+        manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+        manifest = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+
+        self._setup(index_dir, embeddings, metadatas, manifest, columns)
+
+    @classmethod
+    def from_arrays(cls, embeddings, metadatas, version: str = "in-memory"):
+        """Builds an index from in-memory data (benchmarks, tooling)."""
+        index = cls.__new__(cls)
+        index._setup(None, embeddings, metadatas, {"version": version})
+        return index
+
+    def _setup(self, index_dir, embeddings, metadatas, manifest, columns=None):
+        if embeddings.dtype != np.float32 or not embeddings.flags.c_contiguous:
+            embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+        if len(metadatas) != embeddings.shape[0]:
+            raise ValueError(
+                f"Index at {index_dir} is inconsistent: "
+                f"{embeddings.shape[0]} vectors vs {len(metadatas)} metadata rows"
+            )
+
+        self.index_dir = index_dir
+        self.embeddings = embeddings
+        self.metadatas = metadatas
+        self.ids = [
+            str(meta.get("id", i)) for i, meta in enumerate(metadatas)
+        ]
+        self.manifest = manifest
+        self.version = manifest.get("version") or os.path.basename(index_dir or "")
+
+        # Column arrays for `where` filters, built once at load unless the
+        # Arrow metadata already provided them
+        self.columns = dict(columns or {})
+        for name in INT_COLUMNS:
+            if name not in self.columns:
+                self.columns[name] = np.array(
+                    [_as_int(meta.get(name)) for meta in metadatas], dtype=np.int32
+                )
+        for name in STR_COLUMNS:
+            if name not in self.columns:
+                self.columns[name] = np.array(
+                    [str(meta.get(name) or "") for meta in metadatas], dtype=object
+                )
+
+    def count(self) -> int:
+        return len(self.metadatas)
+
+    def get(self, include=None, limit=None, **kwargs):
+        # Same layout as chromadb's Collection.get
+        result = {"ids": self.ids[:limit], "metadatas": self.metadatas[:limit]}
+        if include and "embeddings" in include:
+            result["embeddings"] = self.embeddings[:limit]
+        return result
+
+    def mask(self, where):
+        """Boolean row mask for a chromadb-style `where` clause."""
+        if not where:
+            return np.ones(self.count(), dtype=bool)
+
+        if "$and" in where:
+            return np.logical_and.reduce([self.mask(c) for c in where["$and"]])
+        if "$or" in where:
+            return np.logical_or.reduce([self.mask(c) for c in where["$or"]])
+
+        result = np.ones(self.count(), dtype=bool)
+        for field, condition in where.items():
+            column = self.columns.get(field)
+            if column is None:
+                column = np.array([meta.get(field) for meta in self.metadatas], dtype=object)
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for op, value in condition.items():
+                if op == "$in":
+                    result &= np.isin(column, list(value))
+                elif op == "$nin":
+                    result &= ~np.isin(column, list(value))
+                else:
+                    result &= _OPERATORS[op](column, value)
+        return result
+
+    def top_k(self, query_embeddings, n_results: int, mask=None):
+        """
+        Returns (indices, scores), each of shape (n_queries, k), sorted by
+        descending cosine similarity. Rows outside `mask` are never returned.
+        """
+        q = np.asarray(query_embeddings, dtype=np.float32)
+        if q.ndim == 1:
+            q = q[None, :]
+
+        available = self.count() if mask is None else int(mask.sum())
+        k = min(n_results, available)
+        if k <= 0:
+            empty = np.empty((q.shape[0], 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        if q.shape[0] == 1:
+            scores = (self.embeddings @ q[0])[None, :]
+        else:
+            scores = q @ self.embeddings.T
+
+        if mask is not None:
+            # Excluded rows can never make the top k
+            scores = np.where(mask[None, :], scores, -np.inf)
+
+        if k < scores.shape[1]:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(
+                np.arange(scores.shape[1]), scores.shape
+            )
+
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind="stable")
+
+        indices = np.take_along_axis(candidates, order, axis=1)
+        return indices, np.take_along_axis(candidate_scores, order, axis=1)
+
+    def query(self, query_embeddings, n_results: int = 10, where=None, **kwargs):
+        # Same result layout (and `where` syntax) as chromadb's Collection.query
+        mask = self.mask(where) if where else None
+        indices, scores = self.top_k(query_embeddings, n_results, mask=mask)
+
+        return {
+            "ids": [[self.ids[i] for i in row] for row in indices],
+            "metadatas": [[self.metadatas[i] for i in row] for row in indices],
+            "distances": [(1.0 - row).tolist() for row in scores],
+        }
@@ -0,0 +1,140 @@
+"""
+Compares query-encoder backends: PyTorch SentenceTransformer vs ONNX
+Runtime (fp32 and int8). Each backend runs in its own process so load time
+and RSS are measured cleanly.
+
+    python -m benchmarks.bench_encoder --iterations 200
+    # add Recall@10 (replays intents from a previous evaluate_recall run):
+    python -m benchmarks.bench_encoder --replay evaluation/cache/last_run.json
+
+Requires an exported ONNX model (python -m backend.onnx_encoder export --quantize).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.bench_pipeline import QUERIES, RESULTS_DIR, peak_rss_mb, percentiles
+
+BACKENDS = {
+    "torch": {"EMBEDDING_BACKEND": "torch"},
+    "onnx": {"EMBEDDING_BACKEND": "onnx", "ONNX_QUANTIZED": "0"},
+    "onnx-int8": {"EMBEDDING_BACKEND": "onnx", "ONNX_QUANTIZED": "1"},
+}
+
+
+def recall_at_10(replay_path, train_path, encoder):
+    from backend import pipeline
+    from evaluation.evaluate_recall import load_ground_truth, load_replay, run_query
+    from evaluation.recall_at_k import recall_at_k
+
+    pipeline.retriever.model = encoder
+    _, replay = load_replay(replay_path)
+    gt = load_ground_truth(train_path)
+
+    recalls = []
+    for query, true_urls in gt.items():
+        outcome = run_query(query, replay.get(query), "intent", top_k=30, max_results=10)
+        recalls.append(recall_at_k(outcome["predicted_urls"], true_urls, k=10))
+    return sum(recalls) / len(recalls) if recalls else 0.0
+
+
+def child(args):
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+
+    from backend.retriever import get_model
+    encoder = get_model()
+    load_s = time.perf_counter() - start
+    rss_loaded = peak_rss_mb()
+
+    # First call pays one-off allocation costs; report it separately
+    t = time.perf_counter()
+    encoder.encode(QUERIES[0], normalize_embeddings=True, show_progress_bar=False)
+    first_ms = (time.perf_counter() - t) * 1000
+
+    latencies = []
+    for i in range(args.iterations):
+        t = time.perf_counter()
+        encoder.encode(QUERIES[i % len(QUERIES)], normalize_embeddings=True, show_progress_bar=False)
+        latencies.append((time.perf_counter() - t) * 1000)
+
+    t = time.perf_counter()
+    encoder.encode(QUERIES * 8, normalize_embeddings=True, show_progress_bar=False, batch_size=64)
+    batch_ms = (time.perf_counter() - t) * 1000
+
+    result = {
+        "load_s": load_s,
+        "first_encode_ms": first_ms,
+        "single_query": percentiles(latencies),
+        "batch_64_ms": batch_ms,
+        "rss_before_load_mb": rss_before,
+        "rss_after_load_mb": rss_loaded,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if args.replay:
+        result["recall@10"] = recall_at_10(args.replay, args.train, encoder)
+
+    print(json.dumps(result))
+
+
+def run_backend(name, args):
+    env = dict(os.environ, **BACKENDS[name])
+    cmd = [sys.executable, "-m", "benchmarks.bench_encoder", "--child",
+           "--iterations", str(args.iterations), "--train", args.train]
+    if args.replay:
+        cmd += ["--replay", args.replay]
+
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr else "failed"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Encoder backend benchmark")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--replay", default=None, help="evaluate_recall cache for Recall@10")
+    parser.add_argument("--train", default="data/Train.csv")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        child(args)
+        return
+
+    results = {name: run_backend(name, args) for name in args.backends}
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, "encoder-" + datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now().isoformat(), "config": vars(args),
+                   "backends": results}, f, indent=2)
+
+    print("================================")
+    for name, r in results.items():
+        if "error" in r:
+            print(f"{name:>10}: ❌ {r['error']}")
+            continue
+        line = (f"{name:>10}: load {r['load_s']:.2f}s  "
+                f"p50 {r['single_query']['p50_ms']:.2f}ms  p95 {r['single_query']['p95_ms']:.2f}ms  "
+                f"RSS {r['peak_rss_mb']:.0f}MB")
+        if "recall@10" in r:
+            line += f"  Recall@10 {r['recall@10']:.3f}"
+        print(line)
+    print(f"Results: {output}")
+    print("================================")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Offline latency benchmark for the recommendation pipeline.
+
+    python -m benchmarks.bench_pipeline --iterations 200 --clients 16
+
+Reports per-stage p50/p95/p99, throughput of the FastAPI app under N
+concurrent clients, cold-start time and peak RSS, and writes everything to
+benchmarks/results/<timestamp>.json (compare runs with benchmarks.compare).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Offline defaults; must be set before backend modules are imported
+os.environ.setdefault("GITHUB_TOKEN", "offline-benchmark")
+os.environ.setdefault("INTENT_CACHE_ENABLED", "0")
+# The benchmark repeats queries; cached /recommend responses would hide the pipeline
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "0")
+# Concurrent clients send identical queries; coalescing would merge them into one run
+os.environ.setdefault("COALESCE_REQUESTS", "0")
+
+RESULTS_DIR = "benchmarks/results"
+
+FIRST_RESULT_RE = re.compile(r"first_result=([0-9.]+)ms")
+
+QUERIES = [
+    "Java developer who works with business teams",
+    "Senior Python engineer with SQL and AWS",
+    "Entry level sales assistant with good communication",
+    "Data analyst with Excel and Tableau, stakeholder management",
+    "QA tester with Selenium and JavaScript",
+    "Manager with leadership and negotiation skills",
+    "Junior .NET developer, teamwork",
+    "Linux administrator with Docker",
+]
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered),
+        "p50_ms": pick(50),
+        "p95_ms": pick(95),
+        "p99_ms": pick(99),
+        "max_ms": ordered[-1],
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def bench_stages(iterations):
+    """Times each stage of recommend() in isolation."""
+    from backend.balancer import balance_results
+    from backend.llm.query_understanding import extract_intent
+    from backend.pipeline import retriever
+    from backend.query_builder import build_expanded_query, build_lexical_query
+
+    timings = {s: [] for s in ["intent", "expand", "encode", "search", "balance", "total"]}
+
+    def timed(stage, fn):
+        start = time.perf_counter()
+        value = fn()
+        timings[stage].append((time.perf_counter() - start) * 1000)
+        return value
+
+    for i in range(iterations):
+        query = QUERIES[i % len(QUERIES)]
+        start = time.perf_counter()
+        intent = timed("intent", lambda: extract_intent(query))
+        expanded = timed("expand", lambda: build_expanded_query(intent))
+        lexical = build_lexical_query(intent)
+        embedding = timed("encode", lambda: retriever.encode(expanded))
+        retrieved = timed("search", lambda: retriever.search(embedding, 30, lexical))
+        timed("balance", lambda: balance_results(retrieved, intent, max_results=10))
+        timings["total"].append((time.perf_counter() - start) * 1000)
+
+    return {stage: percentiles(values) for stage, values in timings.items()}
+
+
+async def bench_http(clients, requests_per_client):
+    """N concurrent clients hammering POST /recommend through the ASGI app."""
+    import httpx
+
+    from backend.api.app import app
+
+    latencies = []
+    first_results = []
+    errors = 0
+
+    async def client_loop(client_id, client):
+        nonlocal errors
+        for i in range(requests_per_client):
+            query = QUERIES[(client_id + i) % len(QUERIES)]
+            start = time.perf_counter()
+            response = await client.post(
+                "/recommend", json={"query": query}, headers={"X-Timing": "1"}
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors += 1
+            match = FIRST_RESULT_RE.search(response.headers.get("X-Timing", ""))
+            if match:
+                first_results.append(float(match.group(1)))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(c, client) for c in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    total = clients * requests_per_client
+    return {
+        "clients": clients,
+        "requests": total,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+        "latency": percentiles(latencies),
+        "time_to_first_result": percentiles(first_results),
+    }
+
+
+def cold_start_child(args):
+    """Runs in a fresh interpreter: import the app and serve one request."""
+    t0 = time.perf_counter()
+    from fastapi.testclient import TestClient
+
+    from backend.api.app import app
+    import_s = time.perf_counter() - t0
+
+    from benchmarks.fakes import install_fakes
+    install_fakes(args.llm_latency_ms, real_encoder=args.real_encoder)
+
+    t1 = time.perf_counter()
+    response = TestClient(app).post("/recommend", json={"query": QUERIES[0]})
+    first_request_s = time.perf_counter() - t1
+
+    print(json.dumps({
+        "import_s": import_s,
+        "first_request_s": first_request_s,
+        "total_s": time.perf_counter() - t0,
+        "status_code": response.status_code,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def bench_cold_start(args):
+    cmd = [sys.executable, "-m", "benchmarks.bench_pipeline", "--cold-start-child",
+           "--llm-latency-ms", str(args.llm_latency_ms)]
+    if args.real_encoder:
+        cmd.append("--real-encoder")
+    if args.intent_streaming:
+        cmd.append("--intent-streaming")
+
+    start = time.perf_counter()
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    wall_s = time.perf_counter() - start
+
+    # The app prints a startup banner; the result is the last line
+    result = json.loads(out.strip().splitlines()[-1])
+    result["process_wall_s"] = wall_s
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline pipeline latency benchmark")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests-per-client", type=int, default=20)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0,
+                        help="simulated LLM round-trip for the fake client")
+    parser.add_argument("--real-encoder", action="store_true",
+                        help="use the real SentenceTransformer instead of the hashing encoder")
+    parser.add_argument("--intent-streaming", action="store_true",
+                        help="stream the intent and start retrieval early (INTENT_STREAMING=1)")
+    parser.add_argument("--skip-cold-start", action="store_true")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--cold-start-child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.intent_streaming:
+        os.environ["INTENT_STREAMING"] = "1"
+    if args.cold_start_child:
+        cold_start_child(args)
+        return
+
+    cold_start = None if args.skip_cold_start else bench_cold_start(args)
+
+    from benchmarks.fakes import install_fakes
+    install_fakes(args.llm_latency_ms, real_encoder=args.real_encoder)
+
+    stages = bench_stages(args.iterations)
+    http = asyncio.run(bench_http(args.clients, args.requests_per_client))
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "config": vars(args),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "cold_start": cold_start,
+        "stages": stages,
+        "http": http,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print("================================")
+    for stage, p in stages.items():
+        print(f"{stage:>8}: p50 {p['p50_ms']:.2f}ms  p95 {p['p95_ms']:.2f}ms  p99 {p['p99_ms']:.2f}ms")
+    print(f"HTTP: {http['throughput_rps']:.1f} req/s with {http['clients']} clients, "
+          f"p95 {http['latency']['p95_ms']:.1f}ms, errors {http['errors']}")
+    if http["time_to_first_result"]:
+        print(f"Time to first result: p50 {http['time_to_first_result']['p50_ms']:.1f}ms  "
+              f"p95 {http['time_to_first_result']['p95_ms']:.1f}ms")
+    if cold_start:
+        print(f"Cold start: {cold_start['total_s']:.2f}s "
+              f"(import {cold_start['import_s']:.2f}s, first request {cold_start['first_request_s']:.2f}s)")
+    print(f"Peak RSS: {report['peak_rss_mb']:.0f}MB")
+    print(f"Results: {output}")
+    print("================================")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Compares two benchmark result files:
+
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/new.json
+"""
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def delta(old, new):
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main():
+    if len(sys.argv) != 3:
+        raise SystemExit(__doc__)
+
+    base, new = load(sys.argv[1]), load(sys.argv[2])
+
+    print(f"{'stage':>10} {'metric':>7} {'base':>10} {'new':>10} {'change':>8}")
+    for stage, stats in new["stages"].items():
+        old_stats = base["stages"].get(stage, {})
+        for metric in ["p50_ms", "p95_ms", "p99_ms"]:
+            old, cur = old_stats.get(metric, 0.0), stats.get(metric, 0.0)
+            print(f"{stage:>10} {metric[:3]:>7} {old:>10.2f} {cur:>10.2f} {delta(old, cur):>8}")
+
+    old_rps, new_rps = base["http"]["throughput_rps"], new["http"]["throughput_rps"]
+    print(f"\nThroughput: {old_rps:.1f} -> {new_rps:.1f} req/s ({delta(old_rps, new_rps)})")
+    print(f"Peak RSS:   {base['peak_rss_mb']:.0f} -> {new['peak_rss_mb']:.0f} MB "
+          f"({delta(base['peak_rss_mb'], new['peak_rss_mb'])})")
+
+    if base.get("cold_start") and new.get("cold_start"):
+        old_cs, new_cs = base["cold_start"]["total_s"], new["cold_start"]["total_s"]
+        print(f"Cold start: {old_cs:.2f} -> {new_cs:.2f} s ({delta(old_cs, new_cs)})")
+
+
+if __name__ == "__main__":
+    main()
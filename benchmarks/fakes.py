@@ -0,0 +1,173 @@
+"""
+Offline stand-ins for the LLM, the embedding model and the vector store, so
+the pipeline can be benchmarked without network access or credentials.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+CATALOG_PATH = "shl_individual_test_solutions.json"
+EMBEDDING_DIM = 384
+
+TECHNICAL_TERMS = {
+    "java", "python", "sql", "javascript", "c#", ".net", "excel", "selenium",
+    "html", "css", "react", "angular", "aws", "linux", "docker", "tableau",
+}
+BEHAVIORAL_TERMS = {
+    "teamwork", "collaboration", "communication", "leadership",
+    "stakeholder", "sales", "customer", "negotiation",
+}
+ROLE_TERMS = {
+    "developer", "engineer", "analyst", "manager", "consultant",
+    "administrator", "tester", "assistant",
+}
+SENIORITY_TERMS = {"graduate": "entry", "junior": "entry", "senior": "senior", "lead": "senior"}
+
+_TOKEN_RE = re.compile(r"[a-z0-9#.+]+")
+
+
+def _tokens(text):
+    return [t.strip(".") or t for t in _TOKEN_RE.findall(text.lower())]
+
+
+def fake_intent(query: str) -> dict:
+    """Deterministic keyword intent with the same schema as extract_intent."""
+    tokens = _tokens(query)
+    seniority = next(
+        (SENIORITY_TERMS[t] for t in tokens if t in SENIORITY_TERMS), "unknown"
+    )
+    return {
+        "technical_skills": sorted({t for t in tokens if t in TECHNICAL_TERMS}),
+        "behavioral_skills": sorted({t for t in tokens if t in BEHAVIORAL_TERMS}),
+        "role_keywords": sorted({t for t in tokens if t in ROLE_TERMS}),
+        "seniority": seniority,
+    }
+
+
+def _user_input(messages):
+    prompt = messages[-1]["content"]
+    return prompt.split("Input:", 1)[-1].strip()
+
+
+def _completion(content):
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class _FakeCompletions:
+    def __init__(self, latency_ms):
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def create(self, model, messages, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency_ms / 1000)
+        return _completion(json.dumps(fake_intent(_user_input(messages))))
+
+
+class _FakeAsyncCompletions(_FakeCompletions):
+    async def create(self, model, messages, **kwargs):
+        self.calls += 1
+        content = json.dumps(fake_intent(_user_input(messages)))
+        if kwargs.get("stream"):
+            return self._stream(content)
+        await asyncio.sleep(self.latency_ms / 1000)
+        return _completion(content)
+
+    async def _stream(self, content, chunk_chars=8):
+        # Same total latency as a blocking call, spread evenly over the chunks
+        chunks = [content[i:i + chunk_chars] for i in range(0, len(content), chunk_chars)]
+        for chunk in chunks:
+            await asyncio.sleep(self.latency_ms / 1000 / len(chunks))
+            delta = SimpleNamespace(content=chunk)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class FakeOpenAI:
+    """Mimics `client.chat.completions.create` with a fixed simulated latency."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.chat = SimpleNamespace(completions=_FakeCompletions(latency_ms))
+
+
+class FakeAsyncOpenAI:
+    def __init__(self, latency_ms: float = 0.0):
+        self.chat = SimpleNamespace(completions=_FakeAsyncCompletions(latency_ms))
+
+
+class FakeEncoder:
+    """
+    Hashing bag-of-words encoder with the SentenceTransformer.encode
+    signature. Texts sharing words get similar vectors, which is enough for
+    the retrieval path to behave realistically.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def _encode_one(self, text):
+        v = np.zeros(self.dim, dtype=np.float32)
+        for tok in _tokens(text):
+            h = int.from_bytes(hashlib.md5(tok.encode("utf-8")).digest()[:8], "little")
+            v[h % self.dim] += 1.0 if (h >> 63) == 0 else -1.0
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def encode(self, sentences, normalize_embeddings=True, show_progress_bar=False,
+               batch_size=32, convert_to_numpy=True):
+        if isinstance(sentences, str):
+            return self._encode_one(sentences)
+        return np.vstack([self._encode_one(s) for s in sentences])
+
+
+def load_catalog(path: str = CATALOG_PATH):
+    """Catalog rows shaped like the index metadata, from the scraped JSON."""
+    from backend.build_index import METADATA_COLUMNS
+    from backend.prepare_data import prepare, read_products
+
+    catalog = prepare(read_products(path))
+    rows = catalog[METADATA_COLUMNS].astype(object).to_dict("records")
+    for i, row in enumerate(rows):
+        row["id"] = str(i)
+    return rows
+
+
+def build_fake_index(encoder, catalog=None):
+    from backend.vectorstore.local_index import LocalIndex
+
+    catalog = catalog if catalog is not None else load_catalog()
+    texts = [f"{c['assessment_name']}. {c['description']}" for c in catalog]
+    embeddings = np.asarray(encoder.encode(texts), dtype=np.float32)
+    return LocalIndex.from_arrays(embeddings, catalog, version="benchmark")
+
+
+def install_fakes(llm_latency_ms: float = 0.0, real_encoder: bool = False):
+    """
+    Points the live pipeline modules at the fakes. Must run before the first
+    request; returns the (sync, async) fake LLM clients for call counting.
+    """
+    from backend import pipeline
+    from backend.llm import query_understanding
+
+    sync_client = FakeOpenAI(llm_latency_ms)
+    async_client = FakeAsyncOpenAI(llm_latency_ms)
+    query_understanding.client = sync_client
+    query_understanding.async_client = async_client
+
+    if real_encoder:
+        from backend.retriever import get_model
+        encoder = get_model()
+    else:
+        encoder = FakeEncoder()
+
+    pipeline.retriever.model = encoder
+    pipeline.retriever.collection = build_fake_index(encoder)
+    return sync_client, async_client
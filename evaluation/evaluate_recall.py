@@ -1,41 +1,275 @@
-import pandas as pd
+import argparse
+import json
+import os
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
 
-from backend.pipeline import recommend
+from evaluation.metrics import average_precision_at_k, reciprocal_rank
 from evaluation.recall_at_k import recall_at_k
 
 TRAIN_PATH = "data/Train.csv"
+REPLAY_PATH = "evaluation/cache/last_run.json"
+REPORT_PATH = "evaluation/reports/recall_report.json"
+
+STAGES = ["intent", "skill_lookup", "expand", "encode", "search", "rerank", "balance"]
 
-def main():
-    df = pd.read_csv(TRAIN_PATH)
+
+def load_ground_truth(path):
+    df = pd.read_csv(path)
 
     # 🔧 FIX: normalize column names
     df.columns = [c.strip().lower() for c in df.columns]
 
-    print("CSV columns after normalization:", df.columns.tolist())
-    print(df.head(), "\n")
-
-    # Build ground truth
     gt = defaultdict(list)
-    for _, row in df.iterrows():
-        gt[row["query"]].append(row["assessment_url"])
+    for query, url in zip(df["query"], df["assessment_url"]):
+        gt[query].append(url)
+    return gt
+
+
+def load_replay(path):
+    if not path or not os.path.exists(path):
+        return {}, {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("config", {}), data.get("queries", {})
+
+
+def run_query(query, replay_entry, replay_stage, top_k, max_results, intent_mode=None,
+              rerank_mode=None):
+    """
+    Runs the recommend() stages one by one so each can be timed and
+    replayed, using the pipeline's own skill lookup and merge. With
+    replay_stage="intent" the LLM is skipped; with "retrieval" both the
+    LLM and the retrieval (lookup + vector search) are skipped.
+    intent_mode (llm | rules | hybrid) overrides INTENT_MODE and
+    rerank_mode (none | mmr | cross_encoder) overrides RERANK_MODE.
+    """
+    # Imported lazily so --help and pure replays don't load the model
+    from backend.balancer import balance_results
+    from backend.filters import parse_filters
+    from backend.llm.query_understanding import extract_intent
+    from backend.pipeline import merge_results, plan_retrieval, retriever
+    from backend.query_builder import build_expanded_query, build_lexical_query
+    from backend.rerank import RERANK_MODE, rerank
+
+    timings = {}
+
+    def timed(stage, fn, *args):
+        start = time.perf_counter()
+        value = fn(*args)
+        timings[stage] = (time.perf_counter() - start) * 1000
+        return value
+
+    if replay_stage in ("intent", "retrieval") and replay_entry:
+        intent = replay_entry["intent"]
+    else:
+        intent = timed("intent", extract_intent, query, intent_mode)
+
+    if replay_stage == "retrieval" and replay_entry:
+        expanded_query = replay_entry["expanded_query"]
+        retrieved = replay_entry["retrieved"]
+    else:
+        filters = parse_filters(query)
+        direct, residual = timed("skill_lookup", plan_retrieval, intent, filters)
+        # Only what the skill lookup table didn't cover goes to the vector store
+        expanded_query = ""
+        retrieved = direct
+        if residual is not None:
+            expanded_query = timed("expand", build_expanded_query, residual)
+            lexical_query = build_lexical_query(residual)
+            embedding = timed("encode", retriever.encode, expanded_query)
+            searched = timed("search", retriever.search, embedding, top_k, lexical_query,
+                             filters)
+            retrieved = merge_results(direct, searched)
+
+    rerank_mode = rerank_mode or RERANK_MODE
+    candidates = retrieved
+    if rerank_mode != "none":
+        candidates = timed(
+            "rerank",
+            lambda: rerank(retrieved, query,
+                           retriever.encode(build_expanded_query(intent) or query),
+                           retriever.collection, mode=rerank_mode)
+        )
+
+    results = timed(
+        "balance",
+        lambda: balance_results(results=candidates, intent=intent, max_results=max_results)
+    )
+
+    return {
+        "intent": intent,
+        "expanded_query": expanded_query,
+        "retrieved": retrieved,
+        "predicted_urls": [r["url"] for r in results],
+        "timings_ms": timings,
+    }
+
 
-    recalls = []
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[idx]
 
-    for query, true_urls in gt.items():
-        results = recommend(query, max_results=10)
-        predicted_urls = [r["url"] for r in results]
 
-        r10 = recall_at_k(predicted_urls, true_urls, k=10)
-        recalls.append(r10)
+def summarize_timings(outcomes):
+    summary = {}
+    for stage in STAGES:
+        values = [o["timings_ms"][stage] for o in outcomes if stage in o["timings_ms"]]
+        if not values:
+            continue
+        summary[stage] = {
+            "count": len(values),
+            "mean_ms": sum(values) / len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "total_ms": sum(values),
+        }
+    return summary
 
-        print(f"Query: {query}")
-        print(f"Recall@10: {r10:.2f}\n")
 
-    mean_recall = sum(recalls) / len(recalls)
+def write_json(path, payload):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Evaluate Recall@k / MAP / MRR on the train set")
+    parser.add_argument("--train", default=TRAIN_PATH)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--top-k", type=int, default=30,
+                        help="candidates fetched from the vector store")
+    parser.add_argument("--max-results", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--replay", default=None,
+                        help="cache file from a previous run to replay from")
+    parser.add_argument("--replay-stage", choices=["intent", "retrieval"], default="intent",
+                        help="intent: reuse intents only; retrieval: reuse intents and search results")
+    parser.add_argument("--cache-out", default=REPLAY_PATH,
+                        help="where to save intents/retrieval for later replays")
+    parser.add_argument("--report", default=REPORT_PATH)
+    parser.add_argument("--intent-mode", choices=["llm", "rules", "hybrid"], default=None,
+                        help="intent extractor to evaluate (default: INTENT_MODE)")
+    parser.add_argument("--rerank-mode", choices=["none", "mmr", "cross_encoder"], default=None,
+                        help="reranking stage to evaluate (default: RERANK_MODE)")
+    parser.add_argument("--baseline", default=None,
+                        help="previous report to print metric deltas against")
+    return parser.parse_args()
+
+
+def intent_source_counts():
+    from backend.metrics import INTENT_SOURCES
+    return {s: INTENT_SOURCES.value(source=s) for s in ("rules", "cache", "llm", "fallback")}
+
+
+def main():
+    args = parse_args()
+    gt = load_ground_truth(args.train)
+    queries = list(gt)
+
+    replay_config, replay = load_replay(args.replay)
+    if args.replay_stage == "retrieval" and replay and replay_config.get("top_k") != args.top_k:
+        raise SystemExit(
+            f"Replay was recorded with top_k={replay_config.get('top_k')}, "
+            f"cannot replay retrieval with top_k={args.top_k}"
+        )
+
+    sources_before = intent_source_counts()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        outcomes = list(pool.map(
+            lambda q: run_query(q, replay.get(q), args.replay_stage if args.replay else None,
+                                args.top_k, args.max_results, args.intent_mode,
+                                args.rerank_mode),
+            queries
+        ))
+    wall_time = time.perf_counter() - start
+    sources = {
+        s: count - sources_before[s] for s, count in intent_source_counts().items()
+    }
+
+    ks = sorted(set(args.k))
+    max_k = max(ks)
+    per_query = []
+    for query, outcome in zip(queries, outcomes):
+        predicted, true_urls = outcome["predicted_urls"], gt[query]
+        row = {"query": query, "predicted_urls": predicted}
+        for k in ks:
+            row[f"recall@{k}"] = recall_at_k(predicted, true_urls, k=k)
+        row[f"ap@{max_k}"] = average_precision_at_k(predicted, true_urls, k=max_k)
+        row[f"rr@{max_k}"] = reciprocal_rank(predicted, true_urls, k=max_k)
+        row["timings_ms"] = outcome["timings_ms"]
+        per_query.append(row)
+
+        print(f"Query: {query[:80]}")
+        print(f"Recall@{max_k}: {row[f'recall@{max_k}']:.2f}\n")
+
+    def mean(key):
+        return sum(r[key] for r in per_query) / len(per_query) if per_query else 0.0
+
+    metrics = {f"recall@{k}": mean(f"recall@{k}") for k in ks}
+    metrics[f"map@{max_k}"] = mean(f"ap@{max_k}")
+    metrics[f"mrr@{max_k}"] = mean(f"rr@{max_k}")
+    extracted = sum(sources.values())
+    if extracted:
+        metrics["llm_call_rate"] = (sources["llm"] + sources["fallback"]) / extracted
+
+    config = {
+        "train": args.train,
+        "top_k": args.top_k,
+        "max_results": args.max_results,
+        "concurrency": args.concurrency,
+        "replay": args.replay,
+        "replay_stage": args.replay_stage if args.replay else None,
+        "intent_mode": args.intent_mode,
+        "rerank_mode": args.rerank_mode,
+    }
+
+    write_json(args.report, {
+        "config": config,
+        "metrics": metrics,
+        "timings": summarize_timings(outcomes),
+        "wall_time_s": wall_time,
+        "num_queries": len(queries),
+        "intent_sources": sources,
+        "per_query": per_query,
+    })
+
+    if args.cache_out:
+        write_json(args.cache_out, {
+            "config": config,
+            "queries": {
+                q: {
+                    "intent": o["intent"],
+                    "expanded_query": o["expanded_query"],
+                    "retrieved": o["retrieved"],
+                }
+                for q, o in zip(queries, outcomes)
+            },
+        })
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("metrics", {})
+
     print("================================")
-    print(f"Mean Recall@10: {mean_recall:.3f}")
+    for name, value in metrics.items():
+        line = f"Mean {name}: {value:.3f}"
+        if name in baseline:
+            line += f" (baseline {baseline[name]:.3f}, {value - baseline[name]:+.3f})"
+        print(line)
+    print(f"Wall time: {wall_time:.1f}s over {len(queries)} queries")
+    print(f"Report: {args.report}")
     print("================================")
 
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,34 @@
+from evaluation.utils import normalize_url
+
+
+def _dedupe(urls, k):
+    """Normalized ids of the first k predictions, duplicates removed."""
+    seen = []
+    for u in urls[:k]:
+        uid = normalize_url(u)
+        if uid not in seen:
+            seen.append(uid)
+    return seen
+
+
+def average_precision_at_k(predicted_urls, true_urls, k=10):
+    true_ids = {normalize_url(u) for u in true_urls}
+    if not true_ids:
+        return 0.0
+
+    hits = 0
+    score = 0.0
+    for rank, uid in enumerate(_dedupe(predicted_urls, k), start=1):
+        if uid in true_ids:
+            hits += 1
+            score += hits / rank
+
+    return score / min(len(true_ids), k)
+
+
+def reciprocal_rank(predicted_urls, true_urls, k=10):
+    true_ids = {normalize_url(u) for u in true_urls}
+    for rank, uid in enumerate(_dedupe(predicted_urls, k), start=1):
+        if uid in true_ids:
+            return 1.0 / rank
+    return 0.0
@@ -0,0 +1,216 @@
+"""
+Bandwidth / time comparison of the ways scrape_shl can fetch a product page:
+
+    playwright          full render (images, fonts, stylesheets, trackers)
+    playwright_blocked  render with block_heavy_resources()
+    http                plain GET + extract_details() (the fast path)
+
+It also reports how often the fast path's fields match the rendered page's.
+Pages fetched over HTTP can be saved as offline fixtures together with the
+fields Playwright extracted from them (source "playwright"); --offline
+re-checks extract_details() against the fixtures without a browser, network
+or Playwright install. Only "playwright" fixtures measure fast-path parity;
+hand-made ones (source "handmade") pin the selector logic.
+
+    python scraping/compare_fetch.py --limit 20 --save-html scraping/fixtures
+    python scraping/compare_fetch.py --offline scraping/fixtures
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, List
+
+from page_fields import (
+    DETAIL_SELECTORS,
+    EXTRACT_DETAILS_JS,
+    META_FALLBACKS,
+    MULTI_VALUE_FIELDS,
+    extract_details,
+)
+
+FIELDS = list(DETAIL_SELECTORS)
+EXPECTED_FILE = 'expected.json'
+
+
+def slug(url: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', url.lower().split('/view/')[-1]).strip('-') or 'index'
+
+
+def normalize(value: str) -> str:
+    # textContent and get_text() differ only in whitespace
+    return ' '.join((value or '').split())
+
+
+def agreement(expected: Dict[str, str], actual: Dict[str, str]) -> Dict[str, bool]:
+    return {f: normalize(expected.get(f)) == normalize(actual.get(f)) for f in FIELDS}
+
+
+async def render(context, url: str) -> Dict:
+    from scrape_shl import CONFIG
+
+    page = await context.new_page()
+    transferred = 0
+
+    async def count(request):
+        nonlocal transferred
+        try:
+            sizes = await request.sizes()
+            transferred += sizes['responseBodySize'] + sizes['responseHeadersSize']
+        except Exception:
+            pass
+
+    page.on('requestfinished', count)
+    started = time.perf_counter()
+    await page.goto(url, wait_until='networkidle', timeout=CONFIG['navigation_timeout'])
+    details = await page.evaluate(EXTRACT_DETAILS_JS, {
+        'selectors': DETAIL_SELECTORS,
+        'multi': MULTI_VALUE_FIELDS,
+        'meta': META_FALLBACKS
+    })
+    seconds = time.perf_counter() - started
+    await page.close()
+    return {'seconds': seconds, 'bytes': transferred, 'details': details}
+
+
+async def fetch_http(client, url: str) -> Dict:
+    started = time.perf_counter()
+    response = await client.get(url)
+    response.raise_for_status()
+    details = extract_details(response.text)
+    seconds = time.perf_counter() - started
+    header_bytes = sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+    return {
+        'seconds': seconds,
+        'bytes': len(response.content) + header_bytes,
+        'details': details,
+        'html': response.text
+    }
+
+
+def summarize(name: str, runs: List[Dict]):
+    if not runs:
+        return
+    seconds = sum(r['seconds'] for r in runs)
+    mb = sum(r['bytes'] for r in runs) / 1e6
+    print(f'{name:<20} {len(runs):>4} pages  {seconds / len(runs):7.2f} s/page  '
+          f'{mb / len(runs):8.3f} MB/page  {mb:8.2f} MB total')
+
+
+def print_agreement(rows: List[Dict[str, bool]]):
+    if not rows:
+        return
+    print('\nFast path vs rendered page, fields equal:')
+    for field in FIELDS:
+        share = sum(r[field] for r in rows) / len(rows)
+        print(f'  {field:<12} {share:6.1%}')
+
+
+async def compare_live(products: List[Dict], save_dir: str = None):
+    import httpx
+    from playwright.async_api import async_playwright
+    from scrape_shl import CONFIG, USER_AGENT, block_heavy_resources
+
+    runs = {'playwright': [], 'playwright_blocked': [], 'http': []}
+    rows = []
+    expected = {}
+
+    async with async_playwright() as p, httpx.AsyncClient(
+        headers={'User-Agent': USER_AGENT},
+        timeout=CONFIG['timeout'] / 1000,
+        follow_redirects=True
+    ) as client:
+        browser = await p.chromium.launch(headless=True, args=['--no-sandbox'])
+        full = await browser.new_context(user_agent=USER_AGENT)
+        blocked = await browser.new_context(user_agent=USER_AGENT)
+        await block_heavy_resources(blocked)
+
+        for product in products:
+            url = product['url']
+            print(f"{product['name']}")
+            try:
+                rendered = await render(full, url)
+                runs['playwright'].append(rendered)
+                runs['playwright_blocked'].append(await render(blocked, url))
+                fetched = await fetch_http(client, url)
+                runs['http'].append(fetched)
+            except Exception as error:
+                print(f'  skipped: {error}')
+                continue
+
+            rows.append(agreement(rendered['details'], fetched['details']))
+            if save_dir:
+                name = slug(url)
+                with open(os.path.join(save_dir, name + '.html'), 'w', encoding='utf-8') as f:
+                    f.write(fetched['html'])
+                expected[name] = {'url': url, 'source': 'playwright', 'details': rendered['details']}
+
+        await browser.close()
+
+    print()
+    for name, results in runs.items():
+        summarize(name, results)
+    print_agreement(rows)
+
+    if save_dir and expected:
+        # Keep fixtures already in the directory (e.g. the hand-made ones)
+        path = os.path.join(save_dir, EXPECTED_FILE)
+        saved = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                saved = json.load(f)
+        saved.update(expected)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(saved, f, indent=2, ensure_ascii=False)
+        print(f'\nSaved {len(expected)} fixtures to {save_dir}')
+
+
+def compare_offline(fixture_dir: str) -> bool:
+    """extract_details() over saved pages vs the fields Playwright saw; True if all match"""
+    with open(os.path.join(fixture_dir, EXPECTED_FILE), encoding='utf-8') as f:
+        expected = json.load(f)
+
+    rows = {}
+    for name, entry in expected.items():
+        with open(os.path.join(fixture_dir, name + '.html'), encoding='utf-8') as f:
+            details = extract_details(f.read())
+        row = agreement(entry['details'], details)
+        rows.setdefault(entry.get('source', 'playwright'), []).append(row)
+        mismatched = [field for field, ok in row.items() if not ok]
+        if mismatched:
+            print(f'{name}: differs in {", ".join(mismatched)}')
+
+    for source, source_rows in sorted(rows.items()):
+        print(f'\n{len(source_rows)} {source} fixtures')
+        print_agreement(source_rows)
+    if 'playwright' not in rows:
+        print('\nNo fixtures saved from real pages: fast-path parity is unchecked '
+              '(capture some with --save-html)')
+    return all(all(r.values()) for source_rows in rows.values() for r in source_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare product page fetch strategies')
+    parser.add_argument('--products', default='product_list.json')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--save-html', metavar='DIR',
+                        help='save fetched pages + rendered fields as offline fixtures')
+    parser.add_argument('--offline', metavar='DIR',
+                        help='check extract_details() against saved fixtures only')
+    args = parser.parse_args()
+
+    if args.offline:
+        sys.exit(0 if compare_offline(args.offline) else 1)
+
+    with open(args.products, encoding='utf-8') as f:
+        products = json.load(f)[:args.limit]
+    if args.save_html:
+        os.makedirs(args.save_html, exist_ok=True)
+    asyncio.run(compare_live(products, args.save_html))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+SQLite state for incremental, resumable catalog crawls.
+
+Per product URL it keeps the last scraped record, a hash of its content,
+the HTTP validators (ETag / Last-Modified / page hash) used to skip
+unchanged pages, and the run that last saw it. Each crawl is a run: an
+interrupted run is resumed from its saved product list, skipping products
+it already handled, and every run records its diff (added / modified /
+removed) for downstream re-indexing.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Fields that describe the product, not the scrape itself
+VOLATILE_FIELDS = {'scraped_at', 'status', 'error'}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    products TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    url TEXT PRIMARY KEY,
+    name TEXT,
+    record TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    listing_hash TEXT,
+    page_hash TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    scraped_at TEXT,
+    run_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    run_id INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    name TEXT,
+    change TEXT NOT NULL,
+    PRIMARY KEY (run_id, url)
+);
+'''
+
+
+def hash_fields(record: Dict, fields: Optional[List[str]] = None) -> str:
+    """Stable hash of a record's product fields (or only `fields`)"""
+    keys = fields or sorted(k for k in record if k not in VOLATILE_FIELDS)
+    payload = json.dumps({k: record.get(k, '') for k in keys}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CrawlState:
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.run_id: Optional[int] = None
+        self._conn = sqlite3.connect(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    # ---------- Runs ----------
+
+    def unfinished_run(self) -> Optional[Dict]:
+        """The latest run if it never finished: {'run_id', 'started_at', 'products'}"""
+        row = self._conn.execute(
+            'SELECT * FROM runs ORDER BY run_id DESC LIMIT 1'
+        ).fetchone()
+        if row is None or row['finished_at'] is not None:
+            return None
+        return {
+            'run_id': row['run_id'],
+            'started_at': row['started_at'],
+            'products': json.loads(row['products'])
+        }
+
+    def resume(self, run: Dict) -> List[Dict]:
+        """Continues an unfinished run; returns its product list"""
+        self.run_id = run['run_id']
+        return run['products']
+
+    def start_run(self, products: List[Dict]) -> int:
+        """Starts a run over `products`, abandoning any unfinished one"""
+        self._conn.execute(
+            'UPDATE runs SET finished_at = ? WHERE finished_at IS NULL',
+            ('abandoned',)
+        )
+        cursor = self._conn.execute(
+            'INSERT INTO runs (started_at, products) VALUES (?, ?)',
+            (datetime.now().isoformat(), json.dumps(products, ensure_ascii=False))
+        )
+        self._conn.commit()
+        self.run_id = cursor.lastrowid
+        return self.run_id
+
+    def finish_run(self, products: List[Dict]) -> Dict:
+        """
+        Drops products that are no longer listed (recorded as removed),
+        closes the run and returns its diff.
+        """
+        listed = {p['url'] for p in products}
+        for row in self._conn.execute('SELECT url, name FROM products').fetchall():
+            if row['url'] not in listed:
+                self._record_change(row['url'], row['name'], 'removed')
+                self._conn.execute('DELETE FROM products WHERE url = ?', (row['url'],))
+
+        self._conn.execute(
+            'UPDATE runs SET finished_at = ? WHERE run_id = ?',
+            (datetime.now().isoformat(), self.run_id)
+        )
+        self._conn.commit()
+        return self.diff(self.run_id)
+
+    def diff(self, run_id: int) -> Dict:
+        run = self._conn.execute('SELECT * FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+        diff = {
+            'run_id': run_id,
+            'started_at': run['started_at'],
+            'finished_at': run['finished_at'],
+            'added': [],
+            'modified': [],
+            'removed': []
+        }
+        rows = self._conn.execute(
+            'SELECT url, name, change FROM changes WHERE run_id = ? ORDER BY rowid', (run_id,)
+        )
+        for row in rows:
+            diff[row['change']].append({'url': row['url'], 'name': row['name']})
+        diff['unchanged'] = len(json.loads(run['products'])) - len(diff['added']) - len(diff['modified'])
+        return diff
+
+    # ---------- Products ----------
+
+    def get(self, url: str) -> Optional[Dict]:
+        row = self._conn.execute('SELECT * FROM products WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        previous = dict(row)
+        previous['record'] = json.loads(previous['record'])
+        return previous
+
+    def handled_this_run(self, previous: Optional[Dict]) -> bool:
+        return previous is not None and previous['run_id'] == self.run_id
+
+    def save(self, record: Dict, listing_hash: str, validators: Dict, change: Optional[str]):
+        """Stores a freshly scraped record; change is 'added', 'modified' or None"""
+        self._conn.execute(
+            'INSERT OR REPLACE INTO products (url, name, record, content_hash, listing_hash,'
+            ' page_hash, etag, last_modified, scraped_at, run_id)'
+            ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                record['url'], record.get('name'),
+                json.dumps(record, ensure_ascii=False), hash_fields(record), listing_hash,
+                validators.get('page_hash'), validators.get('etag'),
+                validators.get('last_modified'), record.get('scraped_at'), self.run_id
+            )
+        )
+        if change:
+            self._record_change(record['url'], record.get('name'), change)
+        # Commit per product: this is the resume checkpoint
+        self._conn.commit()
+
+    def mark_seen(self, url: str, validators: Optional[Dict] = None):
+        """Keeps the stored record for a product found unchanged in this run"""
+        validators = validators or {}
+        self._conn.execute(
+            'UPDATE products SET run_id = ?,'
+            ' page_hash = COALESCE(?, page_hash), etag = COALESCE(?, etag),'
+            ' last_modified = COALESCE(?, last_modified) WHERE url = ?',
+            (self.run_id, validators.get('page_hash'), validators.get('etag'),
+             validators.get('last_modified'), url)
+        )
+        self._conn.commit()
+
+    def _record_change(self, url: str, name: Optional[str], change: str):
+        self._conn.execute(
+            'INSERT OR REPLACE INTO changes (run_id, url, name, change) VALUES (?, ?, ?, ?)',
+            (self.run_id, url, name, change)
+        )
+
+    def close(self):
+        self._conn.close()
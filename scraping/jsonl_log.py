@@ -0,0 +1,133 @@
+"""
+Append-only JSONL output for the scraper. Each record is written as one
+line as soon as it is scraped and fsynced at checkpoints, so an
+interrupted run loses at most the records since the last checkpoint and
+can resume from the log. The final CSV / JSON files are derived from it
+in one streaming pass.
+"""
+import csv
+import json
+import logging
+import os
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class JsonlLog:
+    """Appends records to `path`, fsyncing every `fsync_every` records"""
+
+    def __init__(self, path: str, fsync_every: int = 50):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.count = 0
+        _drop_partial_line(path)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def append(self, record: Dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.count += 1
+        if self.count % self.fsync_every == 0:
+            self.sync()
+            logger.info(f'Checkpoint: {self.count} records synced to {self.path}')
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self.sync()
+        self._file.close()
+
+
+def _drop_partial_line(path: str):
+    """Truncates a half-written last line left by a crash"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return
+        # Scan back to the previous newline
+        pos = size - 1
+        while pos > 0:
+            step = min(4096, pos)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            newline = chunk.rfind(b'\n')
+            if newline >= 0:
+                pos = pos - step + newline + 1
+                break
+            pos -= step
+        f.truncate(pos)
+        logger.warning(f'Dropped a partial record at the end of {path}')
+
+
+def index_records(path: str) -> Dict[str, int]:
+    """url -> byte offset of its latest record in the log"""
+    offsets = {}
+    if not os.path.exists(path):
+        return offsets
+    with open(path, 'rb') as f:
+        offset = 0
+        for line in f:
+            try:
+                offsets[json.loads(line)['url']] = offset
+            except (ValueError, KeyError):
+                logger.warning(f'Skipping unreadable line at byte {offset} of {path}')
+            offset += len(line)
+    return offsets
+
+
+def read_records(path: str) -> Dict[str, Dict]:
+    """url -> latest record; the resume source for an interrupted run"""
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if 'url' in record:
+                records[record['url']] = record
+    return records
+
+
+def export(log_path: str, products: List[Dict], csv_path: str, json_path: str,
+           csv_headers: List[str]) -> int:
+    """
+    Writes the log's records in `products` order to CSV and JSON, one record
+    in memory at a time. Returns the number of records written.
+    """
+    offsets = index_records(log_path)
+    written = 0
+    with open(log_path, 'rb') as log, \
+            open(csv_path, 'w', newline='', encoding='utf-8') as csvfile, \
+            open(json_path, 'w', encoding='utf-8') as jsonfile:
+        writer = csv.DictWriter(csvfile, fieldnames=csv_headers, extrasaction='ignore')
+        writer.writeheader()
+        jsonfile.write('[')
+        for product in products:
+            offset = offsets.get(product['url'])
+            if offset is None:
+                continue
+            log.seek(offset)
+            record = json.loads(log.readline())
+            writer.writerow(record)
+            jsonfile.write((',\n' if written else '\n') + _indent(record))
+            written += 1
+        jsonfile.write('\n]\n' if written else ']\n')
+    return written
+
+
+def _indent(record: Dict) -> str:
+    # Same layout as json.dump(data, indent=2) of the whole list
+    text = json.dumps(record, indent=2, ensure_ascii=False)
+    return '\n'.join('  ' + line for line in text.split('\n'))
@@ -0,0 +1,139 @@
+"""
+Product page field extraction shared by the scraper's two paths: the
+selectors and the page.evaluate() script Playwright runs, and
+extract_details(), the same extraction over server-rendered HTML with
+BeautifulSoup. No Playwright import, so fixtures can be checked without a
+browser (compare_fetch.py --offline).
+"""
+from typing import Dict
+
+# Field -> CSS selectors tried in order. Shared by the browser
+# (page.evaluate) and the HTTP fast path (BeautifulSoup) extractors.
+DETAIL_SELECTORS = {
+    'title': [
+        'h1.product-title',
+        'h1.hero-title',
+        'h1',
+        '.page-title',
+        '.product-name'
+    ],
+    'description': [
+        '.product-description',
+        '.description',
+        '.intro-text',
+        'p.lead',
+        '.summary',
+        '.hero-description'
+    ],
+    'overview': [
+        '.overview',
+        '.product-overview',
+        '.about-product'
+    ],
+    'category': [
+        '.product-category',
+        '.category',
+        '.breadcrumb li:last-child',
+        '.product-type'
+    ],
+    'features': [
+        '.feature-item',
+        '.features li',
+        '.benefits li',
+        '.key-features li',
+        '.feature-list li'
+    ],
+    'benefits': [
+        '.benefit-item',
+        '.benefits-list li',
+        '.advantages li'
+    ],
+    'details': [
+        '.detail-item',
+        '.specifications li',
+        '.product-details p',
+        '.overview p',
+        '.product-info p'
+    ],
+    'duration': [
+        '.duration',
+        '.test-duration',
+        '*[class*="duration"]'
+    ],
+    'language': [
+        '.language',
+        '.languages',
+        '*[class*="language"]'
+    ]
+}
+# Fields that join every match with ' | ' instead of taking the first one
+MULTI_VALUE_FIELDS = ['features', 'benefits', 'details']
+# Fields that fall back to a <meta> tag when no selector matches
+META_FALLBACKS = {'description': 'description'}
+
+EXTRACT_DETAILS_JS = '''(spec) => {
+    const getTextContent = (selectors) => {
+        for (const selector of selectors) {
+            const element = document.querySelector(selector);
+            if (element) return element.textContent.trim();
+        }
+        return '';
+    };
+    
+    const getAllTextContent = (selectors) => {
+        const results = [];
+        for (const selector of selectors) {
+            const elements = document.querySelectorAll(selector);
+            elements.forEach(el => {
+                const text = el.textContent.trim();
+                if (text) results.push(text);
+            });
+        }
+        return results.join(' | ');
+    };
+    
+    const getMetaContent = (name) => {
+        const meta = document.querySelector(`meta[name="${name}"]`) || 
+                   document.querySelector(`meta[property="${name}"]`);
+        return meta ? meta.getAttribute('content') : '';
+    };
+    
+    const details = {};
+    for (const [field, selectors] of Object.entries(spec.selectors)) {
+        details[field] = spec.multi.includes(field)
+            ? getAllTextContent(selectors)
+            : getTextContent(selectors);
+        if (!details[field] && spec.meta[field]) {
+            details[field] = getMetaContent(spec.meta[field]) || '';
+        }
+    }
+    return details;
+}'''
+
+
+def extract_details(html: str) -> Dict[str, str]:
+    """Same extraction as EXTRACT_DETAILS_JS, over server-rendered HTML"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    def text_of(element):
+        return element.get_text().strip()
+
+    details = {}
+    for field, selectors in DETAIL_SELECTORS.items():
+        if field in MULTI_VALUE_FIELDS:
+            texts = [text_of(el) for selector in selectors for el in soup.select(selector)]
+            details[field] = ' | '.join(t for t in texts if t)
+        else:
+            details[field] = ''
+            for selector in selectors:
+                element = soup.select_one(selector)
+                if element:
+                    details[field] = text_of(element)
+                    break
+        if not details[field] and field in META_FALLBACKS:
+            name = META_FALLBACKS[field]
+            meta = soup.find('meta', attrs={'name': name}) or soup.find('meta', attrs={'property': name})
+            details[field] = (meta.get('content') or '') if meta else ''
+    return details
@@ -1,12 +1,28 @@
+import argparse
 import asyncio
 import csv
+import hashlib
 import json
 from datetime import datetime
 from typing import List, Dict, Optional
 import logging
+import os
 from playwright.async_api import async_playwright, Page, Browser
 import sys
 import re
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+from crawl_state import CrawlState, hash_fields
+from jsonl_log import JsonlLog, export, read_records
+from page_fields import (
+    DETAIL_SELECTORS,
+    EXTRACT_DETAILS_JS,
+    META_FALLBACKS,
+    MULTI_VALUE_FIELDS,
+    extract_details,
+)
 
 # Configuration
 CONFIG = {
@@ -15,12 +31,53 @@ CONFIG = {
     'retry_attempts': 3,
     'retry_delay': 2000,
     'output_file': 'shl_individual_test_solutions.csv',
+    # Append-only record log (one JSON line per product); the CSV and JSON
+    # outputs are derived from it. '<log>.partial' is the in-progress run.
+    'jsonl_file': 'shl_individual_test_solutions.jsonl',
+    'fsync_every': 50,
     'navigation_timeout': 60000,
     'min_products': 377,
     'max_pages': 32,
-    'items_per_page': 12
+    'items_per_page': 12,
+    # Product detail pages: browser pages open at once, and the overall
+    # page-load rate (token bucket) shared by all of them
+    'concurrency': 4,
+    'requests_per_second': 2.0,
+    'burst': 2,
+    # Incremental crawl: only re-render new or changed products, resume
+    # interrupted runs, and write each run's added/modified/removed diff
+    'incremental': True,
+    'state_db': 'scrape_state.sqlite3',
+    'diff_file': 'catalog_diff.json',
+    # Requests the browser aborts: resource types, and hosts (trackers)
+    'block_resource_types': ['image', 'media', 'font', 'stylesheet'],
+    'block_hosts': [
+        'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+        'facebook.net', 'facebook.com', 'linkedin.com', 'licdn.com',
+        'hotjar.com', 'clarity.ms', 'bing.com', 'cookielaw.org', 'onetrust.com'
+    ],
+    # Parse server-rendered HTML over plain HTTP (httpx + beautifulsoup4) and
+    # render with Playwright only when one of these fields comes back empty.
+    # These are the fields product pages actually carry (the last full
+    # render filled title / description / category for 374+ of 377
+    # products, the other detail fields for none). Fields the product's
+    # previous record had are required too, so a re-scrape never loses one.
+    'http_fast_path': True,
+    'fast_path_required_fields': ['title', 'description', 'category']
 }
 
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+CSV_HEADERS = [
+    'name', 'url', 'title', 'description', 'overview', 'category',
+    'remote_testing', 'adaptive_irt', 'test_type', 'features', 
+    'benefits', 'details', 'duration', 'language', 'scraped_at', 'status'
+]
+
+# Catalog table columns; a change here means the product changed
+LISTING_FIELDS = ['name', 'remoteTesting', 'adaptive', 'testType']
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -50,6 +107,45 @@ async def with_retry(func, retries: int = CONFIG['retry_attempts']):
             await delay(CONFIG['retry_delay'] * (i + 1))
 
 
+class TokenBucket:
+    """Async rate limiter: `rate` acquisitions per second, bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def block_heavy_resources(context):
+    """Aborts images, fonts, stylesheets, media and tracker requests for every page"""
+    blocked_types = set(CONFIG['block_resource_types'])
+    blocked_hosts = tuple(CONFIG['block_hosts'])
+
+    async def handle(route):
+        request = route.request
+        host = urlparse(request.url).hostname or ''
+        if request.resource_type in blocked_types or host.endswith(blocked_hosts):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route('**/*', handle)
+
+
 def get_pagination_url(page_num: int) -> str:
     """Generate pagination URL for given page number"""
     if page_num == 1:
@@ -190,12 +286,37 @@ async def get_all_product_links(page: Page) -> List[Dict[str, str]]:
     return unique_products
 
 
-async def scrape_product_details(page: Page, product: Dict[str, str]) -> Dict[str, str]:
+def build_record(product: Dict[str, str], details: Dict[str, str]) -> Dict[str, str]:
+    return {
+        'name': product['name'],
+        'url': product['url'],
+        'title': details.get('title') or product['name'],
+        'description': details.get('description', ''),
+        'overview': details.get('overview', ''),
+        'category': details.get('category', ''),
+        'remote_testing': product.get('remoteTesting', ''),
+        'adaptive_irt': product.get('adaptive', ''),
+        'test_type': product.get('testType', ''),
+        'features': details.get('features', ''),
+        'benefits': details.get('benefits', ''),
+        'details': details.get('details', ''),
+        'duration': details.get('duration', ''),
+        'language': details.get('language', ''),
+        'scraped_at': datetime.now().isoformat(),
+        'status': 'success'
+    }
+
+
+async def scrape_product_details(page: Page, product: Dict[str, str],
+                                 limiter: Optional[TokenBucket] = None) -> Dict[str, str]:
     """Scrape individual product details"""
     logger.info(f"Scraping: {product['name']}")
     
     try:
         async def navigate():
+            # Retries wait for a token too, so they count against the rate
+            if limiter:
+                await limiter.acquire()
             await page.goto(
                 product['url'],
                 wait_until='networkidle',
@@ -206,110 +327,13 @@ async def scrape_product_details(page: Page, product: Dict[str, str]) -> Dict[st
         await page.wait_for_timeout(2000)
         
         # Extract product details with fallbacks
-        details = await page.evaluate('''() => {
-            const getTextContent = (selectors) => {
-                for (const selector of selectors) {
-                    const element = document.querySelector(selector);
-                    if (element) return element.textContent.trim();
-                }
-                return '';
-            };
-            
-            const getAllTextContent = (selectors) => {
-                const results = [];
-                for (const selector of selectors) {
-                    const elements = document.querySelectorAll(selector);
-                    elements.forEach(el => {
-                        const text = el.textContent.trim();
-                        if (text) results.push(text);
-                    });
-                }
-                return results.join(' | ');
-            };
-            
-            const getMetaContent = (name) => {
-                const meta = document.querySelector(`meta[name="${name}"]`) || 
-                           document.querySelector(`meta[property="${name}"]`);
-                return meta ? meta.getAttribute('content') : '';
-            };
-            
-            return {
-                title: getTextContent([
-                    'h1.product-title',
-                    'h1.hero-title',
-                    'h1',
-                    '.page-title',
-                    '.product-name'
-                ]),
-                description: getTextContent([
-                    '.product-description',
-                    '.description',
-                    '.intro-text',
-                    'p.lead',
-                    '.summary',
-                    '.hero-description'
-                ]) || getMetaContent('description'),
-                overview: getTextContent([
-                    '.overview',
-                    '.product-overview',
-                    '.about-product'
-                ]),
-                category: getTextContent([
-                    '.product-category',
-                    '.category',
-                    '.breadcrumb li:last-child',
-                    '.product-type'
-                ]),
-                features: getAllTextContent([
-                    '.feature-item',
-                    '.features li',
-                    '.benefits li',
-                    '.key-features li',
-                    '.feature-list li'
-                ]),
-                benefits: getAllTextContent([
-                    '.benefit-item',
-                    '.benefits-list li',
-                    '.advantages li'
-                ]),
-                details: getAllTextContent([
-                    '.detail-item',
-                    '.specifications li',
-                    '.product-details p',
-                    '.overview p',
-                    '.product-info p'
-                ]),
-                duration: getTextContent([
-                    '.duration',
-                    '.test-duration',
-                    '*[class*="duration"]'
-                ]),
-                language: getTextContent([
-                    '.language',
-                    '.languages',
-                    '*[class*="language"]'
-                ])
-            };
-        }''')
+        details = await page.evaluate(EXTRACT_DETAILS_JS, {
+            'selectors': DETAIL_SELECTORS,
+            'multi': MULTI_VALUE_FIELDS,
+            'meta': META_FALLBACKS
+        })
         
-        return {
-            'name': product['name'],
-            'url': product['url'],
-            'title': details.get('title') or product['name'],
-            'description': details.get('description', ''),
-            'overview': details.get('overview', ''),
-            'category': details.get('category', ''),
-            'remote_testing': product.get('remoteTesting', ''),
-            'adaptive_irt': product.get('adaptive', ''),
-            'test_type': product.get('testType', ''),
-            'features': details.get('features', ''),
-            'benefits': details.get('benefits', ''),
-            'details': details.get('details', ''),
-            'duration': details.get('duration', ''),
-            'language': details.get('language', ''),
-            'scraped_at': datetime.now().isoformat(),
-            'status': 'success'
-        }
+        return build_record(product, details)
         
     except Exception as error:
         logger.error(f"Error scraping {product['name']}: {str(error)}")
@@ -334,20 +358,254 @@ async def scrape_product_details(page: Page, product: Dict[str, str]) -> Dict[st
         }
 
 
+def make_http_client(pool_size: int):
+    """
+    Pooled HTTP client for the fast path, or None when it is disabled or
+    httpx / beautifulsoup4 are not installed.
+    """
+    if not CONFIG['http_fast_path']:
+        return None
+    try:
+        import httpx
+        import bs4  # noqa: F401  (used by extract_details)
+    except ImportError:
+        logger.warning('⚠️ httpx / beautifulsoup4 not installed, rendering every page with Playwright')
+        return None
+
+    return httpx.AsyncClient(
+        headers={'User-Agent': USER_AGENT},
+        timeout=CONFIG['timeout'] / 1000,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+    )
+
+
+async def fetch_details_http(client, product: Dict[str, str],
+                             limiter: Optional[TokenBucket] = None,
+                             html: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """Fields parsed from the server-rendered HTML (fetched unless given), or None on failure"""
+    try:
+        if html is None:
+            async def fetch():
+                if limiter:
+                    await limiter.acquire()
+                response = await client.get(product['url'])
+                response.raise_for_status()
+                return response.text
+
+            html = await with_retry(fetch)
+        return extract_details(html)
+    except Exception as error:
+        logger.warning(f"Fast path failed for {product['name']}: {str(error)}")
+        return None
+
+
+class FastPathStats:
+    """How often the HTTP fast path was enough, and which fields sent pages to Playwright"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.missing_fields: Counter = Counter()
+
+    def record(self, missing: List[str]):
+        if missing:
+            self.misses += 1
+            self.missing_fields.update(missing)
+        else:
+            self.hits += 1
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        if not total:
+            return 'Fast path: not used'
+        text = f'Fast path: {self.hits}/{total} pages over HTTP ({self.hits / total:.1%})'
+        if self.missing_fields:
+            top = ', '.join(f'{f} {n}' for f, n in self.missing_fields.most_common(5))
+            text += f'; rendered because of missing {top}'
+        return text
+
+
+def required_fields(previous_record: Optional[Dict] = None) -> List[str]:
+    """CONFIG['fast_path_required_fields'] plus the detail fields the previous record had"""
+    required = list(CONFIG['fast_path_required_fields'])
+    if previous_record and previous_record.get('status') == 'success':
+        required += [f for f in DETAIL_SELECTORS if previous_record.get(f) and f not in required]
+    return required
+
+
+async def scrape_product(page: Page, product: Dict[str, str],
+                         limiter: Optional[TokenBucket] = None,
+                         client=None, html: Optional[str] = None,
+                         previous_record: Optional[Dict] = None,
+                         stats: Optional[FastPathStats] = None) -> Dict[str, str]:
+    """
+    HTTP fast path first when a client is given; Playwright when that fails
+    or leaves any of required_fields(previous_record) empty.
+    """
+    if client is not None:
+        details = await fetch_details_http(client, product, limiter, html)
+        required = required_fields(previous_record)
+        missing = [f for f in required if not (details or {}).get(f)]
+        if stats is not None:
+            stats.record(missing)
+        if not missing:
+            logger.info(f"Scraped (HTTP): {product['name']}")
+            return build_record(product, details)
+        logger.info(f"Fast path missing {', '.join(missing)} for {product['name']}, "
+                    f"rendering with Playwright")
+    return await scrape_product_details(page, product, limiter)
+
+
+async def check_page(page: Page, url: str, previous: Optional[Dict],
+                     limiter: Optional[TokenBucket] = None) -> Dict:
+    """
+    Conditional GET of the raw HTML (no rendering). Returns the page's
+    validators and whether it is unchanged since `previous` was scraped.
+    """
+    headers = {}
+    if previous and previous.get('etag'):
+        headers['If-None-Match'] = previous['etag']
+    if previous and previous.get('last_modified'):
+        headers['If-Modified-Since'] = previous['last_modified']
+
+    if limiter:
+        await limiter.acquire()
+    try:
+        response = await page.request.get(url, headers=headers, timeout=CONFIG['timeout'])
+    except Exception as error:
+        logger.warning(f'Conditional fetch failed for {url}: {str(error)}')
+        return {'unchanged': False}
+
+    if response.status == 304:
+        return {'unchanged': True}
+
+    body = await response.body()
+    page_hash = hashlib.sha256(body).hexdigest()
+    return {
+        'etag': response.headers.get('etag'),
+        'last_modified': response.headers.get('last-modified'),
+        'page_hash': page_hash,
+        'unchanged': bool(response.ok and previous and previous.get('page_hash') == page_hash),
+        # Reused by the HTTP fast path instead of fetching the page again
+        'html': body.decode('utf-8', errors='replace') if response.ok else None
+    }
+
+
+async def refresh_product(page: Page, product: Dict[str, str], state: CrawlState,
+                          limiter: Optional[TokenBucket] = None, full: bool = False,
+                          client=None, stats: Optional[FastPathStats] = None) -> Dict[str, str]:
+    """
+    Incremental scrape_product: products already handled by this
+    (resumed) run, or unchanged since the last one, come from the state
+    store; the rest are scraped and saved with their change.
+    """
+    previous = state.get(product['url'])
+    if state.handled_this_run(previous):
+        return previous['record']
+
+    validators = await check_page(page, product['url'], previous, limiter)
+    listing_hash = hash_fields(product, LISTING_FIELDS)
+    reusable = (
+        previous is not None
+        and previous['record'].get('status') == 'success'
+        and previous['listing_hash'] == listing_hash
+    )
+    if reusable and validators['unchanged'] and not full:
+        state.mark_seen(product['url'], validators)
+        return previous['record']
+
+    html = validators.pop('html', None)
+    record = await scrape_product(
+        page, product, limiter, client, html,
+        previous_record=previous['record'] if previous else None, stats=stats
+    )
+    if record['status'] != 'success' and reusable:
+        logger.warning(f"Keeping the previous record for {product['name']}")
+        state.mark_seen(product['url'])
+        return previous['record']
+
+    if previous is None:
+        change = 'added'
+    elif hash_fields(record) != previous['content_hash']:
+        change = 'modified'
+    else:
+        change = None
+    state.save(record, listing_hash, validators, change)
+    return record
+
+
+async def scrape_all_details(context, products: List[Dict[str, str]],
+                             state: Optional[CrawlState] = None,
+                             full: bool = False,
+                             log: Optional[JsonlLog] = None,
+                             done: Optional[Dict[str, Dict]] = None) -> List[Dict[str, str]]:
+    """
+    Scrape product details with a pool of CONFIG['concurrency'] pages from one
+    browser context. Page loads share a token bucket; results keep the order
+    of `products`. With a state store, unchanged products are not re-scraped.
+    Each record is appended to `log` when it is ready; products already in
+    `done` (url -> record, from an interrupted run's log) are skipped.
+    """
+    done = done or {}
+    pool_size = max(1, min(CONFIG['concurrency'], len(products)))
+    limiter = TokenBucket(CONFIG['requests_per_second'], CONFIG['burst'])
+    semaphore = asyncio.Semaphore(pool_size)
+
+    client = make_http_client(pool_size)
+    stats = FastPathStats()
+    pages: asyncio.Queue = asyncio.Queue()
+    for _ in range(pool_size):
+        page = await context.new_page()
+        page.set_default_timeout(CONFIG['timeout'])
+        pages.put_nowait(page)
+
+    results: List[Optional[Dict[str, str]]] = [None] * len(products)
+    completed = 0
+
+    async def worker(i: int, product: Dict[str, str]):
+        nonlocal completed
+        if product['url'] in done:
+            results[i] = done[product['url']]
+            return
+
+        async with semaphore:
+            page = await pages.get()
+            try:
+                if state is not None:
+                    results[i] = await refresh_product(
+                        page, product, state, limiter, full, client, stats
+                    )
+                else:
+                    results[i] = await scrape_product(page, product, limiter, client, stats=stats)
+            finally:
+                pages.put_nowait(page)
+
+        if log is not None:
+            log.append(results[i])
+        completed += 1
+        logger.info(f'Progress: {completed + len(done)}/{len(products)}')
+
+    try:
+        await asyncio.gather(*(worker(i, p) for i, p in enumerate(products)))
+    finally:
+        while not pages.empty():
+            await pages.get_nowait().close()
+        if client is not None:
+            await client.aclose()
+            logger.info(stats.summary())
+
+    return results
+
+
 def save_to_csv(data: List[Dict[str, str]], filename: str):
     """Save scraped data to CSV file"""
     if not data:
         logger.warning('No data to save')
         return
     
-    headers = [
-        'name', 'url', 'title', 'description', 'overview', 'category',
-        'remote_testing', 'adaptive_irt', 'test_type', 'features', 
-        'benefits', 'details', 'duration', 'language', 'scraped_at', 'status'
-    ]
-    
     with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=headers, extrasaction='ignore')
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_HEADERS, extrasaction='ignore')
         writer.writeheader()
         writer.writerows(data)
     
@@ -362,8 +620,22 @@ def save_to_json(data: List[Dict[str, str]], filename: str):
     logger.info(f'Backup saved to {filename}')
 
 
-async def scrape_shl():
-    """Main scraper function"""
+async def scrape_shl(full: bool = False, restart: bool = False):
+    """
+    Main scraper function. An interrupted run is resumed from its record
+    log (unless `restart`). With CONFIG['incremental'] only new or changed
+    products are re-scraped (all of them with `full`).
+    """
+    state = CrawlState(CONFIG['state_db']) if CONFIG['incremental'] else None
+    run = state.unfinished_run() if state and not restart else None
+
+    partial_log = CONFIG['jsonl_file'] + '.partial'
+    if restart and os.path.exists(partial_log):
+        os.remove(partial_log)
+    done = read_records(partial_log)
+    if done:
+        logger.info(f'Resuming: {len(done)} products already in {partial_log}')
+
     async with async_playwright() as p:
         browser: Browser = await p.chromium.launch(
             headless=True,
@@ -371,16 +643,27 @@ async def scrape_shl():
         )
         
         context = await browser.new_context(
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            user_agent=USER_AGENT,
             viewport={'width': 1920, 'height': 1080}
         )
+        # Only the DOM text is extracted, so skip what the page doesn't need for it
+        if CONFIG['block_resource_types'] or CONFIG['block_hosts']:
+            await block_heavy_resources(context)
         
         page = await context.new_page()
         page.set_default_timeout(CONFIG['timeout'])
         
         try:
-            # Get all product links from all pages
-            products = await get_all_product_links(page)
+            if run:
+                # The interrupted run's product list; done products are skipped
+                products = state.resume(run)
+                logger.info(f"Resuming run {run['run_id']} from {run['started_at']}")
+            elif done and os.path.exists('product_list.json'):
+                with open('product_list.json', encoding='utf-8') as f:
+                    products = json.load(f)
+            else:
+                # Get all product links from all pages
+                products = await get_all_product_links(page)
             
             if not products:
                 raise Exception('No products found. The website structure may have changed.')
@@ -389,26 +672,33 @@ async def scrape_shl():
             
             # Save the product list before scraping details
             save_to_json(products, 'product_list.json')
+            if state and not run:
+                state.start_run(products)
             
-            # Scrape each product with progress tracking
-            results = []
-            for i, product in enumerate(products):
-                logger.info(f'Progress: {i + 1}/{len(products)}')
-                details = await scrape_product_details(page, product)
-                results.append(details)
-                
-                # Save intermediate results every 50 products
-                if (i + 1) % 50 == 0:
-                    save_to_csv(results, f'{CONFIG["output_file"]}.backup')
-                    save_to_json(results, f'{CONFIG["output_file"]}.backup.json')
-                    logger.info(f'Backup saved at {i + 1} products')
-                
-                # Be respectful - add delay between requests
-                await delay(1500)
+            # Scrape products concurrently; the token bucket keeps us respectful
+            logger.info(f"Using {CONFIG['concurrency']} pages at "
+                        f"{CONFIG['requests_per_second']} requests/s")
+            log = JsonlLog(partial_log, CONFIG['fsync_every'])
+            try:
+                results = await scrape_all_details(context, products, state, full, log, done)
+            finally:
+                log.close()
+            os.replace(partial_log, CONFIG['jsonl_file'])
             
-            # Save final results
-            save_to_csv(results, CONFIG['output_file'])
-            save_to_json(results, CONFIG['output_file'].replace('.csv', '.json'))
+            # Derive the final CSV / JSON from the log, in catalog order
+            json_file = CONFIG['output_file'].replace('.csv', '.json')
+            export(CONFIG['jsonl_file'], products, CONFIG['output_file'], json_file, CSV_HEADERS)
+            logger.info(f'Data saved to {CONFIG["output_file"]} and {json_file}')
+
+            if state:
+                diff = state.finish_run(products)
+                with open(CONFIG['diff_file'], 'w', encoding='utf-8') as f:
+                    json.dump(diff, f, indent=2, ensure_ascii=False)
+                logger.info(
+                    f"Catalog diff: {len(diff['added'])} added, {len(diff['modified'])} modified, "
+                    f"{len(diff['removed'])} removed, {diff['unchanged']} unchanged "
+                    f"-> {CONFIG['diff_file']}"
+                )
             
             logger.info(f'\n✅ Scraping completed!')
             logger.info(f'Total products scraped: {len(results)}')
@@ -431,12 +721,21 @@ async def scrape_shl():
             raise error
         finally:
             await browser.close()
+            if state:
+                state.close()
 
 
 async def main():
     """Entry point"""
+    parser = argparse.ArgumentParser(description='Scrape the SHL product catalog')
+    parser.add_argument('--full', action='store_true',
+                        help='re-scrape every product, even if unchanged')
+    parser.add_argument('--restart', action='store_true',
+                        help='start a new run instead of resuming an interrupted one')
+    args = parser.parse_args()
+
     try:
-        results = await scrape_shl()
+        results = await scrape_shl(full=args.full, restart=args.restart)
         logger.info('\n🎉 Scraping job completed successfully!')
         return results
     except Exception as error:
@@ -1,13 +1,26 @@
 const API_BASE = "https://genai-33tl.onrender.com";
 
+// Longer queries (whole job descriptions) are POSTed: URLs this size stay
+// well under the request-line limits of uvicorn, proxies and CDNs
+const MAX_GET_QUERY_LENGTH = 1024;
+
 export async function fetchRecommendations(query) {
-  const response = await fetch(`${API_BASE}/recommend`, {
-    method: "POST",
-    headers: {
-      "Content-Type": "application/json",
-    },
-    body: JSON.stringify({ query }),
-  });
+  const params = new URLSearchParams({ query });
+  let response;
+
+  if (params.toString().length <= MAX_GET_QUERY_LENGTH) {
+    // GET so the browser (and any CDN) can revalidate cached responses via ETag
+    response = await fetch(`${API_BASE}/recommend?${params}`);
+  }
+
+  // POST for long queries, and for backends that don't serve GET /recommend yet
+  if (!response || response.status === 405) {
+    response = await fetch(`${API_BASE}/recommend`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ query }),
+    });
+  }
 
   if (!response.ok) {
     throw new Error("Failed to fetch recommendations");